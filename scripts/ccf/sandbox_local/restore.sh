@@ -0,0 +1,67 @@
+#!/bin/bash
+
+# Copyright (c) Microsoft Corporation.
+# Licensed under the MIT license.
+
+ccf-sandbox-local-restore() {
+    set -e
+
+    REPO_ROOT="$(realpath "$(dirname "$(realpath "${BASH_SOURCE[0]}")")/../../..")"
+
+    export WORKSPACE="$(realpath ${WORKSPACE:-$REPO_ROOT/workspace})"
+    export CCF_PORT=${CCF_PORT:-8000}
+
+    # Recover from a copy of the baseline, so it can be restored again
+    if [ ! -d $WORKSPACE/baseline ]; then
+        echo "No baseline in $WORKSPACE, run snapshot.sh first" >&2
+        return 1
+    fi
+    sudo rm -rf $WORKSPACE/recovery
+    cp -r $WORKSPACE/baseline $WORKSPACE/recovery
+
+    KMS_WORKSPACE=$WORKSPACE \
+    CCF_COMMON_DIR=/workspace/recovery/common \
+    CCF_SANDBOX_ARGS="--recover \
+        --ledger-dir /workspace/recovery/ledger \
+        --snapshots-dir /workspace/recovery/snapshots \
+        --common-dir /workspace/recovery/common" \
+        docker compose up ccf-sandbox --wait --force-recreate "$@"
+    sudo chown $USER:$USER -R $WORKSPACE
+
+    export KMS_URL="https://127.0.0.1:$CCF_PORT"
+    export KMS_SERVICE_CERT_PATH="$WORKSPACE/service_cert.pem"
+    export KMS_USER_CERT_PATH="$WORKSPACE/user0_cert.pem"
+    export KMS_USER_PRIVK_PATH="$WORKSPACE/user0_privk.pem"
+    export KMS_MEMBER_CERT_PATH="$WORKSPACE/member0_cert.pem"
+    export KMS_MEMBER_PRIVK_PATH="$WORKSPACE/member0_privk.pem"
+
+    # The recovered service is opened with a new identity
+    service_status=""
+    for _ in $(seq 120); do
+        network=$(curl -k -s $KMS_URL/node/network || true)
+        service_status=$(echo "$network" | jq -r '.service_status // empty' 2>/dev/null || true)
+        if [[ "$service_status" == "Open" ]]; then
+            break
+        fi
+        sleep 1
+    done
+    if [[ "$service_status" != "Open" ]]; then
+        echo "Recovered network is not open: ${service_status:-unreachable}" >&2
+        return 1
+    fi
+    echo "$network" | jq -r '.service_certificate' > $KMS_SERVICE_CERT_PATH
+
+    set +e
+}
+
+ccf-sandbox-local-restore "$@"
+
+jq -n '{
+    WORKSPACE: env.WORKSPACE,
+    KMS_URL: env.KMS_URL,
+    KMS_SERVICE_CERT_PATH: env.KMS_SERVICE_CERT_PATH,
+    KMS_MEMBER_CERT_PATH: env.KMS_MEMBER_CERT_PATH,
+    KMS_MEMBER_PRIVK_PATH: env.KMS_MEMBER_PRIVK_PATH,
+    KMS_USER_CERT_PATH: env.KMS_USER_CERT_PATH,
+    KMS_USER_PRIVK_PATH: env.KMS_USER_PRIVK_PATH
+}'
@@ -0,0 +1,45 @@
+#!/bin/bash
+
+# Copyright (c) Microsoft Corporation.
+# Licensed under the MIT license.
+
+ccf-sandbox-local-snapshot() {
+    set -e
+
+    REPO_ROOT="$(realpath "$(dirname "$(realpath "${BASH_SOURCE[0]}")")/../../..")"
+
+    export WORKSPACE="$(realpath ${WORKSPACE:-$REPO_ROOT/workspace})"
+    BASELINE_DIR=$WORKSPACE/baseline
+    SNAPSHOTS_DIR=$WORKSPACE/sandbox_0/0.snapshots
+
+    # Recovery starts from the latest committed snapshot. The network must be started
+    # with a small --snapshot-tx-interval, and its signatures commit the snapshot.
+    for _ in $(seq 60); do
+        if compgen -G "$SNAPSHOTS_DIR/*.committed" > /dev/null; then
+            break
+        fi
+        sleep 1
+    done
+    if ! compgen -G "$SNAPSHOTS_DIR/*.committed" > /dev/null; then
+        echo "No committed snapshot in $SNAPSHOTS_DIR, start the network with --snapshot-tx-interval" >&2
+        return 1
+    fi
+
+    # Stop the network so its ledger is complete on disk
+    KMS_WORKSPACE=$WORKSPACE docker compose stop ccf-sandbox >&2
+    sudo chown $USER:$USER -R $WORKSPACE
+
+    rm -rf $BASELINE_DIR
+    mkdir -p $BASELINE_DIR/snapshots
+    cp -r $WORKSPACE/sandbox_0/0.ledger $BASELINE_DIR/ledger
+    cp $SNAPSHOTS_DIR/*.committed $BASELINE_DIR/snapshots
+    cp -r $WORKSPACE/sandbox_common $BASELINE_DIR/common
+
+    set +e
+}
+
+ccf-sandbox-local-snapshot "$@"
+
+jq -n '{
+    KMS_BASELINE_DIR: env.WORKSPACE + "/baseline"
+}'
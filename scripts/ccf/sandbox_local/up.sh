@@ -9,14 +9,15 @@ ccf-sandbox-local-up() {
     REPO_ROOT="$(realpath "$(dirname "$(realpath "${BASH_SOURCE[0]}")")/../../..")"
 
     export WORKSPACE="$(realpath ${WORKSPACE:-$REPO_ROOT/workspace})"
+    export CCF_PORT=${CCF_PORT:-8000}
     mkdir -p $WORKSPACE
     cp $REPO_ROOT/scripts/ccf/sandbox_local/join_config.json $WORKSPACE
     docker compose build ccf-sandbox >&2
-    docker compose up ccf-sandbox --wait "$@"
+    KMS_WORKSPACE=$WORKSPACE docker compose up ccf-sandbox --wait "$@"
     sudo chown $USER:$USER -R $WORKSPACE
     mkdir -p $WORKSPACE/proposals
 
-    export KMS_URL="https://127.0.0.1:8000"
+    export KMS_URL="https://127.0.0.1:$CCF_PORT"
     export KMS_SERVICE_CERT_PATH="$WORKSPACE/service_cert.pem"
     export KMS_USER_CERT_PATH="$WORKSPACE/user0_cert.pem"
     export KMS_USER_PRIVK_PATH="$WORKSPACE/user0_privk.pem"
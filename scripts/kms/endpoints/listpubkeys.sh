@@ -4,9 +4,35 @@
 # Licensed under the MIT license.
 
 listpubkeys() {
-    curl $KMS_URL/app/listpubkeys \
+    params=()
+
+    # Parse command-line arguments
+    while [[ $# -gt 0 ]]; do
+        case "$1" in
+            --cursor)
+                params+=("cursor=$2")
+                shift 2
+                ;;
+            --limit)
+                params+=("limit=$2")
+                shift 2
+                ;;
+            *)
+                echo "Unknown parameter: $1"
+                exit 1
+                ;;
+        esac
+    done
+
+    # Construct query string
+    query_string=""
+    if [[ ${#params[@]} -gt 0 ]]; then
+        query_string="?"$(IFS='&'; echo "${params[*]}")
+    fi
+
+    curl $KMS_URL/app/listpubkeys${query_string} \
         --cacert $KMS_SERVICE_CERT_PATH \
         -w '\n%{http_code}\n'
 }
 
-listpubkeys
\ No newline at end of file
+listpubkeys "$@"
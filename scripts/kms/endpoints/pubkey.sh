@@ -17,6 +17,10 @@ pubkey() {
                 params+=("fmt=$2")
                 shift 2
                 ;;
+            --valid-at)
+                params+=("validAt=$2")
+                shift 2
+                ;;
             *)
                 echo "Unknown parameter: $1"
                 exit 1
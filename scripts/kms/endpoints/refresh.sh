@@ -4,10 +4,32 @@
 # Licensed under the MIT license.
 
 refresh() {
-    curl $KMS_URL/app/refresh \
+    params=()
+
+    # Parse command-line arguments
+    while [[ $# -gt 0 ]]; do
+        case "$1" in
+            --count)
+                params+=("count=$2")
+                shift 2
+                ;;
+            *)
+                echo "Unknown parameter: $1"
+                exit 1
+                ;;
+        esac
+    done
+
+    # Construct query string
+    query_string=""
+    if [[ ${#params[@]} -gt 0 ]]; then
+        query_string="?"$(IFS='&'; echo "${params[*]}")
+    fi
+
+    curl $KMS_URL/app/refresh${query_string} \
         -X POST \
         --cacert $KMS_SERVICE_CERT_PATH \
         -w '\n%{http_code}\n'
 }
 
-refresh
\ No newline at end of file
+refresh "$@"
@@ -13,6 +13,18 @@ unwrap_key() {
     # Parse command-line arguments
     while [[ $# -gt 0 ]]; do
         case "$1" in
+            --fmt)
+                params+=("fmt=$2")
+                shift 2
+                ;;
+            --wrap-alg)
+                params+=("wrapAlg=$2")
+                shift 2
+                ;;
+            --valid-at)
+                params+=("validAt=$2")
+                shift 2
+                ;;
             --attestation)
                 attestation="$2"
                 shift 2
@@ -36,6 +48,12 @@ unwrap_key() {
         esac
     done
 
+    # Construct query string
+    query_string=""
+    if [[ ${#params[@]} -gt 0 ]]; then
+        query_string="?"$(IFS='&'; echo "${params[*]}")
+    fi
+
     auth_arg=()
     if [[ "$auth" == "member_cert" ]]; then
         auth_arg=(--cert $KMS_MEMBER_CERT_PATH --key $KMS_MEMBER_PRIVK_PATH)
@@ -45,7 +63,7 @@ unwrap_key() {
         auth_arg=(-H "Authorization: Bearer $(. $JWT_ISSUER_WORKSPACE/fetch.sh && jwt_issuer_fetch)")
     fi
 
-    curl $KMS_URL/app/unwrapKey \
+    curl $KMS_URL/app/unwrapKey${query_string} \
         -X POST \
         --cacert $KMS_SERVICE_CERT_PATH \
         "${auth_arg[@]}" \
@@ -0,0 +1,77 @@
+#!/bin/bash
+
+# Copyright (c) Microsoft Corporation.
+# Licensed under the MIT license.
+
+unwrap_keys() {
+    params=()
+    auth="jwt"
+    attestation=""
+    wrappingKey=""
+    kids=""
+
+    # Parse command-line arguments
+    while [[ $# -gt 0 ]]; do
+        case "$1" in
+            --fmt)
+                params+=("fmt=$2")
+                shift 2
+                ;;
+            --wrap-alg)
+                params+=("wrapAlg=$2")
+                shift 2
+                ;;
+            --attestation)
+                attestation="$2"
+                shift 2
+                ;;
+            --wrapping-key)
+                wrappingKey="$2"
+                shift 2
+                ;;
+            --kids)
+                # Comma separated list of kids, all non-expired keys if omitted
+                kids="$2"
+                shift 2
+                ;;
+            --auth)
+                auth="$2"
+                shift 2
+                ;;
+            *)
+                echo "Unknown parameter: $1"
+                exit 1
+                ;;
+        esac
+    done
+
+    # Construct query string
+    query_string=""
+    if [[ ${#params[@]} -gt 0 ]]; then
+        query_string="?"$(IFS='&'; echo "${params[*]}")
+    fi
+
+    kids_arg=""
+    if [[ -n "$kids" ]]; then
+        kids_arg=", \"kids\":[\"${kids//,/\",\"}\"]"
+    fi
+
+    auth_arg=()
+    if [[ "$auth" == "member_cert" ]]; then
+        auth_arg=(--cert $KMS_MEMBER_CERT_PATH --key $KMS_MEMBER_PRIVK_PATH)
+    elif [[ "$auth" == "user_cert" ]]; then
+        auth_arg=(--cert $KMS_USER_CERT_PATH --key $KMS_USER_PRIVK_PATH)
+    elif [[ "$auth" == "jwt" ]]; then
+        auth_arg=(-H "Authorization: Bearer $(. $JWT_ISSUER_WORKSPACE/fetch.sh && jwt_issuer_fetch)")
+    fi
+
+    curl $KMS_URL/app/unwrapKeys${query_string} \
+        -X POST \
+        --cacert $KMS_SERVICE_CERT_PATH \
+        "${auth_arg[@]}" \
+        -H "Content-Type: application/json" \
+        -d "{\"attestation\":$attestation, \"wrappingKey\":$wrappingKey$kids_arg}" \
+        -w '\n%{http_code}\n'
+}
+
+unwrap_keys "$@"
@@ -46,8 +46,10 @@ call_user_defined_endpoints() {
 
 js-app-set() {
 
-  # Build the KMS bundle
-  npm install && npm run build
+  # Build the KMS bundle, unless the caller built it already
+  if [[ "$KMS_BUNDLE_PREBUILT" != "true" ]]; then
+    npm install && npm run build
+  fi
 
   if [[ "$KMS_URL" == *"confidential-ledger.azure.com" || "$TEST_ENVIRONMENT" == "ccf/acl" ]]; then
     call_user_defined_endpoints
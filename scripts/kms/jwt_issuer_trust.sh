@@ -72,7 +72,7 @@ set_jwt_validation_policy() {
   (
     # If running on sandbox_local, use the user cert because KMS can only
     # authenticate user COSE signature
-    if [[ "$KMS_URL" == "https://127.0.0.1:8000" ]]; then
+    if [[ "$KMS_URL" == "https://127.0.0.1:"* ]]; then
       ccf-member-use user0
     fi
 
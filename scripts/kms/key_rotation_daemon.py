@@ -0,0 +1,266 @@
+# Copyright (c) Microsoft Corporation.
+# Licensed under the MIT license.
+
+"""
+Key rotation daemon.
+
+Keeps a fresh key available by calling /refresh ahead of the expiry of the
+latest key. The expiry of a key is set by the key rotation policy when the key
+is created, so the daemon follows the policy by tracking the `timestamp` and
+`expiry` of the latest key returned by /pubkey.
+
+Usage:
+    python scripts/kms/key_rotation_daemon.py \
+        --kms-url $KMS_URL --cacert $KMS_SERVICE_CERT_PATH --metrics-port 9464
+
+Metrics are served in the Prometheus text format on /metrics.
+"""
+
+import argparse
+import http.server
+import json
+import logging
+import os
+import random
+import threading
+import time
+
+from kms_client import KmsClient
+
+logger = logging.getLogger("key_rotation_daemon")
+
+# Fraction of the rotation interval before expiry at which a key is refreshed
+DEFAULT_LEAD_FRACTION = 0.1
+# Maximum random delay subtracted from the refresh time, so replicas do not refresh together
+DEFAULT_JITTER_SECONDS = 60.0
+# How often the latest key is checked when no refresh is due
+DEFAULT_POLL_SECONDS = 300.0
+# Retry delay while a receipt is loading
+RECEIPT_RETRY_SECONDS = 1.0
+# Exponential backoff after failed calls
+BACKOFF_BASE_SECONDS = 1.0
+BACKOFF_MAX_SECONDS = 300.0
+
+
+# Marks that no refresh was made yet, the latest key can be None
+NOT_REFRESHED = object()
+
+
+class ReceiptPending(Exception):
+    """The receipt of the latest key is loading."""
+
+
+class RotationMetrics:
+    """Counters and gauges of the daemon, rendered in the Prometheus text format."""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.values = {
+            "kms_rotation_refresh_total": 0,
+            "kms_rotation_refresh_failures_total": 0,
+            "kms_rotation_latest_key_timestamp_seconds": float("nan"),
+            "kms_rotation_latest_key_expiry_seconds": float("nan"),
+            "kms_rotation_next_refresh_seconds": float("nan"),
+            "kms_rotation_lag_seconds": 0.0,
+            "kms_rotation_last_success_seconds": float("nan"),
+        }
+
+    def set(self, name, value):
+        with self.lock:
+            self.values[name] = value
+
+    def inc(self, name):
+        with self.lock:
+            self.values[name] += 1
+
+    def get(self, name):
+        with self.lock:
+            return self.values[name]
+
+    def render(self):
+        with self.lock:
+            return "".join(f"{name} {value}\n" for name, value in self.values.items())
+
+
+def next_refresh_time(key, lead_fraction=DEFAULT_LEAD_FRACTION, jitter_seconds=0.0, rng=random):
+    """
+    Calculates when a key must be replaced, in seconds since the epoch.
+
+    The key is refreshed a fraction of its lifetime before it expires, minus a
+    random jitter. Returns None if the key does not expire.
+    """
+    if key.get("expiry") is None or key.get("timestamp") is None:
+        return None
+    timestamp = key["timestamp"] / 1000
+    expiry = key["expiry"] / 1000
+    lead = (expiry - timestamp) * lead_fraction
+    return expiry - lead - rng.uniform(0, jitter_seconds)
+
+
+def backoff_seconds(failures, rng=random):
+    """Exponential backoff with full jitter after the given number of consecutive failures."""
+    return rng.uniform(0, min(BACKOFF_MAX_SECONDS, BACKOFF_BASE_SECONDS * 2 ** failures))
+
+
+class KeyRotationDaemon:
+    """Refreshes the latest key of the KMS ahead of its expiry."""
+
+    def __init__(
+        self,
+        client,
+        metrics=None,
+        lead_fraction=DEFAULT_LEAD_FRACTION,
+        jitter_seconds=DEFAULT_JITTER_SECONDS,
+        poll_seconds=DEFAULT_POLL_SECONDS,
+        rng=random,
+    ):
+        self.client = client
+        self.metrics = metrics or RotationMetrics()
+        self.lead_fraction = lead_fraction
+        self.jitter_seconds = jitter_seconds
+        self.poll_seconds = poll_seconds
+        self.rng = rng
+        self.failures = 0
+        # Refresh time of the current key, kept so the jitter is drawn once per key
+        self.scheduled = (None, None)
+        # Latest key when the last refresh was made and the activation time of the new key
+        self.refreshed = (NOT_REFRESHED, None)
+
+    def latest_key(self):
+        """Returns the latest key, None if there are no keys, or raises if the KMS fails."""
+        status_code, body = self.client.call("GET", "pubkey")
+        if status_code == 200:
+            return body
+        if status_code == 400:
+            # The only bad request of /pubkey without parameters is an empty store
+            return None
+        if status_code == 202:
+            raise ReceiptPending()
+        raise RuntimeError(f"pubkey returned {status_code}: {body}")
+
+    def refresh(self, replaced_kid):
+        status_code, body = self.client.call("POST", "refresh")
+        if status_code != 200:
+            raise RuntimeError(f"refresh returned {status_code}: {body}")
+        self.metrics.inc("kms_rotation_refresh_total")
+        self.refreshed = (replaced_kid, body.get("timestamp", 0) / 1000)
+        logger.info("Refreshed key %s, active from %s", body.get("kid"), body.get("timestamp"))
+        return body
+
+    def refresh_time(self, key):
+        kid, refresh_at = self.scheduled
+        if kid != key.get("kid"):
+            refresh_at = next_refresh_time(key, self.lead_fraction, self.jitter_seconds, self.rng)
+            self.scheduled = (key.get("kid"), refresh_at)
+        return refresh_at
+
+    def run_once(self, now=None):
+        """Checks the latest key, refreshes it if it is due and returns the seconds to wait."""
+        now = time.time() if now is None else now
+        try:
+            key = self.latest_key()
+            kid = None if key is None else key.get("kid")
+            replaced_kid, activation_time = self.refreshed
+            if kid == replaced_kid:
+                # The new key is not visible yet, it is replicating or pending activation
+                return max(RECEIPT_RETRY_SECONDS, min(self.poll_seconds, activation_time - now))
+
+            if key is None:
+                logger.info("No keys in store, creating the first key")
+                self.refresh(kid)
+                refresh_at = now
+            else:
+                self.metrics.set("kms_rotation_latest_key_timestamp_seconds", key["timestamp"] / 1000)
+                self.metrics.set("kms_rotation_latest_key_expiry_seconds", (key.get("expiry") or float("nan")) / 1000)
+                refresh_at = self.refresh_time(key)
+                if refresh_at is None:
+                    logger.warning("Key %s does not expire, is a key rotation policy set?", kid)
+                elif refresh_at <= now:
+                    self.metrics.set("kms_rotation_lag_seconds", now - refresh_at)
+                    self.refresh(kid)
+        except ReceiptPending:
+            return RECEIPT_RETRY_SECONDS
+        except Exception as exception:
+            self.failures += 1
+            self.metrics.inc("kms_rotation_refresh_failures_total")
+            _, scheduled = self.scheduled
+            if scheduled is not None and scheduled < now:
+                self.metrics.set("kms_rotation_lag_seconds", now - scheduled)
+            delay = backoff_seconds(self.failures, self.rng)
+            logger.warning("Rotation check failed (%s), retrying in %.1fs", exception, delay)
+            return delay
+
+        self.failures = 0
+        self.metrics.set("kms_rotation_last_success_seconds", now)
+        self.metrics.set("kms_rotation_lag_seconds", 0.0)
+        if refresh_at is None:
+            self.metrics.set("kms_rotation_next_refresh_seconds", float("nan"))
+            return self.poll_seconds
+        if refresh_at <= now:
+            # Pick up the new key right away to schedule its refresh
+            return 0
+        self.metrics.set("kms_rotation_next_refresh_seconds", refresh_at)
+        return min(self.poll_seconds, refresh_at - now)
+
+    def run(self, stop_event):
+        while not stop_event.is_set():
+            stop_event.wait(self.run_once())
+
+
+def serve_metrics(metrics, port):
+    class MetricsHandler(http.server.BaseHTTPRequestHandler):
+        def do_GET(self):
+            if self.path != "/metrics":
+                self.send_error(404)
+                return
+            body = metrics.render().encode()
+            self.send_response(200)
+            self.send_header("Content-Type", "text/plain; version=0.0.4")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, *args):
+            ...
+
+    server = http.server.ThreadingHTTPServer(("", port), MetricsHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--kms-url", default=os.getenv("KMS_URL"))
+    parser.add_argument("--cacert", default=os.getenv("KMS_SERVICE_CERT_PATH"))
+    parser.add_argument("--cert", help="Client certificate, if the KMS requires one")
+    parser.add_argument("--key", help="Private key of the client certificate")
+    parser.add_argument("--lead-fraction", type=float, default=DEFAULT_LEAD_FRACTION)
+    parser.add_argument("--jitter-seconds", type=float, default=DEFAULT_JITTER_SECONDS)
+    parser.add_argument("--poll-seconds", type=float, default=DEFAULT_POLL_SECONDS)
+    parser.add_argument("--metrics-port", type=int, default=0, help="Serve metrics on this port, 0 to disable")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(message)s")
+    if not args.kms_url:
+        parser.error("--kms-url or KMS_URL is required")
+
+    daemon = KeyRotationDaemon(
+        KmsClient(args.kms_url, args.cacert, args.cert, args.key),
+        lead_fraction=args.lead_fraction,
+        jitter_seconds=args.jitter_seconds,
+        poll_seconds=args.poll_seconds,
+    )
+    if args.metrics_port:
+        serve_metrics(daemon.metrics, args.metrics_port)
+
+    stop_event = threading.Event()
+    try:
+        daemon.run(stop_event)
+    except KeyboardInterrupt:
+        stop_event.set()
+    finally:
+        daemon.client.close()
+
+
+if __name__ == "__main__":
+    main()
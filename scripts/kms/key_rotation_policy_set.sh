@@ -19,7 +19,7 @@ key_rotation_policy_set() {
     (
         # If running on sandbox_local, use the user cert because KMS can only
         # authenticate user COSE signature
-        if [[ "$KMS_URL" == "https://127.0.0.1:8000" ]]; then
+        if [[ "$KMS_URL" == "https://127.0.0.1:"* ]]; then
             ccf-member-use user0
         fi
 
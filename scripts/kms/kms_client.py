@@ -0,0 +1,188 @@
+# Copyright (c) Microsoft Corporation.
+# Licensed under the MIT license.
+
+"""
+HTTPS client for the KMS, shared by the scripts and the system tests.
+
+Connections are kept alive per node and credentials, so a caller pays the TLS
+handshake once instead of once per call. JWTs are fetched from the issuer in
+JWT_ISSUER_WORKSPACE once and reused until shortly before they expire.
+
+The environment can change between calls, as the system test fixtures recreate
+the network and the JWT issuer. Pooled connections are therefore keyed by the
+files of their certificates as well, and tokens by the fetch script of their
+issuer, so nothing from a previous environment is reused.
+"""
+
+import base64
+import http.client
+import json
+import os
+import ssl
+import subprocess
+import time
+from urllib.parse import urlencode, urlparse
+
+REPO_ROOT = os.path.realpath(os.path.join(os.path.dirname(__file__), "..", ".."))
+
+# Errors of a kept-alive connection the server closed
+DISCONNECTED = (ConnectionError,)
+# Methods retried once after a disconnect. Others may have been processed before the
+# connection closed, and a retry of POST /refresh would create a second key.
+IDEMPOTENT_METHODS = frozenset(["GET", "HEAD", "OPTIONS", "PUT", "DELETE"])
+
+# A token is fetched again when it expires within this many seconds
+TOKEN_EXPIRY_MARGIN_SECONDS = 60
+# Lifetime assumed for tokens without an exp claim
+DEFAULT_TOKEN_LIFETIME_SECONDS = 300
+
+_clients = {}
+_tokens = {}
+
+
+def ssl_context_of(cacert=None, cert=None, key=None):
+    context = ssl.create_default_context(cafile=cacert)
+    if cert:
+        context.load_cert_chain(cert, key)
+    return context
+
+
+def _file_version(path):
+    """Identifies the content of a file by its path and modification time."""
+    if not path:
+        return None
+    try:
+        return path, os.stat(path).st_mtime_ns
+    except OSError:
+        return path, None
+
+
+class KmsClient:
+    """HTTPS client keeping one connection open to a node."""
+
+    def __init__(self, base_url, cacert=None, cert=None, key=None, timeout=60):
+        url = urlparse(base_url)
+        self.host = url.hostname
+        self.port = url.port or 443
+        self.timeout = timeout
+        self.context = ssl_context_of(cacert, cert, key)
+        self.connection = None
+
+    def _connect(self):
+        if self.connection is None:
+            self.connection = http.client.HTTPSConnection(
+                self.host, self.port, context=self.context, timeout=self.timeout
+            )
+        return self.connection
+
+    def close(self):
+        if self.connection is not None:
+            self.connection.close()
+            self.connection = None
+
+    def request(self, method, path, query=None, body=None, headers=None):
+        """
+        Sends a request and returns the status code and the parsed JSON body.
+
+        body is sent as is if it is a string or bytes, and as JSON otherwise.
+        A body that is not JSON is returned as a string.
+        Idempotent methods are retried once if the server closed the connection.
+        """
+        if query:
+            path = f"{path}?{urlencode(query)}"
+        headers = dict(headers or {})
+        if body is not None and not isinstance(body, (str, bytes)):
+            body = json.dumps(body)
+            headers.setdefault("Content-Type", "application/json")
+        if isinstance(body, str):
+            body = body.encode()
+
+        attempts = 2 if method in IDEMPOTENT_METHODS else 1
+        for attempt in range(attempts):
+            connection = self._connect()
+            try:
+                connection.request(method, path, body=body, headers=headers)
+                response = connection.getresponse()
+                data = response.read().decode()
+                break
+            except DISCONNECTED:
+                self.close()
+                if attempt == attempts - 1:
+                    raise
+            except Exception:
+                self.close()
+                raise
+
+        try:
+            return response.status, json.loads(data or "{}")
+        except json.JSONDecodeError:
+            return response.status, data
+
+    def call(self, method, endpoint, body=None, headers=None):
+        """Calls an endpoint of the KMS app."""
+        return self.request(method, f"/app/{endpoint}", body=body, headers=headers)
+
+
+def get_client(base_url=None, cert=None, key=None):
+    """Returns the pooled client of a node, by default the KMS in KMS_URL."""
+    base_url = base_url or os.environ["KMS_URL"]
+    cacert = os.getenv("KMS_SERVICE_CERT_PATH")
+    pool_key = (base_url, _file_version(cacert), _file_version(cert), _file_version(key))
+    client = _clients.get(pool_key)
+    if client is None:
+        client = _clients[pool_key] = KmsClient(base_url, cacert, cert, key)
+    return client
+
+
+def close_all():
+    """Closes all pooled connections."""
+    for client in _clients.values():
+        client.close()
+    _clients.clear()
+
+
+def token_expiry(token):
+    """Returns the exp claim of a JWT in seconds since the epoch, or None."""
+    try:
+        payload = token.split(".")[1]
+        claims = json.loads(base64.urlsafe_b64decode(payload + "=" * (-len(payload) % 4)))
+        return float(claims["exp"])
+    except (IndexError, KeyError, TypeError, ValueError):
+        return None
+
+
+def get_jwt(now=None):
+    """Returns a JWT of the issuer in JWT_ISSUER_WORKSPACE, fetched again only near its expiry."""
+    now = time.time() if now is None else now
+    workspace = os.getenv("JWT_ISSUER_WORKSPACE", os.path.join(REPO_ROOT, "jwt_issuers_workspace", "default"))
+    fetch_script = os.path.join(workspace, "fetch.sh")
+    cache_key = _file_version(fetch_script)
+    token, expires_at = _tokens.get(cache_key, (None, 0))
+    if token is None or expires_at - TOKEN_EXPIRY_MARGIN_SECONDS <= now:
+        token = subprocess.run(
+            ["bash", "-c", f". {fetch_script} && jwt_issuer_fetch"],
+            cwd=REPO_ROOT,
+            check=True,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.DEVNULL,
+        ).stdout.decode().strip()
+        expires_at = token_expiry(token) or now + DEFAULT_TOKEN_LIFETIME_SECONDS
+        _tokens[cache_key] = (token, expires_at)
+    return token
+
+
+def client_cert_of(auth):
+    """Returns the certificate and private key paths of a certificate authentication method."""
+    if auth == "member_cert":
+        return os.getenv("KMS_MEMBER_CERT_PATH"), os.getenv("KMS_MEMBER_PRIVK_PATH")
+    if auth == "user_cert":
+        return os.getenv("KMS_USER_CERT_PATH"), os.getenv("KMS_USER_PRIVK_PATH")
+    return None, None
+
+
+def authenticated(auth):
+    """Returns the client and the headers for an authentication method of the endpoint scripts."""
+    if auth == "jwt":
+        return get_client(), {"Authorization": f"Bearer {get_jwt()}"}
+    cert, key = client_cert_of(auth)
+    return get_client(cert=cert, key=key), {}
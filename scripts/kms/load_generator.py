@@ -0,0 +1,387 @@
+# Copyright (c) Microsoft Corporation.
+# Licensed under the MIT license.
+
+"""
+Load generator and latency benchmark for the KMS endpoints.
+
+Drives a weighted mix of /key, /unwrapKey, /pubkey, /listpubkeys and /refresh
+from a number of concurrent workers. Every worker keeps one HTTPS connection
+open, and the JWT is fetched once, so the numbers measure the KMS rather than
+process and TLS setup. The report is printed as JSON with the p50/p95/p99
+latency, the throughput and the rate of 202 responses, per endpoint and overall.
+
+Usage:
+    python scripts/kms/load_generator.py \
+        --kms-url $KMS_URL --cacert $KMS_SERVICE_CERT_PATH \
+        --concurrency 16 --duration 30 --mix pubkey=10,key=4,unwrapKey=2,listpubkeys=2
+
+Workers pick endpoints with a seeded random generator, so runs with the same
+arguments send the same sequence of requests.
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import random
+import ssl
+import sys
+import time
+from urllib.parse import urlparse
+
+from kms_client import DISCONNECTED, IDEMPOTENT_METHODS, REPO_ROOT, client_cert_of, get_jwt, ssl_context_of
+
+ENDPOINTS = ("key", "unwrapKey", "pubkey", "listpubkeys", "refresh")
+DEFAULT_MIX = "pubkey=10,key=4,unwrapKey=2,listpubkeys=2"
+DEFAULT_ATTESTATION_PATH = os.path.join(REPO_ROOT, "test", "attestation-samples", "snp.json")
+DEFAULT_WRAPPING_KEY_PATH = os.path.join(REPO_ROOT, "test", "data-samples", "publicWrapKey.pem")
+PERCENTILES = (50, 95, 99)
+# How long setup waits for the receipt of a new key
+RECEIPT_WAIT_SECONDS = 30.0
+# Errors of a kept-alive connection the KMS closed, including a response cut short
+ASYNC_DISCONNECTED = DISCONNECTED + (asyncio.IncompleteReadError,)
+
+
+def parse_mix(mix):
+    """Parses a mix like "pubkey=10,key=4" into a dictionary of endpoint weights."""
+    weights = {}
+    for item in mix.split(","):
+        if not item.strip():
+            continue
+        name, _, weight = item.partition("=")
+        name = name.strip()
+        if name not in ENDPOINTS:
+            raise ValueError(f"Unknown endpoint {name!r}, expected one of {', '.join(ENDPOINTS)}")
+        weights[name] = float(weight) if weight else 1.0
+        if weights[name] < 0:
+            raise ValueError(f"Weight of {name} must not be negative")
+    if sum(weights.values()) <= 0:
+        raise ValueError("The mix must give a positive weight to at least one endpoint")
+    return {name: weight for name, weight in weights.items() if weight > 0}
+
+
+def percentile(sorted_values, p):
+    """Nearest-rank percentile of an already sorted list, None if it is empty."""
+    if not sorted_values:
+        return None
+    rank = max(1, -(-len(sorted_values) * p // 100))
+    return sorted_values[int(rank) - 1]
+
+
+def summarize(samples, elapsed):
+    """
+    Builds the report of a run.
+
+    samples is a list of (endpoint, status code, latency in seconds) tuples,
+    status code 0 marks a request that failed without a response.
+    """
+    def stats(selected):
+        latencies = sorted(latency for _, _, latency in selected)
+        statuses = {}
+        for _, status, _ in selected:
+            statuses[str(status)] = statuses.get(str(status), 0) + 1
+        count = len(selected)
+        return {
+            "requests": count,
+            "throughput_rps": round(count / elapsed, 2) if elapsed > 0 else None,
+            "status_codes": dict(sorted(statuses.items())),
+            "rate_202": round(statuses.get("202", 0) / count, 4) if count else None,
+            "errors": sum(n for status, n in statuses.items() if not 200 <= int(status) < 300),
+            "latency_ms": {
+                **{
+                    f"p{p}": None if not latencies else round(percentile(latencies, p) * 1000, 3)
+                    for p in PERCENTILES
+                },
+                "mean": round(sum(latencies) / count * 1000, 3) if count else None,
+                "max": round(latencies[-1] * 1000, 3) if latencies else None,
+            },
+        }
+
+    endpoints = sorted({endpoint for endpoint, _, _ in samples})
+    return {
+        "elapsed_seconds": round(elapsed, 3),
+        "total": stats(samples),
+        "endpoints": {
+            endpoint: stats([sample for sample in samples if sample[0] == endpoint])
+            for endpoint in endpoints
+        },
+    }
+
+
+class AsyncKmsConnection:
+    """HTTP/1.1 client keeping one TLS connection open to the KMS."""
+
+    def __init__(self, kms_url, ssl_context, headers=None, timeout=30):
+        url = urlparse(kms_url)
+        self.host = url.hostname
+        self.port = url.port or 443
+        self.ssl_context = ssl_context
+        self.headers = headers or {}
+        self.timeout = timeout
+        self.reader = None
+        self.writer = None
+
+    async def _connect(self):
+        if self.writer is None:
+            self.reader, self.writer = await asyncio.wait_for(
+                asyncio.open_connection(
+                    self.host, self.port, ssl=self.ssl_context, server_hostname=self.host
+                ),
+                self.timeout,
+            )
+
+    async def close(self):
+        if self.writer is not None:
+            self.writer.close()
+            try:
+                await self.writer.wait_closed()
+            except (ConnectionError, ssl.SSLError):
+                ...
+            self.reader = self.writer = None
+
+    async def _read_body(self, headers):
+        if headers.get("transfer-encoding", "").lower() == "chunked":
+            body = b""
+            while True:
+                size = int((await self.reader.readline()).split(b";")[0], 16)
+                if size == 0:
+                    await self.reader.readline()
+                    return body
+                body += await self.reader.readexactly(size)
+                await self.reader.readline()
+        return await self.reader.readexactly(int(headers.get("content-length", 0)))
+
+    async def _exchange(self, request):
+        await self._connect()
+        self.writer.write(request)
+        await self.writer.drain()
+        status_line = await self.reader.readline()
+        if not status_line:
+            raise ConnectionResetError("Connection closed by the KMS")
+        status = int(status_line.split()[1])
+        headers = {}
+        while True:
+            line = (await self.reader.readline()).decode("latin-1").strip()
+            if not line:
+                break
+            name, _, value = line.partition(":")
+            headers[name.strip().lower()] = value.strip()
+        body = await self._read_body(headers)
+        if headers.get("connection", "").lower() == "close":
+            await self.close()
+        return status, body
+
+    async def call(self, method, path, body=None):
+        """
+        Calls an endpoint of the KMS app and returns the status code and the raw body.
+
+        Idempotent methods are retried once if the KMS closed the connection.
+        """
+        data = b"" if body is None else json.dumps(body).encode()
+        headers = {
+            "Host": f"{self.host}:{self.port}",
+            "Content-Length": str(len(data)),
+            **self.headers,
+        }
+        if body is not None:
+            headers["Content-Type"] = "application/json"
+        request = (
+            f"{method} /app/{path} HTTP/1.1\r\n"
+            + "".join(f"{name}: {value}\r\n" for name, value in headers.items())
+            + "\r\n"
+        ).encode() + data
+
+        attempts = 2 if method in IDEMPOTENT_METHODS else 1
+        for attempt in range(attempts):
+            try:
+                return await asyncio.wait_for(self._exchange(request), self.timeout)
+            except ASYNC_DISCONNECTED:
+                await self.close()
+                if attempt == attempts - 1:
+                    raise
+            except BaseException:
+                await self.close()
+                raise
+
+
+class LoadGenerator:
+    """Runs a mix of KMS requests from concurrent workers and records their latencies."""
+
+    def __init__(
+        self,
+        kms_url,
+        ssl_context,
+        mix,
+        concurrency=8,
+        duration=None,
+        requests=None,
+        auth_headers=None,
+        attestation=None,
+        wrapping_key=None,
+        seed=0,
+    ):
+        self.kms_url = kms_url
+        self.ssl_context = ssl_context
+        self.mix = mix
+        self.concurrency = concurrency
+        self.duration = duration
+        self.requests = requests
+        self.auth_headers = auth_headers or {}
+        self.attestation = attestation
+        self.wrapping_key = wrapping_key
+        self.seed = seed
+        self.wrapped_kid = None
+        self.samples = []
+        self.issued = 0
+
+    def _connection(self, authenticated):
+        return AsyncKmsConnection(
+            self.kms_url, self.ssl_context, self.auth_headers if authenticated else None
+        )
+
+    def _request(self, endpoint):
+        """Returns the method, path, body and whether the request is authenticated."""
+        if endpoint == "key":
+            return "POST", "key", {"attestation": self.attestation, "wrappingKey": self.wrapping_key}, True
+        if endpoint == "unwrapKey":
+            return "POST", "unwrapKey", {
+                "attestation": self.attestation,
+                "wrappedKid": self.wrapped_kid,
+                "wrapped": "",
+                "wrappingKey": self.wrapping_key,
+            }, True
+        if endpoint == "refresh":
+            return "POST", "refresh", None, False
+        return "GET", endpoint, None, False
+
+    async def setup(self):
+        """Makes sure a key exists and gets the kid used by /unwrapKey."""
+        connection = self._connection(authenticated=True)
+        try:
+            status, body = await connection.call("GET", "pubkey")
+            if status == 400:
+                await connection.call("POST", "refresh")
+            if "key" not in self.mix and "unwrapKey" not in self.mix:
+                return
+            deadline = time.monotonic() + RECEIPT_WAIT_SECONDS
+            while True:
+                method, path, request_body, _ = self._request("key")
+                status, body = await connection.call(method, path, request_body)
+                if status != 202 or time.monotonic() > deadline:
+                    break
+                await asyncio.sleep(0.5)
+            if status != 200:
+                raise RuntimeError(f"key returned {status}: {body.decode(errors='replace')}")
+            self.wrapped_kid = json.loads(body)["wrappedKid"]
+        finally:
+            await connection.close()
+
+    def _next_request_allowed(self, deadline):
+        if self.requests is not None:
+            if self.issued >= self.requests:
+                return False
+            self.issued += 1
+        return deadline is None or time.monotonic() < deadline
+
+    async def _worker(self, index, deadline):
+        rng = random.Random(f"{self.seed}-{index}")
+        names = list(self.mix)
+        weights = [self.mix[name] for name in names]
+        connections = {}
+        try:
+            while self._next_request_allowed(deadline):
+                endpoint = rng.choices(names, weights)[0]
+                method, path, body, authenticated = self._request(endpoint)
+                if authenticated not in connections:
+                    connections[authenticated] = self._connection(authenticated)
+                start = time.perf_counter()
+                try:
+                    status, _ = await connections[authenticated].call(method, path, body)
+                except (OSError, asyncio.TimeoutError, asyncio.IncompleteReadError, ValueError):
+                    status = 0
+                self.samples.append((endpoint, status, time.perf_counter() - start))
+        finally:
+            for connection in connections.values():
+                await connection.close()
+
+    async def run(self):
+        """Runs the workers and returns the report."""
+        await self.setup()
+        deadline = None if self.duration is None else time.monotonic() + self.duration
+        start = time.perf_counter()
+        await asyncio.gather(*(self._worker(index, deadline) for index in range(self.concurrency)))
+        report = summarize(self.samples, time.perf_counter() - start)
+        report["config"] = {
+            "concurrency": self.concurrency,
+            "duration": self.duration,
+            "requests": self.requests,
+            "mix": self.mix,
+            "seed": self.seed,
+        }
+        return report
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--kms-url", default=os.getenv("KMS_URL"))
+    parser.add_argument("--cacert", default=os.getenv("KMS_SERVICE_CERT_PATH"))
+    parser.add_argument(
+        "--auth", choices=("jwt", "user_cert", "member_cert"), default="jwt",
+        help="Authentication of /key and /unwrapKey",
+    )
+    parser.add_argument("--jwt", help="JWT to use, fetched from JWT_ISSUER_WORKSPACE if not given")
+    parser.add_argument("--concurrency", type=int, default=8, help="Number of concurrent connections")
+    parser.add_argument("--duration", type=float, help="Seconds to run, 10 if --requests is not given either")
+    parser.add_argument("--requests", type=int, help="Total number of requests to send")
+    parser.add_argument("--mix", default=DEFAULT_MIX, help="Weights of the endpoints, like pubkey=10,key=4")
+    parser.add_argument("--attestation", default=DEFAULT_ATTESTATION_PATH, help="Path of the attestation JSON")
+    parser.add_argument("--wrapping-key", default=DEFAULT_WRAPPING_KEY_PATH, help="Path of the public wrapping key")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", help="Write the JSON report to this file instead of stdout")
+    args = parser.parse_args()
+
+    if not args.kms_url:
+        parser.error("--kms-url or KMS_URL is required")
+    if args.concurrency < 1:
+        parser.error("--concurrency must be at least 1")
+    try:
+        mix = parse_mix(args.mix)
+    except ValueError as error:
+        parser.error(str(error))
+    duration = args.duration if args.duration is not None or args.requests is not None else 10.0
+
+    cert, key = client_cert_of(args.auth)
+    auth_headers = {}
+    if args.auth == "jwt":
+        auth_headers["Authorization"] = f"Bearer {args.jwt or get_jwt()}"
+
+    with open(args.attestation) as f:
+        attestation = json.load(f)
+    with open(args.wrapping_key) as f:
+        wrapping_key = f.read()
+
+    generator = LoadGenerator(
+        args.kms_url,
+        ssl_context_of(args.cacert, cert, key),
+        mix,
+        concurrency=args.concurrency,
+        duration=duration,
+        requests=args.requests,
+        auth_headers=auth_headers,
+        attestation=attestation,
+        wrapping_key=wrapping_key,
+        seed=args.seed,
+    )
+    report = asyncio.run(generator.run())
+
+    output = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(output + "\n")
+    else:
+        print(output)
+    return 0 if report["total"]["requests"] else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -30,7 +30,7 @@ settings-policy-set() {
     (
         # If running on sandbox_local, use the user cert because KMS can only
         # authenticate user COSE signature
-        if [[ "$KMS_URL" == "https://127.0.0.1:8000" ]]; then
+        if [[ "$KMS_URL" == "https://127.0.0.1:"* ]]; then
             ccf-member-use user0
         fi
 
@@ -1,12 +1,11 @@
 // Copyright (c) Microsoft Corporation.
 // Licensed under the MIT license.
 
-import * as ccfapp from "@microsoft/ccf-app";
 import { ServiceResult } from "../utils/ServiceResult";
 import { IAttestationReport } from "./ISnpAttestationReport";
 import { ISnpAttestation } from "./ISnpAttestation";
-import { Base64 } from "js-base64";
 import {
+  ccf,
   snp_attestation,
   SnpAttestationResult,
 } from "@microsoft/ccf-app/global";
@@ -14,6 +13,109 @@ import { SnpAttestationClaims } from "./SnpAttestationClaims";
 import { keyReleasePolicyMap } from "../repositories/Maps";
 import { Logger, LogContext } from "../utils/Logger";
 import { KeyReleasePolicy } from "../policies/KeyReleasePolicy";
+import { LruCache } from "../utils/LruCache";
+import { base64ToArrayBuffer, toHex } from "../utils/Codec";
+
+// Number of verified attestations to keep, and for how long
+const VERIFIED_ATTESTATION_CACHE_SIZE = 64;
+const VERIFIED_ATTESTATION_CACHE_TTL_MS = 10 * 60 * 1000;
+
+// Claims of verified attestations, keyed by a digest of the attestation
+const verifiedAttestationCache = new LruCache<string, IAttestationReport>(
+  VERIFIED_ATTESTATION_CACHE_SIZE,
+  VERIFIED_ATTESTATION_CACHE_TTL_MS,
+);
+
+/**
+ * Calculates the cache key of an attestation from all of its fields.
+ * Each field is prefixed with its length, so the same characters split differently
+ * over the fields give a different key.
+ * @param attestation - The attestation to calculate the key for.
+ * @returns The hex encoded SHA-256 digest of the attestation.
+ */
+export const attestationCacheKey = (attestation: ISnpAttestation): string => {
+  const fields = [
+    attestation.evidence,
+    attestation.endorsements,
+    attestation.uvm_endorsements,
+    attestation.endorsed_tcb,
+  ]
+    .map((field) => `${field.length}:${field}`)
+    .join("");
+  return toHex(ccf.crypto.digest("SHA-256", ccf.strToBuf(fields)));
+};
+
+/**
+ * Decodes and verifies the SNP attestation and derives its claims.
+ * @param attestation - The attestation to verify.
+ * @param logContext - The log context to use.
+ * @returns A ServiceResult containing the attestation claims.
+ */
+const verifyAttestation = (
+  attestation: ISnpAttestation,
+  logContext: LogContext,
+): ServiceResult<string | IAttestationReport> => {
+  let evidence: ArrayBuffer;
+  let endorsements: ArrayBuffer;
+  let uvm_endorsements: ArrayBuffer;
+
+  try {
+    evidence = base64ToArrayBuffer(attestation.evidence);
+  } catch (exception: any) {
+    return ServiceResult.Failed<string>(
+      { errorMessage: "Malformed attestation.evidence" },
+      400,
+      logContext
+    );
+  }
+  try {
+    endorsements = base64ToArrayBuffer(attestation.endorsements);
+  } catch (exception: any) {
+    return ServiceResult.Failed<string>(
+      { errorMessage: "Malformed attestation.endorsements" },
+      400,
+      logContext
+    );
+  }
+  try {
+    uvm_endorsements = base64ToArrayBuffer(attestation.uvm_endorsements);
+  } catch (exception: any) {
+    return ServiceResult.Failed<string>(
+      { errorMessage: "Malformed attestation.uvm_endorsements" },
+      400,
+      logContext
+    );
+  }
+  try {
+    const endorsed_tcb = attestation.endorsed_tcb;
+
+    const attestationReport: SnpAttestationResult =
+      snp_attestation.verifySnpAttestation(
+        evidence,
+        endorsements,
+        uvm_endorsements,
+        endorsed_tcb,
+      );
+    Logger.debug(
+      () => `Attestation validation report: ${JSON.stringify(attestationReport)}`, logContext
+    );
+
+    const claimsProvider = new SnpAttestationClaims(attestationReport);
+    const attestationClaims = claimsProvider.getClaims();
+    Logger.debug(`Attestation claims: `, logContext, attestationClaims);
+    Logger.debug(
+      `Report Data: `, logContext,
+      attestationClaims["x-ms-sevsnpvm-reportdata"],
+    );
+    return ServiceResult.Succeeded<IAttestationReport>(attestationClaims, logContext);
+  } catch (exception: any) {
+    return ServiceResult.Failed<string>(
+      { errorMessage: `Internal error: ${exception.message}` },
+      500,
+      logContext
+    );
+  }
+};
 
 // Validate the attestation by means of the key release policy
 export const validateAttestation = (
@@ -65,78 +167,30 @@ export const validateAttestation = (
       logContext
     );
   }
-  let evidence: ArrayBuffer;
-  let endorsements: ArrayBuffer;
-  let uvm_endorsements: ArrayBuffer;
 
-  try {
-    evidence = ccfapp
-      .typedArray(Uint8Array)
-      .encode(Base64.toUint8Array(attestation.evidence));
-  } catch (exception: any) {
-    return ServiceResult.Failed<string>(
-      { errorMessage: "Malformed attestation.evidence" },
-      400,
-      logContext
-    );
-  }
-  try {
-    endorsements = ccfapp
-      .typedArray(Uint8Array)
-      .encode(Base64.toUint8Array(attestation.endorsements));
-  } catch (exception: any) {
-    return ServiceResult.Failed<string>(
-      { errorMessage: "Malformed attestation.endorsements" },
-      400,
-      logContext
-    );
-  }
-  try {
-    uvm_endorsements = ccfapp
-      .typedArray(Uint8Array)
-      .encode(Base64.toUint8Array(attestation.uvm_endorsements));
-  } catch (exception: any) {
-    return ServiceResult.Failed<string>(
-      { errorMessage: "Malformed attestation.uvm_endorsements" },
-      400,
-      logContext
-    );
+  // Reuse the claims of evidence that was verified before
+  const cacheKey = attestationCacheKey(attestation);
+  let attestationClaims = verifiedAttestationCache.get(cacheKey);
+  if (attestationClaims !== undefined) {
+    Logger.debug(`Attestation verified before, using cached claims`, logContext);
+  } else {
+    const verified = verifyAttestation(attestation, logContext);
+    if (!verified.success) {
+      return verified;
+    }
+    attestationClaims = verified.body as IAttestationReport;
+    verifiedAttestationCache.set(cacheKey, attestationClaims);
   }
-  try {
-    const endorsed_tcb = attestation.endorsed_tcb;
-
-    const attestationReport: SnpAttestationResult =
-      snp_attestation.verifySnpAttestation(
-        evidence,
-        endorsements,
-        uvm_endorsements,
-        endorsed_tcb,
-      );
-    Logger.debug(
-      `Attestation validation report: ${JSON.stringify(attestationReport)}`, logContext
-    );
-
-    const claimsProvider = new SnpAttestationClaims(attestationReport);
-    const attestationClaims = claimsProvider.getClaims();
-    Logger.debug(`Attestation claims: `, logContext, attestationClaims);
-    Logger.debug(
-      `Report Data: `, logContext,
-      attestationClaims["x-ms-sevsnpvm-reportdata"],
-    );
 
-    // Get the key release policy
+  try {
+    // Get the key release policy, compiled once per policy version
     const keyReleasePolicy =
-      KeyReleasePolicy.getKeyReleasePolicyFromMap(keyReleasePolicyMap);
-    Logger.debug(
-      `Key release policy: ${JSON.stringify(
-        keyReleasePolicy,
-      )}, keys: ${Object.keys(keyReleasePolicy)}, keys: ${Object.keys(keyReleasePolicy).length
-      }`, logContext
-    );
+      KeyReleasePolicy.getCompiledKeyReleasePolicyFromMap(keyReleasePolicyMap, logContext);
 
-    const policyValidationResult = KeyReleasePolicy.validateKeyReleasePolicy(
+    const policyValidationResult = KeyReleasePolicy.evaluate(
       keyReleasePolicy,
       attestationClaims,
+      logContext,
     );
     return policyValidationResult;
   } catch (exception: any) {
@@ -3,14 +3,13 @@
 
 import { SnpAttestationResult } from "@microsoft/ccf-app/global";
 import { IAttestationReport } from "./ISnpAttestationReport";
+import { toHex } from "../utils/Codec";
 
 export class SnpAttestationClaims {
   constructor(public report: SnpAttestationResult) {}
 
   private hex(buf: ArrayBuffer) {
-    return Array.from(new Uint8Array(buf))
-      .map((n) => n.toString(16).padStart(2, "0"))
-      .join("");
+    return toHex(buf);
   }
 
   public getClaims(): IAttestationReport {
@@ -23,73 +23,66 @@ export enum CcfAuthenticationPolicyEnum {
   Jwt = "jwt",
 }
 
+/**
+ * The validators of the authentication policies.
+ * Validators are stateless, so they are created once per interpreter.
+ */
+const validators = new Map<CcfAuthenticationPolicyEnum, IValidatorService>([
+  [CcfAuthenticationPolicyEnum.Jwt, new JwtValidator()],
+  [CcfAuthenticationPolicyEnum.User_cert, new UserCertValidator()],
+  [CcfAuthenticationPolicyEnum.Member_cert, new MemberCertValidator()],
+  [CcfAuthenticationPolicyEnum.User_cose_sign1, new UserCoseValidator()],
+]);
+
 /**
  * Authentication Service Implementation
  */
 export class AuthenticationService implements IAuthenticationService {
-  private readonly validators = new Map<
-    CcfAuthenticationPolicyEnum,
-    IValidatorService
-  >();
-  private logContext: LogContext;
-
-  constructor(logContext?: LogContext) {
-    this.logContext = (logContext?.clone() || new LogContext()).appendScope("AuthenticationService");
-    this.validators.set(CcfAuthenticationPolicyEnum.Jwt, new JwtValidator());
-    this.validators.set(
-      CcfAuthenticationPolicyEnum.User_cert,
-      new UserCertValidator(this.logContext),
-    );
-    this.validators.set(
-      CcfAuthenticationPolicyEnum.Member_cert,
-      new MemberCertValidator(this.logContext),
-    );
-    this.validators.set(
-      CcfAuthenticationPolicyEnum.User_cose_sign1,
-      new UserCoseValidator(this.logContext),
-    );
-  }
-
   /*
    * Check if caller is a valid identity (user or member or access token)
    */
   public isAuthenticated(
     request: ccfapp.Request<any>,
+    logContextIn?: LogContext,
   ): [ccfapp.AuthnIdentityCommon | undefined, ServiceResult<string>] {
+    const logContext = (logContextIn?.clone() || new LogContext()).appendScope("AuthenticationService");
     let caller: ccfapp.AuthnIdentityCommon | undefined = undefined;
     try {
       const caller = request.caller as unknown as ccfapp.AuthnIdentityCommon;
       if (!caller) {
         // no caller policy
-        return [caller, ServiceResult.Succeeded("", this.logContext)];
+        return [caller, ServiceResult.Succeeded("", logContext)];
       }
       Logger.debug(
-        `Authorization: isAuthenticated result (AuthenticationService)-> ${caller.policy},${JSON.stringify(caller)}`,
-        this.logContext
+        () => `Authorization: isAuthenticated result (AuthenticationService)-> ${caller.policy},${JSON.stringify(caller)}`,
+        logContext
       );
-      const validator = this.validators.get(
+      const validator = validators.get(
         <CcfAuthenticationPolicyEnum>caller.policy,
       );
 
-      if (!validator === undefined) {
+      if (validator === undefined) {
         return [
           caller,
           ServiceResult.Failed({
             errorMessage: `Error: invalid caller identity (AuthenticationService)-> ${caller.policy}`,
             errorType: "AuthenticationError",
-          }, 400, this.logContext),
+          }, 400, logContext),
         ];
       }
 
-      return [caller, validator!.validate(request)];
+      return [caller, validator.validate(request, logContext)];
     } catch (ex) {
       return [
         caller,
         ServiceResult.Failed({
           errorMessage: `Error: invalid caller identity (AuthenticationService)-> ${ex}`,
           errorType: "AuthenticationError",
-        }, 400, this.logContext),
+        }, 400, logContext),
       ];
     }
   }
 }
+
+// The authentication service shared by all requests
+export const authenticationService = new AuthenticationService();
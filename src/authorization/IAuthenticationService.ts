@@ -3,14 +3,17 @@
 
 import * as ccfapp from "@microsoft/ccf-app";
 import { ServiceResult } from "../utils/ServiceResult";
+import { LogContext } from "../utils/Logger";
 
 export interface IAuthenticationService {
   /**
    * Checks if caller is an active member or a registered user or has a valid JWT token
    * @param {string} identityId userId extracted from mTLS certificate
+   * @param {LogContext} logContext log context of the request
    * @returns {ServiceResult<boolean>}
    */
   isAuthenticated(
     request: ccfapp.Request<any>,
+    logContext?: LogContext,
   ): [ccfapp.AuthnIdentityCommon | undefined, ServiceResult<string>];
 }
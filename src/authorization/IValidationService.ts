@@ -3,11 +3,13 @@
 
 import * as ccfapp from "@microsoft/ccf-app";
 import { ServiceResult } from "../utils/ServiceResult";
+import { LogContext } from "../utils/Logger";
 
 /**
  * Validator Service Interface
+ * Validators are shared by all requests, the log context of the request is passed to validate.
  */
 
 export interface IValidatorService {
-  validate(request: ccfapp.Request<any>): ServiceResult<string>;
+  validate(request: ccfapp.Request<any>, logContext?: LogContext): ServiceResult<string>;
 }
@@ -16,57 +16,54 @@ interface CCFMember {
   status: string;
 }
 
-export class MemberCertValidator implements IValidatorService {
-  private logContext: LogContext;
+const membersCerts = ccfapp.typedKv(
+  "public:ccf.gov.members.certs",
+  ccfapp.arrayBuffer,
+  ccfapp.arrayBuffer,
+);
 
-  constructor(logContext?: LogContext) {
-    this.logContext = (logContext?.clone() || new LogContext()).appendScope("MemberCertValidator");
-  }
+const membersInfo = ccfapp.typedKv(
+  "public:ccf.gov.members.info",
+  ccfapp.arrayBuffer,
+  ccfapp.arrayBuffer,
+);
 
-  validate(request: ccfapp.Request<any>): ServiceResult<string> {
+export class MemberCertValidator implements IValidatorService {
+  validate(request: ccfapp.Request<any>, logContextIn?: LogContext): ServiceResult<string> {
+    const logContext = (logContextIn?.clone() || new LogContext()).appendScope("MemberCertValidator");
     const memberCaller = request.caller as unknown as UserMemberAuthnIdentity;
     const identityId = memberCaller.id;
-    const isValid = this.isActiveMember(identityId);
+    const isValid = this.isActiveMember(identityId, logContext);
     if (isValid.success && isValid.body) {
-      return ServiceResult.Succeeded(identityId, this.logContext);
+      return ServiceResult.Succeeded(identityId, logContext);
     }
     return ServiceResult.Failed({
       errorMessage: `Error: invalid caller identity (MemberCertValidator)->${JSON.stringify(isValid)}`,
       errorType: "AuthenticationError",
-    }, 400, this.logContext);
+    }, 400, logContext);
   }
 
   /**
    * Checks if a member exists and active
    * @see https://microsoft.github.io/CCF/main/audit/builtin_maps.html#members-info
    * @param {string} memberId memberId to check if it exists and active
+   * @param {LogContext} logContextIn log context of the request
    * @returns {ServiceResult<boolean>}
    */
-  public isActiveMember(memberId: string): ServiceResult<boolean> {
-    const membersCerts = ccfapp.typedKv(
-      "public:ccf.gov.members.certs",
-      ccfapp.arrayBuffer,
-      ccfapp.arrayBuffer,
-    );
-
+  public isActiveMember(memberId: string, logContextIn?: LogContext): ServiceResult<boolean> {
+    const logContext = logContextIn || new LogContext();
     const isMember = membersCerts.has(ccf.strToBuf(memberId));
 
-    const membersInfo = ccfapp.typedKv(
-      "public:ccf.gov.members.info",
-      ccfapp.arrayBuffer,
-      ccfapp.arrayBuffer,
-    );
-
     const memberInfoBuf = membersInfo.get(ccf.strToBuf(memberId));
     if (memberInfoBuf !== undefined) {
       const memberInfo = ccf.bufToJsonCompatible(memberInfoBuf) as CCFMember;
       const isActiveMember = memberInfo && memberInfo.status === "Active";
-      return ServiceResult.Succeeded(isActiveMember && isMember, this.logContext);
+      return ServiceResult.Succeeded(isActiveMember && isMember, logContext);
     } else {
       // memberInfoBuf is undefined
       return ServiceResult.Failed({
         errorMessage: "Member information is undefined.",
-      }, 400, this.logContext);
+      }, 400, logContext);
     }
   }
 }
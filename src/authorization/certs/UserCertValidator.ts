@@ -31,39 +31,36 @@ export interface UserMemberAuthnIdentity extends ccfapp.AuthnIdentityCommon {
   policy: string;
 }
 
-export class UserCertValidator implements IValidatorService {
-  private logContext: LogContext;
-
-  constructor(logContext?: LogContext) {
-    this.logContext = (logContext?.clone() || new LogContext()).appendScope("UserCertValidator");
-  }
+const usersCerts = ccfapp.typedKv(
+  "public:ccf.gov.users.certs",
+  ccfapp.arrayBuffer,
+  ccfapp.arrayBuffer,
+);
 
-  validate(request: ccfapp.Request<any>): ServiceResult<string> {
+export class UserCertValidator implements IValidatorService {
+  validate(request: ccfapp.Request<any>, logContextIn?: LogContext): ServiceResult<string> {
+    const logContext = (logContextIn?.clone() || new LogContext()).appendScope("UserCertValidator");
     const userCaller = request.caller as unknown as UserMemberAuthnIdentity;
     const identityId = userCaller.id;
-    const isValid = this.isUser(identityId);
+    const isValid = this.isUser(identityId, logContext);
     if (isValid.success && isValid.body) {
-      return ServiceResult.Succeeded(identityId, this.logContext);
+      return ServiceResult.Succeeded(identityId, logContext);
     }
     return ServiceResult.Failed({
       errorMessage: `Error: invalid caller identity (UserCertValidator)->${JSON.stringify(isValid)}`,
       errorType: "AuthenticationError",
-    }, 400, this.logContext);
+    }, 400, logContext);
   }
 
   /**
    * Checks if a user exists
    * @see https://microsoft.github.io/CCF/main/audit/builtin_maps.html#users-info
    * @param {string} userId userId to check if it exists
+   * @param {LogContext} logContext log context of the request
    * @returns {ServiceResult<boolean>}
    */
-  public isUser(userId: string): ServiceResult<boolean> {
-    const usersCerts = ccfapp.typedKv(
-      "public:ccf.gov.users.certs",
-      ccfapp.arrayBuffer,
-      ccfapp.arrayBuffer,
-    );
+  public isUser(userId: string, logContext?: LogContext): ServiceResult<boolean> {
     const result = usersCerts.has(ccf.strToBuf(userId));
-    return ServiceResult.Succeeded(result, this.logContext);
+    return ServiceResult.Succeeded(result, logContext || new LogContext());
   }
 }
@@ -7,28 +7,29 @@ import { IValidatorService } from "../IValidationService";
 import { ServiceResult } from "../../utils/ServiceResult";
 import { LogContext } from "../../utils/Logger";
 
-export class UserCoseValidator implements IValidatorService {
-  private logContext: LogContext;
-
-  constructor(logContext?: LogContext) {
-    this.logContext = (logContext?.clone() || new LogContext()).appendScope("UserCoseValidator");
-  }
+const usersCerts = ccfapp.typedKv(
+  "public:ccf.gov.users.certs",
+  ccfapp.arrayBuffer,
+  ccfapp.arrayBuffer,
+);
 
+export class UserCoseValidator implements IValidatorService {
   // This code comes from microsoft/ccf:tests/npm-app/src/endpoints/auth.ts
   // CCF handles the validation of the COSE document via
   // UserCOSESign1AuthnPolicy::_authenticate
-  validate(request: ccfapp.Request<any>): ServiceResult<string> {
+  validate(request: ccfapp.Request<any>, logContextIn?: LogContext): ServiceResult<string> {
+    const logContext = (logContextIn?.clone() || new LogContext()).appendScope("UserCoseValidator");
     if (request.caller === null || request.caller === undefined) {
       return ServiceResult.Failed({
         errorMessage: "No caller provided for COSE signature",
-      }, 401, this.logContext );
+      }, 401, logContext );
     }
 
     const caller = request.caller;
     if (caller.policy !== "user_cose_sign1") {
       return ServiceResult.Failed({
         errorMessage: "Policy is not user_cose_sign1",
-      }, 401, this.logContext );
+      }, 401, logContext );
     }
 
     const c: ccfapp.UserCOSESign1AuthnIdentity = caller;
@@ -38,33 +39,29 @@ export class UserCoseValidator implements IValidatorService {
     ) {
       return ServiceResult.Failed({
         errorMessage: "No cose content to validate",
-      }, 401, this.logContext );
+      }, 401, logContext );
     }
 
-    const isValid = this.isUser(c.id);
+    const isValid = this.isUser(c.id, logContext);
     if (isValid.failure) {
       return ServiceResult.Failed({
         errorMessage: `Error: invalid caller identity (UserCoseValidator)->${JSON.stringify(isValid)}`,
         errorType: "AuthenticationError",
-      }, 401, this.logContext );
+      }, 401, logContext );
     }
 
-    return ServiceResult.Succeeded(c.id, this.logContext);
+    return ServiceResult.Succeeded(c.id, logContext);
   }
 
   /**
    * Checks if a user exists
    * @see https://microsoft.github.io/CCF/main/audit/builtin_maps.html#users-info
    * @param {string} userId userId to check if it exists
+   * @param {LogContext} logContext log context of the request
    * @returns {ServiceResult<boolean>}
    */
-  public isUser(userId: string): ServiceResult<boolean> {
-    const usersCerts = ccfapp.typedKv(
-      "public:ccf.gov.users.certs",
-      ccfapp.arrayBuffer,
-      ccfapp.arrayBuffer,
-    );
+  public isUser(userId: string, logContext?: LogContext): ServiceResult<boolean> {
     const result = usersCerts.has(ccf.strToBuf(userId));
-    return ServiceResult.Succeeded(result, this.logContext);
+    return ServiceResult.Succeeded(result, logContext || new LogContext());
   }
 }
@@ -1,18 +1,41 @@
 import { ccf } from "@microsoft/ccf-app/global";
-import { Logger, LogContext } from "../../utils/Logger";
+import { Logger, LogContext, LogLevel } from "../../utils/Logger";
+import { PolicyCache } from "../../repositories/PolicyCache";
 
 export const validationPolicyMapName = "public:policies.jwt_validation";
 
+interface ICompiledJwtClaim {
+  key: string;
+  policyValue: any;
+  // Allowed values if the policy value is an array
+  allowed?: Set<any>;
+}
+
+export interface ICompiledJwtValidationPolicy {
+  claims: ICompiledJwtClaim[];
+}
+
 export class JwtValidationPolicyMap {
+  /**
+   * The compiled policy of each issuer, cached per KV version of its policy entry.
+   * Only issuers trusted by governance reach the validator, so the map stays small.
+   */
+  private static readonly caches = new Map<
+    string,
+    PolicyCache<ICompiledJwtValidationPolicy | undefined>
+  >();
+
   public static read(issuer: string, logContextIn? : LogContext): { [key: string]: string } | undefined {
     const logContext = (logContextIn?.clone() || new LogContext()).appendScope("JwtValidationPolicyMap");
     // For testing list all issuers
-    const issuersMap = ccf.kv["public:ccf.gov.jwt.issuers"];
-    issuersMap.forEach((v, k) => {
-      let issuer = ccf.bufToStr(k);
-      let info = ccf.bufToJsonCompatible(v);
-      Logger.debug(`Issuer: ${issuer}: ${JSON.stringify(info)}`, logContext);
-    });
+    if (Logger.isEnabled(LogLevel.DEBUG)) {
+      const issuersMap = ccf.kv["public:ccf.gov.jwt.issuers"];
+      issuersMap.forEach((v, k) => {
+        let issuer = ccf.bufToStr(k);
+        let info = ccf.bufToJsonCompatible(v);
+        Logger.debug(`Issuer: ${issuer}: ${JSON.stringify(info)}`, logContext);
+      });
+    }
 
     const keyBuf = ccf.strToBuf(issuer);
     if (!ccf.kv[validationPolicyMapName].has(keyBuf)) {
@@ -30,4 +53,53 @@ export class JwtValidationPolicyMap {
     Logger.debug(`JWT validation: Policy: ${policy} for issuer: ${issuer}`, logContext);
     return JSON.parse(policy);
   }
+
+  /**
+   * Compiles the JWT validation policy of an issuer into a form that is cheap to evaluate.
+   * Array policy values become sets of allowed claim values.
+   * @param policy - The JWT validation policy of an issuer.
+   * @returns The compiled policy.
+   */
+  public static compile(policy: { [key: string]: any }): ICompiledJwtValidationPolicy {
+    return {
+      claims: Object.keys(policy).map((key) => ({
+        key,
+        policyValue: policy[key],
+        allowed: Array.isArray(policy[key]) ? new Set(policy[key]) : undefined,
+      })),
+    };
+  }
+
+  /**
+   * Reads the compiled JWT validation policy of an issuer.
+   * The policy is read and compiled again as soon as governance writes a new version.
+   * @param issuer - The issuer of the JWT.
+   * @param logContextIn - The log context to use.
+   * @returns The compiled policy, or undefined if the issuer has no policy.
+   */
+  public static readCompiled(
+    issuer: string,
+    logContextIn?: LogContext,
+  ): ICompiledJwtValidationPolicy | undefined {
+    const version = PolicyCache.versionOf(
+      ccf.kv[validationPolicyMapName],
+      ccf.strToBuf(issuer),
+    );
+    const load = () => {
+      const policy = JwtValidationPolicyMap.read(issuer, logContextIn);
+      return policy === undefined ? undefined : JwtValidationPolicyMap.compile(policy);
+    };
+    if (version === undefined) {
+      return load();
+    }
+
+    let cache = JwtValidationPolicyMap.caches.get(issuer);
+    if (cache === undefined) {
+      cache = new PolicyCache<ICompiledJwtValidationPolicy | undefined>(
+        `JwtValidationPolicy(${issuer})`,
+      );
+      JwtValidationPolicyMap.caches.set(issuer, cache);
+    }
+    return cache.get(version, load);
+  }
 }
@@ -8,17 +8,12 @@ import { Logger, LogContext } from "../../utils/Logger";
 import { JwtValidationPolicyMap } from "./JwtValidationPolicyMap";
 
 export class JwtValidator implements IValidatorService {
-  private logContext: LogContext;
-
-  constructor(logContext?: LogContext) {
-    this.logContext = (logContext?.clone() || new LogContext()).appendScope("JwtValidator");
-  }
-
-  validate(request: ccfapp.Request<any>): ServiceResult<string> {
+  validate(request: ccfapp.Request<any>, logContextIn?: LogContext): ServiceResult<string> {
+    const logContext = (logContextIn?.clone() || new LogContext()).appendScope("JwtValidator");
     const jwtCaller = request.caller as unknown as ccfapp.JwtAuthnIdentity;
     Logger.debug(
-      `Authorization: JWT jwtCaller (JwtValidator)-> ${jwtCaller.jwt.keyIssuer}`,
-      this.logContext
+      () => `Authorization: JWT jwtCaller (JwtValidator)-> ${jwtCaller.jwt.keyIssuer}`,
+      logContext
     );
     const issuer = jwtCaller?.jwt?.payload?.iss;
     if (!issuer) {
@@ -28,64 +23,48 @@ export class JwtValidator implements IValidatorService {
           errorType: "AuthenticationError",
         },
         400,
-        this.logContext
+        logContext
       );
     }
 
 
-    const policy = JwtValidationPolicyMap.read(issuer, this.logContext);
+    const policy = JwtValidationPolicyMap.readCompiled(issuer, logContext);
     if (policy === undefined) {
       const errorMessage = `issuer ${issuer} is not defined in the policy`;
-      Logger.error(errorMessage, this.logContext);
+      Logger.error(errorMessage, logContext);
       return ServiceResult.Failed(
         {
           errorMessage,
           errorType: "AuthenticationError",
         },
         500,
-        this.logContext
+        logContext
       );
     }
-    Logger.debug(
-      `Validate JWT policy for issuer ${issuer}: ${JSON.stringify(policy)}`, this.logContext
-    );
 
-    const keys = Object.keys(policy);
-
-    for (let inx = 0; inx < keys.length; inx++) {
-      const key = keys[inx];
-      const jwtProp = jwtCaller?.jwt?.payload[key];
-      let compliant = false;
-
-      // Check if policy[key] is an array
-      if (Array.isArray(policy[key])) {
-        // Check if jwtProp is in the array
-        compliant = policy[key].includes(jwtProp);
-      } else {
-        // Perform the existing equality check
-        compliant = jwtProp === policy[key];
-      }
-
-      Logger.debug(
-        `isValidJwtToken: ${key}, expected: ${policy[key]}, found: ${jwtProp}, ${compliant}`, this.logContext
-      );
+    const payload = jwtCaller.jwt.payload;
+    for (const claim of policy.claims) {
+      const jwtProp = payload[claim.key];
+      const compliant = claim.allowed
+        ? claim.allowed.has(jwtProp)
+        : jwtProp === claim.policyValue;
 
       if (!compliant) {
-        const errorMessage = `The JWT has no valid ${key}, expected: ${policy[key]}, found: ${jwtProp}`;
-        Logger.error(errorMessage, this.logContext);
+        const errorMessage = `The JWT has no valid ${claim.key}, expected: ${claim.policyValue}, found: ${jwtProp}`;
+        Logger.error(errorMessage, logContext);
         return ServiceResult.Failed(
           { errorMessage, errorType: "AuthenticationError" },
           401,
-          this.logContext
+          logContext
         );
       }
     }
 
     const identityId = jwtCaller?.jwt?.payload?.oid;
     Logger.debug(
-      `Authorization: JWT validation result (JwtValidator) for provider ${jwtCaller.jwt.keyIssuer}-> success`,
-      this.logContext
+      () => `Authorization: JWT validation result (JwtValidator) for provider ${jwtCaller.jwt.keyIssuer}-> success`,
+      logContext
     );
-    return ServiceResult.Succeeded(identityId, this.logContext);
+    return ServiceResult.Succeeded(identityId, logContext);
   }
 }
@@ -12,6 +12,7 @@ enableEndpoint();
 
 // Define the interface for storing keys
 export interface IKeyItem extends JsonWebKeyEdDSAPublic {
+  // Activation time in ms. Keys of a refresh batch are pending until this time.
   timestamp?: number;
   expiry?: number;
   receipt?: string;
@@ -3,9 +3,8 @@
 
 import * as ccfcrypto from "@microsoft/ccf-app/crypto";
 import { ccf } from "@microsoft/ccf-app/global";
-import { Base64 } from "js-base64";
 import { IKeyItem } from "./IKeyItem";
-import { arrayBufferToHex } from "../utils/Tooling";
+import { toBase64Url, toHex } from "../utils/Codec";
 import { Logger } from "../utils/Logger";
 
 export class KeyGeneration {
@@ -17,18 +16,22 @@ export class KeyGeneration {
 
   // Calculate hex hash
   public static calculateHexHash = (data: ArrayBuffer): string => {
-    return arrayBufferToHex(KeyGeneration.calculateHash(data).buffer);
+    return toHex(KeyGeneration.calculateHash(data));
   };
 
   // Calculate a unique kid for the new key
   public static calculateKid = (pubkey: string) => {
     const buf = ccf.strToBuf(pubkey);
     const digest = this.calculateHash(buf);
-    return Base64.fromUint8Array(digest, true);
+    return toBase64Url(digest);
   };
 
-  // Generate new key item
-  public static generateKeyItem = (id: number, expiry?: number) => {
+  // Generate new key item, active from activationTime or now
+  public static generateKeyItem = (
+    id: number,
+    expiry?: number,
+    activationTime?: number,
+  ) => {
     const keyType = "x25519";
     const keys = ccfcrypto.generateEddsaKeyPair(keyType);
     const jwk: IKeyItem = ccfcrypto.eddsaPemToJwk(
@@ -38,7 +41,7 @@ export class KeyGeneration {
     // jwk.d is private key, jwk.x is public key
 
     // We will get an untrusted timestamp from the host. Is this a threat?
-    jwk.timestamp = Date.now();
+    jwk.timestamp = activationTime ?? Date.now();
     if (expiry) {
       jwk.expiry = expiry;
     }
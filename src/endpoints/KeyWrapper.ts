@@ -61,6 +61,10 @@ https://github.com/tink-crypto/tink-cc/blob/abebc3ac2281846a6f455e48d74cdff935d2
 */
 const WRAPKEYSIZE = 4096;
 const WRAPALGONAME = "RSA-OAEP";
+// RSA-OAEP wraps an ephemeral AES key, AES-KWP (RFC 5649) wraps the key material.
+// The result is the RSA-OAEP wrapped AES key followed by the AES-KWP wrapped payload.
+const HYBRIDWRAPALGONAME = "RSA-OAEP-AES-KWP";
+const HYBRIDWRAPAESKEYSIZE = 256;
 
 export type IKeyDataElement = {
   publicKeySignature: string;
@@ -87,7 +91,8 @@ export type IWrapped = {
 
 export type IWrappedJwt = string;
 
-export const WrapAlgorithms: string[] = [WRAPALGONAME];
+export const DefaultWrapAlgorithm = WRAPALGONAME;
+export const WrapAlgorithms: string[] = [WRAPALGONAME, HYBRIDWRAPALGONAME];
 
 // keyEncryptionKeyUri should be in the format of `<10-character length prefix><cloud-specific contents to specify wrapping key>`.
 // https://github.com/privacysandbox/data-plane-shared-libraries/blob/042c6f93558638376ac3f6ab479aed7f0342da67/scp/cc/cpio/client_providers/private_key_client_provider/src/private_key_client_utils.cc#L113
@@ -100,6 +105,26 @@ export class KeyWrapper {
     name: WRAPALGONAME,
   } as ccfcrypto.RsaOaepParams;
 
+  private static HYBRIDWRAPALGO = {
+    name: HYBRIDWRAPALGONAME,
+    aesKeySize: HYBRIDWRAPAESKEYSIZE,
+  } as ccfcrypto.RsaOaepAesKwpParams;
+
+  // Get the wrapping parameters of a wrapping algorithm from WrapAlgorithms
+  public static wrapAlgoParams = (
+    wrapAlg: string = WRAPALGONAME,
+  ): ccfcrypto.RsaOaepParams | ccfcrypto.RsaOaepAesKwpParams => {
+    if (wrapAlg === WRAPALGONAME) {
+      return KeyWrapper.WRAPALGO;
+    }
+    if (wrapAlg === HYBRIDWRAPALGONAME) {
+      return KeyWrapper.HYBRIDWRAPALGO;
+    }
+    throw new Error(
+      `Unsupported wrapping algorithm '${wrapAlg}'. Must be one of ${WrapAlgorithms}.`,
+    );
+  };
+
   // Generate the wrapping key
   public static generateKey = (): IWrapKey => {
     const keyPair: IWrapKey = ccfcrypto.generateRsaKeyPair(WRAPKEYSIZE);
@@ -112,6 +137,7 @@ export class KeyWrapper {
   public static createWrappedPrivateTinkKey = (
     wrappingKey: ArrayBuffer | undefined,
     payload: IKeyItem,
+    wrapAlg: string = WRAPALGONAME,
   ): string => {
     let tinkHpkeKey = new hpke.HpkePrivateKey();
     if (typeof payload.d === "string") {
@@ -143,13 +169,13 @@ export class KeyWrapper {
     let bufPayload = keyset.toBinary().buffer;
 
     Logger.secret(
-      `Tink Wrapped payload (${JSON.stringify(keyset).length}): `,
+      () => `Tink Wrapped payload (${JSON.stringify(keyset).length}): `,
       keyset,
     );
 
     let wrappedB64: string;
     if (wrappingKey) {
-      const algo = KeyWrapper.WRAPALGO;
+      const algo = KeyWrapper.wrapAlgoParams(wrapAlg);
       const wrapped = ccfcrypto.wrapKey(bufPayload, wrappingKey, algo);
 
       wrappedB64 = Base64.fromUint8Array(new Uint8Array(wrapped));
@@ -217,6 +243,7 @@ export class KeyWrapper {
   private static getEncryptedKeyMaterial(
     wrappingKey: ArrayBuffer | undefined,
     payload: IKeyItem,
+    wrapAlg: string = WRAPALGONAME,
   ): [string, string | undefined] {
     Logger.debug(`getEncryptedKeyMaterial: `, payload);
     const receipt = payload.receipt;
@@ -229,7 +256,7 @@ export class KeyWrapper {
           ccf.crypto.wrapKey(
             ccf.strToBuf(unwrappedJwtKey),
             wrappingKey,
-            KeyWrapper.WRAPALGO,
+            KeyWrapper.wrapAlgoParams(wrapAlg),
           ),
         ),
       );
@@ -244,8 +271,13 @@ export class KeyWrapper {
   public static wrapKeyJwt = (
     wrappingKey: ArrayBuffer | undefined,
     payload: IKeyItem,
+    wrapAlg: string = WRAPALGONAME,
   ): IWrappedJwt => {
-    const [wrappedKey, _] = this.getEncryptedKeyMaterial(wrappingKey, payload);
+    const [wrappedKey, _] = this.getEncryptedKeyMaterial(
+      wrappingKey,
+      payload,
+      wrapAlg,
+    );
     return wrappedKey;
   };
 }
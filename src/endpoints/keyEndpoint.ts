@@ -4,17 +4,32 @@
 import { ccf } from "@microsoft/ccf-app/global";
 import * as ccfapp from "@microsoft/ccf-app";
 import { ServiceResult } from "../utils/ServiceResult";
-import { IWrapped, KeyWrapper } from "./KeyWrapper";
+import {
+  DefaultWrapAlgorithm,
+  IWrapped,
+  KeyWrapper,
+  WrapAlgorithms,
+} from "./KeyWrapper";
 import { ISnpAttestation } from "../attestation/ISnpAttestation";
-import { enableEndpoint, isPemPublicKey } from "../utils/Tooling";
+import {
+  enableEndpoint,
+  isPemPublicKey,
+  positiveIntegerParam,
+} from "../utils/Tooling";
 import { IAttestationReport } from "../attestation/ISnpAttestationReport";
 import { IKeyItem } from "./IKeyItem";
 import { KeyGeneration } from "./KeyGeneration";
 import { validateAttestation } from "../attestation/AttestationValidation";
-import { hpkeKeyIdMap, hpkeKeysMap, keyRotationPolicyMap } from "../repositories/Maps";
+import {
+  hpkeKeyIdMap,
+  hpkeKeysMap,
+  hpkePublicKeyView,
+  keyRotationPolicyMap,
+} from "../repositories/Maps";
 import { ServiceRequest } from "../utils/ServiceRequest";
 import { LogContext, Logger } from "../utils/Logger";
 import { KeyRotationPolicy } from "../policies/KeyRotationPolicy";
+import { LruCache } from "../utils/LruCache";
 
 // Enable the endpoint
 enableEndpoint();
@@ -41,55 +56,287 @@ export interface IUnwrapResponse {
   wrapped: string;
   receipt: string;
 }
+
+interface IUnwrapKeysRequest {
+  attestation: ISnpAttestation;
+  wrappingKey: string;
+  kids?: string[];
+}
+
+export interface IUnwrapKeysItem {
+  wrappedKid: string;
+  statusCode: number;
+  wrapped?: string;
+  receipt?: string;
+  errorMessage?: string;
+}
+
+export interface IUnwrapKeysResponse {
+  keys: IUnwrapKeysItem[];
+}
 //#endregion
 
+// Maximum number of keys returned by a single /unwrapKeys call, requested or not
+const MAX_UNWRAP_KEYS = 64;
+
+// Validated wrapping key and its hash, as used to bind the key to the attestation
+interface IWrappingKey {
+  wrappingKey: ArrayBuffer;
+  wrappingKeyHash: string;
+}
+
+// Number of distinct wrapping keys to keep. Clients reuse one wrapping key for their lifetime.
+const WRAPPING_KEY_CACHE_SIZE = 128;
+
+// Validated wrapping keys, keyed by the PEM string of the request
+const wrappingKeyCache = new LruCache<string, IWrappingKey>(
+  WRAPPING_KEY_CACHE_SIZE,
+);
+
 /**
  * Checks if the request has a wrapping key and returns the wrapping key and its hash.
+ * The key is validated and hashed once per distinct PEM string, later requests are served from memory.
  * @param body - The request body containing the wrapping key.
  * @returns A ServiceResult object containing the wrapping key and its hash if it exists, or an error message if it is missing or invalid.
  */
 const requestHasWrappingKey = (
   body: IUnwrapRequest,
   logContextIn?: LogContext,
-): ServiceResult<{ wrappingKey: ArrayBuffer; wrappingKeyHash: string }> => {
-  const logContext = (logContextIn?.clone() || new LogContext()).appendScope("requestHasWrappingKey");
-  let wrappingKey = body.wrappingKey;
-  let wrappingKeyBuf: ArrayBuffer;
-  let wrappingKeyHash: string;
-  if (wrappingKey) {
-    Logger.debug(`requestHasWrappingKey=> wrappingKey: '${wrappingKey}'`);
-    if (!isPemPublicKey(wrappingKey)) {
-      Logger.error(`Key-> Not a pem key`);
-      return ServiceResult.Failed<{
-        wrappingKey: ArrayBuffer;
-        wrappingKeyHash: string;
-      }>(
-        {
-          errorMessage: `${wrappingKey} not a PEM public key`,
-        },
-        400,
-        logContext
+): ServiceResult<IWrappingKey> => {
+  return (logContextIn || new LogContext()).withScope("requestHasWrappingKey", (logContext) => {
+    let wrappingKey = body.wrappingKey;
+    if (wrappingKey) {
+      const cached = wrappingKeyCache.get(wrappingKey);
+      if (cached !== undefined) {
+        Logger.debug(`Key->wrapping key hash from memory: ${cached.wrappingKeyHash}`, logContext);
+        return ServiceResult.Succeeded(cached, logContext);
+      }
+
+      Logger.debug(`requestHasWrappingKey=> wrappingKey: '${wrappingKey}'`, logContext);
+      if (!isPemPublicKey(wrappingKey, logContext)) {
+        Logger.error(`Key-> Not a pem key`, logContext);
+        return ServiceResult.Failed<IWrappingKey>(
+          {
+            errorMessage: `${wrappingKey} not a PEM public key`,
+          },
+          400,
+          logContext
+        );
+      }
+      const wrappingKeyBuf = ccf.strToBuf(wrappingKey);
+      const parsed: IWrappingKey = {
+        wrappingKey: wrappingKeyBuf,
+        wrappingKeyHash: KeyGeneration.calculateHexHash(wrappingKeyBuf),
+      };
+      Logger.debug(`Key->wrapping key hash: ${parsed.wrappingKeyHash}`, logContext);
+      wrappingKeyCache.set(wrappingKey, parsed);
+      return ServiceResult.Succeeded(parsed, logContext);
+    }
+
+    return ServiceResult.Failed<IWrappingKey>(
+      {
+        errorMessage: `Missing wrappingKey`,
+      },
+      400,
+      logContext
+    );
+  });
+};
+
+/**
+ * Checks if a key of a refresh batch is still pending. Private keys are only released once they are active.
+ * @param keyItem - The key to check.
+ * @param now - The current time in milliseconds.
+ * @returns True if the key is activated after now.
+ */
+const isPending = (keyItem: IKeyItem, now: number): boolean =>
+  keyItem.timestamp !== undefined && keyItem.timestamp > now;
+
+/**
+ * Fails the request for a pending key.
+ * @param name - The name of the endpoint, used in error messages.
+ * @param kid - The kid of the pending key.
+ * @param keyItem - The pending key.
+ * @param logContext - The log context to use.
+ * @returns A 403 with the activation time of the key.
+ */
+const pendingKeyFailed = (
+  name: string,
+  kid: string,
+  keyItem: IKeyItem,
+  logContext: LogContext,
+): ServiceResult<string> =>
+  ServiceResult.Failed<string>(
+    { errorMessage: `${name}:kid ${kid} is not active before ${keyItem.timestamp}` },
+    403,
+    logContext
+  );
+
+/**
+ * Wraps a private key with the wrapping key of the caller.
+ * The caller must have validated the attestation and the wrapping key.
+ * @param name - The name of the endpoint, used in error messages.
+ * @param kid - The kid of the key to wrap.
+ * @param wrappingKeyBuf - The wrapping key in PEM format.
+ * @param fmt - The format of the wrapped key, jwk or tink.
+ * @param wrapAlg - The wrapping algorithm, one of WrapAlgorithms.
+ * @param logContext - The log context to use.
+ * @returns The wrapped key and its receipt, 202 if the receipt is not available yet, 403 if the key is pending, 404 if the kid is unknown or 410 if the key has expired.
+ */
+const wrapKeyForKid = (
+  name: string,
+  kid: string,
+  wrappingKeyBuf: ArrayBuffer,
+  fmt: string,
+  wrapAlg: string,
+  logContext: LogContext,
+): ServiceResult<string | IUnwrapResponse> => {
+  // Be sure to request item and the receipt
+  Logger.debug(`Get key with kid ${kid}`, logContext);
+  const keyItem = hpkeKeysMap.store.get(kid) as IKeyItem;
+  if (keyItem === undefined) {
+    return ServiceResult.Failed<string>(
+      { errorMessage: `${name}:kid ${kid} not found in store` },
+      404,
+      logContext
+    );
+  }
+
+  const [expired, _depricated] = KeyRotationPolicy.isExpired(keyRotationPolicyMap, keyItem, logContext);
+  if (expired) {
+    return ServiceResult.Failed<string>(
+      { errorMessage: `${name}:kid ${kid} has expired` },
+      410,  // 410 Gone, key no longer available
+      logContext
+    );
+  }
+  if (isPending(keyItem, Date.now())) {
+    return pendingKeyFailed(name, kid, keyItem, logContext);
+  }
+
+  const receipt = hpkeKeysMap.receipt(kid, logContext);
+
+  // Get receipt if available, otherwise return accepted
+  if (receipt !== undefined) {
+    keyItem.receipt = receipt;
+    Logger.debug(`Key->Receipt: ${receipt}`, logContext);
+  } else {
+    return ServiceResult.Accepted(logContext);
+  }
+
+  // Get wrapped key
+  try {
+    if (fmt == "tink") {
+      Logger.debug(`Retrieve key in tink format`, logContext);
+      const wrapped = KeyWrapper.createWrappedPrivateTinkKey(
+        wrappingKeyBuf,
+        keyItem,
+        wrapAlg,
       );
+      const ret: IUnwrapResponse = { wrapped, receipt };
+      return ServiceResult.Succeeded<IUnwrapResponse>(ret, logContext);
+    } else {
+      // Default is JWT.
+      const wrapped = KeyWrapper.wrapKeyJwt(wrappingKeyBuf, keyItem, wrapAlg);
+      const ret = { wrapped, receipt };
+      return ServiceResult.Succeeded<IUnwrapResponse>(ret, logContext);
     }
-    wrappingKeyBuf = ccf.strToBuf(wrappingKey);
-    wrappingKeyHash = KeyGeneration.calculateHexHash(wrappingKeyBuf);
-    Logger.debug(`Key->wrapping key hash: ${wrappingKeyHash}`);
-    return ServiceResult.Succeeded({
-      wrappingKey: wrappingKeyBuf,
-      wrappingKeyHash,
-    }, logContext);
+  } catch (exception: any) {
+    return ServiceResult.Failed<string>(
+      { errorMessage: `${name}: Error (${kid}): ${exception.message}` },
+      500,
+      logContext
+    );
   }
+};
 
-  return ServiceResult.Failed<{
-    wrappingKey: ArrayBuffer;
-    wrappingKeyHash: string;
-  }>(
-    {
-      errorMessage: `Missing wrappingKey`,
-    },
-    400,
-    logContext
+/**
+ * Gets the kids of the newest active keys that have not expired, newest first.
+ * Pending keys of a refresh batch are skipped, like the latest key of /key.
+ * Keys are created in id order, so the first expired key ends the search.
+ * Without a key rotation policy no key expires, so the number of kids is capped.
+ * @param limit - The maximum number of kids to return.
+ * @param logContext - The log context to use.
+ * @returns The kids of the non-expired keys.
+ */
+const nonExpiredKids = (limit: number, logContext: LogContext): string[] => {
+  const kids: string[] = [];
+  const oldestId = hpkeKeyIdMap.oldestId;
+  const [activeId] = hpkePublicKeyView.latestActiveId(hpkeKeyIdMap.latestId, Date.now());
+  for (let id = activeId; id >= oldestId && kids.length < limit; id--) {
+    const kid = hpkeKeyIdMap.store.get(id);
+    if (kid === undefined) {
+      continue;
+    }
+    const keyItem = hpkeKeysMap.store.get(kid) as IKeyItem;
+    if (keyItem === undefined) {
+      continue;
+    }
+    const [expired, _depricated] = KeyRotationPolicy.isExpired(keyRotationPolicyMap, keyItem, logContext);
+    if (expired) {
+      break;
+    }
+    kids.push(kid);
+  }
+  return kids;
+};
+
+/**
+ * Gets the kid of the key that was active at a given time.
+ * Keys created before the public records existed are read from the key store.
+ * @param validAt - The time in milliseconds.
+ * @returns The kid, or undefined if no key was active at that time.
+ */
+const kidValidAt = (validAt: number): string | undefined => {
+  const timestampOf = (id: number): number | undefined => {
+    const item = hpkePublicKeyView.get(id);
+    if (item !== undefined) {
+      return item.timestamp;
+    }
+    const kid = hpkeKeyIdMap.store.get(id);
+    return kid === undefined
+      ? undefined
+      : (hpkeKeysMap.store.get(kid) as IKeyItem)?.timestamp;
+  };
+  const id = hpkePublicKeyView.idValidAt(
+    validAt,
+    hpkeKeyIdMap.oldestId,
+    hpkeKeyIdMap.latestId,
+    timestampOf,
   );
+  return id > 0 ? hpkeKeyIdMap.store.get(id) : undefined;
+};
+
+/**
+ * Parses the validAt query parameter.
+ * @param name - The name of the endpoint.
+ * @param validAtParam - The value of the query parameter.
+ * @param kid - The kid requested by the caller, if any.
+ * @param logContext - The log context to use.
+ * @returns The time in milliseconds, 0 if the parameter is missing, or a 400 if it is invalid or used with a kid.
+ */
+const validAtQuery = (
+  name: string,
+  validAtParam: string | undefined,
+  kid: string | undefined,
+  logContext: LogContext,
+): ServiceResult<number> => {
+  const validAt = positiveIntegerParam(validAtParam, 0);
+  if (validAt === undefined) {
+    return ServiceResult.Failed<number>(
+      { errorMessage: `${name}: validAt must be a time in milliseconds since the epoch` },
+      400,
+      logContext
+    );
+  }
+  if (validAt > 0 && kid) {
+    return ServiceResult.Failed<number>(
+      { errorMessage: `${name}: kid and validAt cannot be used together` },
+      400,
+      logContext
+    );
+  }
+  return ServiceResult.Succeeded<number>(validAt, logContext);
 };
 
 //#region KMS Key endpoints
@@ -100,6 +347,11 @@ export const key = (
   const name = "key";
   const logContext = new LogContext().appendScope(name);
   const serviceRequest = new ServiceRequest<IKeyRequest>(logContext, request);
+
+  // check if caller has a valid identity
+  const [_, isValidIdentity] = serviceRequest.isAuthenticated();
+  if (isValidIdentity.failure) return isValidIdentity;
+
   let attestation: ISnpAttestation | undefined = undefined;
 
   // Check if serviceRequest.body is defined before accessing "attestation"
@@ -118,14 +370,31 @@ export const key = (
     );
   }
 
-  // check if caller has a valid identity
-  const [_, isValidIdentity] = serviceRequest.isAuthenticated();
-  if (isValidIdentity.failure) return isValidIdentity;
-
   let kid = serviceRequest.query?.["kid"];
   let id: number | undefined;
-  if (kid === undefined) {
-    [id, kid] = hpkeKeyIdMap.latestItem();
+  const validAtResult = validAtQuery(name, serviceRequest.query?.["validAt"], kid, logContext);
+  if (validAtResult.failure) {
+    return ServiceResult.Failed<string>(
+      validAtResult.error!,
+      validAtResult.statusCode,
+      logContext,
+    );
+  }
+  const validAt = validAtResult.body!;
+  if (validAt > 0) {
+    kid = kidValidAt(validAt);
+    if (kid === undefined) {
+      return ServiceResult.Failed<string>(
+        { errorMessage: `${name}: No key valid at ${validAt}` },
+        404,
+        logContext
+      );
+    }
+  } else if (kid === undefined) {
+    // Skip the pending keys of a refresh batch
+    const [activeId] = hpkePublicKeyView.latestActiveId(hpkeKeyIdMap.latestId, Date.now());
+    id = activeId;
+    kid = activeId > 0 ? hpkeKeyIdMap.store.get(activeId) : undefined;
     if (kid === undefined) {
       return ServiceResult.Failed<string>(
         { errorMessage: `${name}: No keys in store` },
@@ -176,8 +445,11 @@ export const key = (
       logContext
     );
   }
+  if (isPending(keyItem, Date.now())) {
+    return pendingKeyFailed(name, kid, keyItem, logContext);
+  }
 
-  const receipt = hpkeKeysMap.receipt(kid);
+  const receipt = hpkeKeysMap.receipt(kid, logContext);
 
   if (validateAttestationResult.statusCode === 202) {
     return ServiceResult.Accepted(logContext);
@@ -230,6 +502,10 @@ export const unwrapKey = (
   const logContext = new LogContext().appendScope(name);
   const serviceRequest = new ServiceRequest<IKeyRequest>(logContext, request);
 
+  // check if caller has a valid identity
+  const [_, isValidIdentity] = serviceRequest.isAuthenticated();
+  if (isValidIdentity.failure) return isValidIdentity;
+
   let attestation: ISnpAttestation | undefined = undefined;
 
   // Check if serviceRequest.body is defined before accessing "attestation"
@@ -253,12 +529,27 @@ export const unwrapKey = (
     );
   }
 
-  // check if caller has a valid identity
-  const [_, isValidIdentity] = serviceRequest.isAuthenticated();
-  if (isValidIdentity.failure) return isValidIdentity;
-
   // check payload
-  const wrappedKid: string = serviceRequest.body["wrappedKid"];
+  let wrappedKid: string | undefined = serviceRequest.body["wrappedKid"];
+  const validAtResult = validAtQuery(name, serviceRequest.query?.["validAt"], wrappedKid, logContext);
+  if (validAtResult.failure) {
+    return ServiceResult.Failed<string>(
+      validAtResult.error!,
+      validAtResult.statusCode,
+      logContext,
+    );
+  }
+  const validAt = validAtResult.body!;
+  if (validAt > 0) {
+    wrappedKid = kidValidAt(validAt);
+    if (wrappedKid === undefined) {
+      return ServiceResult.Failed<string>(
+        { errorMessage: `${name}: No key valid at ${validAt}` },
+        404,
+        logContext
+      );
+    }
+  }
   if (wrappedKid === undefined) {
     return ServiceResult.Failed<string>(
       {
@@ -271,6 +562,7 @@ export const unwrapKey = (
 
   const wrappingKeyFromRequest = requestHasWrappingKey(
     serviceRequest.body as IUnwrapRequest,
+    logContext,
   );
   if (wrappingKeyFromRequest.success === false) {
     // WrappingKey has errors
@@ -282,8 +574,7 @@ export const unwrapKey = (
   }
 
   const wrappingKeyBuf = wrappingKeyFromRequest.body!.wrappingKey;
-  const wrappingKeyHash = KeyGeneration.calculateHexHash(wrappingKeyBuf);
-  Logger.debug(`unwrapKey->wrapping key hash: ${wrappingKeyHash}`);
+  const wrappingKeyHash = wrappingKeyFromRequest.body!.wrappingKeyHash;
 
   const fmt = serviceRequest.query?.["fmt"] || "jwk";
   if (!(fmt === "jwk" || fmt === "tink")) {
@@ -296,6 +587,17 @@ export const unwrapKey = (
     );
   }
 
+  const wrapAlg = serviceRequest.query?.["wrapAlg"] || DefaultWrapAlgorithm;
+  if (!WrapAlgorithms.includes(wrapAlg)) {
+    return ServiceResult.Failed<string>(
+      {
+        errorMessage: `${name}: Wrong wrapAlg query parameter '${wrapAlg}'. Must be one of ${WrapAlgorithms}.`,
+      },
+      400,
+      logContext
+    );
+  }
+
   // Validate attestation
   let validateAttestationResult: ServiceResult<string | IAttestationReport>;
   try {
@@ -332,59 +634,177 @@ export const unwrapKey = (
     );
   }
 
-  // Be sure to request item and the receipt
-  Logger.debug(`Get key with kid ${wrappedKid}`);
-  const keyItem = hpkeKeysMap.store.get(wrappedKid) as IKeyItem;
-  if (keyItem === undefined) {
+  return wrapKeyForKid(
+    name,
+    wrappedKid,
+    wrappingKeyBuf,
+    fmt,
+    wrapAlg,
+    logContext,
+  );
+};
+
+/**
+ * Unwrap a batch of private keys with a single attestation
+ *
+ * @param request - The request object containing the attestation, the wrapping key and optionally the kids. All non-expired keys are returned if kids is missing.
+ * @returns A `ServiceResult` containing one entry per kid with its own status code.
+ */
+export const unwrapKeys = (
+  request: ccfapp.Request<IUnwrapKeysRequest>,
+): ServiceResult<string | IUnwrapKeysResponse> => {
+  const name = "unwrapKeys";
+  const logContext = new LogContext().appendScope(name);
+  const serviceRequest = new ServiceRequest<IUnwrapKeysRequest>(logContext, request);
+
+  // check if caller has a valid identity
+  const [_, isValidIdentity] = serviceRequest.isAuthenticated();
+  if (isValidIdentity.failure) return isValidIdentity;
+
+  let attestation: ISnpAttestation | undefined = undefined;
+
+  // Check if serviceRequest.body is defined before accessing "attestation"
+  if (serviceRequest.body && serviceRequest.body["attestation"]) {
+    attestation = serviceRequest.body["attestation"];
+  }
+
+  // Validate input
+  if (!serviceRequest.body || !attestation) {
     return ServiceResult.Failed<string>(
-      { errorMessage: `${name}:kid ${wrappedKid} not found in store` },
-      404,
+      {
+        errorMessage: `${name}: The body is not a ${name} request: ${JSON.stringify(serviceRequest.body)}`,
+      },
+      400,
       logContext
     );
   }
 
-  const [expired, _depricated] = KeyRotationPolicy.isExpired(keyRotationPolicyMap, keyItem, logContext);
-  if (expired) {
+  // check payload
+  const requestedKids = serviceRequest.body["kids"];
+  if (
+    requestedKids !== undefined &&
+    (!Array.isArray(requestedKids) ||
+      requestedKids.some((kid) => typeof kid !== "string"))
+  ) {
     return ServiceResult.Failed<string>(
-      { errorMessage: `${name}:kid ${wrappedKid} has expired` },
-      410,  // 410 Gone, key no longer available
+      {
+        errorMessage: `${name}: kids must be an array of strings`,
+      },
+      400,
+      logContext
+    );
+  }
+  if (requestedKids !== undefined && requestedKids.length > MAX_UNWRAP_KEYS) {
+    return ServiceResult.Failed<string>(
+      {
+        errorMessage: `${name}: At most ${MAX_UNWRAP_KEYS} kids can be requested, got ${requestedKids.length}`,
+      },
+      400,
       logContext
     );
   }
 
-  const receipt = hpkeKeysMap.receipt(wrappedKid);
+  const wrappingKeyFromRequest = requestHasWrappingKey(
+    serviceRequest.body as IUnwrapRequest,
+    logContext,
+  );
+  if (wrappingKeyFromRequest.success === false) {
+    // WrappingKey has errors
+    return ServiceResult.Failed<string>(
+      wrappingKeyFromRequest.error!,
+      wrappingKeyFromRequest.statusCode,
+      logContext,
+    );
+  }
 
-  // Get receipt if available, otherwise return accepted
-  if (receipt !== undefined) {
-    keyItem.receipt = receipt;
-    Logger.debug(`Key->Receipt: ${receipt}`);
-  } else {
-    return ServiceResult.Accepted(logContext);
+  const wrappingKeyBuf = wrappingKeyFromRequest.body!.wrappingKey;
+  const wrappingKeyHash = wrappingKeyFromRequest.body!.wrappingKeyHash;
+
+  const fmt = serviceRequest.query?.["fmt"] || "jwk";
+  if (!(fmt === "jwk" || fmt === "tink")) {
+    return ServiceResult.Failed<string>(
+      {
+        errorMessage: `${name}: Wrong fmt query parameter '${fmt}'. Must be jwt or tink.`,
+      },
+      400,
+      logContext
+    );
   }
 
-  // Get wrapped key
+  const wrapAlg = serviceRequest.query?.["wrapAlg"] || DefaultWrapAlgorithm;
+  if (!WrapAlgorithms.includes(wrapAlg)) {
+    return ServiceResult.Failed<string>(
+      {
+        errorMessage: `${name}: Wrong wrapAlg query parameter '${wrapAlg}'. Must be one of ${WrapAlgorithms}.`,
+      },
+      400,
+      logContext
+    );
+  }
+
+  // Validate attestation once for all kids
+  let validateAttestationResult: ServiceResult<string | IAttestationReport>;
   try {
-    if (fmt == "tink") {
-      Logger.debug(`Retrieve key in tink format`);
-      const wrapped = KeyWrapper.createWrappedPrivateTinkKey(
-        wrappingKeyBuf,
-        keyItem,
+    validateAttestationResult = validateAttestation(attestation);
+    if (!validateAttestationResult.success) {
+      return ServiceResult.Failed<string>(
+        validateAttestationResult.error!,
+        validateAttestationResult.statusCode,
+        logContext
       );
-      const ret: IUnwrapResponse = { wrapped, receipt };
-      return ServiceResult.Succeeded<IUnwrapResponse>(ret, logContext);
-    } else {
-      // Default is JWT.
-      const wrapped = KeyWrapper.wrapKeyJwt(wrappingKeyBuf, keyItem);
-      const ret = { wrapped, receipt };
-      return ServiceResult.Succeeded<IUnwrapResponse>(ret, logContext);
     }
   } catch (exception: any) {
     return ServiceResult.Failed<string>(
-      { errorMessage: `${name}: Error (${wrappedKid}): ${exception.message}` },
+      {
+        errorMessage: `${name}: Error in validating attestation (${attestation}): ${exception.message}`,
+      },
       500,
       logContext
     );
   }
+
+  // Check if wrapping key match attestation
+  if (
+    !validateAttestationResult.body!["x-ms-sevsnpvm-reportdata"].startsWith(
+      wrappingKeyHash,
+    )
+  ) {
+    return ServiceResult.Failed<string>(
+      {
+        errorMessage: `${name}:wrapping key hash ${validateAttestationResult.body!["x-ms-sevsnpvm-reportdata"]} does not match wrappingKey`,
+      },
+      400,
+      logContext
+    );
+  }
+
+  const kids = requestedKids ?? nonExpiredKids(MAX_UNWRAP_KEYS, logContext);
+  Logger.debug(() => `Unwrap keys for kids: ${kids}`, logContext);
+
+  const keys: IUnwrapKeysItem[] = kids.map((kid) => {
+    const result = wrapKeyForKid(
+      name,
+      kid,
+      wrappingKeyBuf,
+      fmt,
+      wrapAlg,
+      logContext,
+    );
+    const item: IUnwrapKeysItem = {
+      wrappedKid: kid,
+      statusCode: result.statusCode,
+    };
+    if (result.success && result.statusCode === 200) {
+      const unwrapped = result.body as IUnwrapResponse;
+      item.wrapped = unwrapped.wrapped;
+      item.receipt = unwrapped.receipt;
+    } else if (result.error) {
+      item.errorMessage = result.error.errorMessage;
+    }
+    return item;
+  });
+
+  return ServiceResult.Succeeded<IUnwrapKeysResponse>({ keys }, logContext);
 };
 
 //#endregion
@@ -5,10 +5,13 @@ import * as ccfapp from "@microsoft/ccf-app";
 import { ServiceResult } from "../utils/ServiceResult";
 import { LogContext, Logger } from "../utils/Logger";
 import { getCoseProtectedHeader } from "../utils/cose";
+import { positiveIntegerParam } from "../utils/Tooling";
+import { toHex } from "../utils/Codec";
 import { actions } from '../actions/actions';
 import { ServiceRequest } from "../utils/ServiceRequest";
 import { ccf } from "@microsoft/ccf-app/global";
-import { proposalsPolicyMap } from "../repositories/Maps";
+import { proposalStore } from "../repositories/Maps";
+import { CREATED_AT_HEADER } from "../repositories/ProposalStore";
 
 // This file serves to emulate a simplified version CCF's governance mechanism.
 // This allows governance type operations on CCF platforms which don't expose
@@ -25,20 +28,26 @@ import { proposalsPolicyMap } from "../repositories/Maps";
 // timestamps, we are happy with a stricter and simpler check that new proposals
 // must be signed more recently than the last accepted proposal.
 
+// The creation time of the last accepted proposal is kept in an index next to the
+// proposals, so neither the replay check nor the trimming decodes stored proposals.
+
 // When calling this endpoint with GET, the last $proposalsToKeep proposals are
-// returned in ascending creation order/
+// returned in ascending creation order. With ?since=<seqno>&limit=<n> a page of the
+// proposals accepted after seqno is returned with the nextSince to poll with.
 
 // This is a module of code provided by ACL.
 declare const acl: any;
 
 const proposalsToKeep = 5;
 
+// Page size of GET ?since=
+const DEFAULT_PAGE_LIMIT = 20;
+const MAX_PAGE_LIMIT = 100;
+
 function digest(jsonLike) {
-    return Array.from(new Uint8Array(
+    return toHex(
         ccf.crypto.digest("SHA-256", ccf.jsonCompatibleToBuf(jsonLike))
-    ))
-      .map((n) => n.toString(16).padStart(2, "0"))
-      .join("");
+    );
 }
 
 interface IProposalsAction {
@@ -50,6 +59,13 @@ interface IProposalsRequest {
     actions: IProposalsAction[];
 }
 
+export interface IProposalsPage {
+    // Hex encoded COSE_Sign1 proposals
+    proposals: string[];
+    // Pass as ?since= to get the proposals accepted after this page
+    nextSince: number;
+}
+
 class IProposalVotes {}
 
 class IProposalResult {
@@ -150,18 +166,9 @@ export const postProposals = (
         (request.caller as ccfapp.UserCOSESign1AuthnIdentity).cose.content
     );
 
-    // Create a map from created time to proposal ID for historical proposals
-    const createdTimeToProposalIdMap = new Map<number, ArrayBuffer>();
-    proposalsPolicyMap.forEach((proposal, proposalId) => {
-        createdTimeToProposalIdMap.set(
-            getCoseProtectedHeader(proposal)["ccf.gov.msg.created_at"],
-            proposalId
-        );
-    });
-
     // Ensure the proposal was created after the last accepted proposal
-    const currentProposalCreatedAt = getCoseProtectedHeader(request.body.arrayBuffer())["ccf.gov.msg.created_at"];
-    const lastAcceptedProposalCreatedAt = Math.max(...Array.from(createdTimeToProposalIdMap.keys()));
+    const currentProposalCreatedAt = getCoseProtectedHeader(serviceRequest.bodyBuffer)[CREATED_AT_HEADER];
+    const lastAcceptedProposalCreatedAt = proposalStore.watermark() ?? -Infinity;
     if (currentProposalCreatedAt < lastAcceptedProposalCreatedAt) {
         const errorMessage = `Proposal created before (${currentProposalCreatedAt}) last accepted proposal (${lastAcceptedProposalCreatedAt})`;
             Logger.error(errorMessage, logContext);
@@ -202,47 +209,48 @@ export const postProposals = (
         ));
     }
 
-    // Save the proposal to the table
-    const proposalId = ccf.crypto.digest("SHA-256", request.body.arrayBuffer());
-    proposalsPolicyMap.set(
+    // Save the proposal to the table and keep the last N proposals
+    const proposalId = ccf.crypto.digest("SHA-256", serviceRequest.bodyBuffer);
+    proposalStore.storeProposal(
         proposalId,
-        request.body.arrayBuffer()
+        serviceRequest.bodyBuffer,
+        currentProposalCreatedAt,
+        proposalsToKeep,
     );
-    createdTimeToProposalIdMap.set(currentProposalCreatedAt, proposalId);
-
-    // Keep the last N proposals
-    const sortedCreatedTimes = Array.from(createdTimeToProposalIdMap.keys()).sort((a, b) => a - b);
-    for (let i = 0; i < sortedCreatedTimes.length - proposalsToKeep; i++) {
-        proposalsPolicyMap.delete(createdTimeToProposalIdMap.get(sortedCreatedTimes[i])!);
-    }
 
     return ServiceResult.Succeeded<IProposalResult[]>(proposalResults, logContext);
 }
 
 export const getProposals = (
     request: ccfapp.Request<IProposalsRequest>,
-  ): ServiceResult<string[]> => {
+  ): ServiceResult<string | string[] | IProposalsPage> => {
     const logContext = new LogContext().appendScope("proposals");
-    let proposals: string[] = [];
-
-    // Sort the proposals by created time
-    const createdTimeToProposalIdMap = new Map<ArrayBuffer, number>();
-    proposalsPolicyMap.forEach((proposal, proposalId) => {
-        createdTimeToProposalIdMap.set(
-            proposalId,
-            getCoseProtectedHeader(proposal)["ccf.gov.msg.created_at"]
+    const serviceRequest = new ServiceRequest<void>(logContext, request);
+
+    const sinceParam = serviceRequest.query?.["since"];
+    const since = sinceParam === undefined ? 0 : Number(sinceParam);
+    const limit = positiveIntegerParam(serviceRequest.query?.["limit"], DEFAULT_PAGE_LIMIT);
+    if (!Number.isInteger(since) || since < 0 || limit === undefined) {
+        return ServiceResult.Failed<string>(
+            { errorMessage: "since must be a sequence number and limit a positive integer" },
+            400,
+            logContext,
         );
-    });
-    const sortedProposals = Array.from(createdTimeToProposalIdMap.entries()).sort((a, b) => a[1] - b[1]);
-
-    // Build an array of proposals
-    sortedProposals.forEach(([proposalId, createdTime]) => {
-        const proposal = proposalsPolicyMap.get(proposalId)!;
-        const bytes = new Uint8Array(proposal);
-        proposals.push(Array.from(bytes)
-            .map((byte) => byte.toString(16).padStart(2, "0"))
-            .join(""));
-    });
-
-    return ServiceResult.Succeeded(proposals, logContext)
-}
\ No newline at end of file
+    }
+
+    // Proposals in ascending acceptance order, which is their creation order
+    const proposals = proposalStore.list(
+        since,
+        sinceParam === undefined ? proposalsToKeep : Math.min(limit, MAX_PAGE_LIMIT),
+    );
+    const encoded = proposals.map(({ proposal }) => toHex(proposal));
+    if (sinceParam === undefined) {
+        return ServiceResult.Succeeded<string[]>(encoded, logContext);
+    }
+
+    const nextSince = proposals.length > 0 ? proposals[proposals.length - 1].seqno : since;
+    return ServiceResult.Succeeded<IProposalsPage>(
+        { proposals: encoded, nextSince },
+        logContext,
+    );
+}
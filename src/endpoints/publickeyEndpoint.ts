@@ -3,17 +3,97 @@
 
 import * as ccfapp from "@microsoft/ccf-app";
 import { ServiceResult } from "../utils/ServiceResult";
-import { ITinkPublicKeySet, TinkKey, TinkPublicKey } from "./TinkKey";
-import { hpkeKeyIdMap, hpkeKeysMap } from "../repositories/Maps";
+import { ITinkPublicKeySet } from "./TinkKey";
+import {
+  hpkeKeyIdMap,
+  hpkeKeysMap,
+  hpkePublicKeyView,
+  keyRotationPolicyMap,
+} from "../repositories/Maps";
 import { IKeyItem } from "./IKeyItem";
-import { enableEndpoint, setKeyHeaders } from "../utils/Tooling";
+import {
+  DEFAULT_KEY_MAX_AGE_SECONDS,
+  enableEndpoint,
+  etagMatches,
+  positiveIntegerParam,
+  setKeyHeaders,
+} from "../utils/Tooling";
 import { ServiceRequest } from "../utils/ServiceRequest";
 import { LogContext, Logger } from "../utils/Logger";
+import {
+  IPublicKeyViewItem,
+  PublicKeyView,
+} from "../repositories/PublicKeyView";
+import { KeyRotationPolicy } from "../policies/KeyRotationPolicy";
 
 // Enable the endpoint
 enableEndpoint();
 
-// Get list of public keys
+// Page size of /listpubkeys
+const DEFAULT_LIST_LIMIT = 20;
+const MAX_LIST_LIMIT = 100;
+
+const JSON_CONTENT_TYPE = { "content-type": "application/json" };
+
+/**
+ * Gets the public view of the key with the given id.
+ * Keys created before the view existed are built from the key store.
+ * @param id - The sequential id of the key.
+ * @returns The view item, or undefined if the key does not exist.
+ */
+const publicKeyViewItem = (id: number): IPublicKeyViewItem | undefined => {
+  const item = hpkePublicKeyView.get(id);
+  if (item !== undefined) {
+    return item;
+  }
+  const kid = hpkeKeyIdMap.store.get(id);
+  if (kid === undefined) {
+    return undefined;
+  }
+  const keyItem = hpkeKeysMap.store.get(kid) as IKeyItem;
+  return keyItem === undefined ? undefined : PublicKeyView.fromKeyItem(id, keyItem);
+};
+
+/**
+ * Builds the entity tag of a public key response.
+ * The KV version of the write makes it unique even if a key id is reused.
+ * @param idOrKid - The sequential id or the kid of the key the response is derived from.
+ * @param version - The KV version of the write of that key.
+ * @param parts - Additional values the response depends on.
+ * @returns The entity tag, or undefined if the version is unknown.
+ */
+const keyEtag = (
+  idOrKid: number | string,
+  version: number | undefined,
+  ...parts: number[]
+): string | undefined => {
+  return version === undefined
+    ? undefined
+    : [idOrKid, version, ...parts].join(".");
+};
+
+/**
+ * Limits a max age so clients revalidate when the next pending key is activated.
+ * @param maxAgeSeconds - The max age of the response.
+ * @param nextActivationTime - The activation time of the next pending key, if any.
+ * @param now - The current time in milliseconds.
+ * @returns The max age in seconds.
+ */
+const maxAgeUntilActivation = (
+  maxAgeSeconds: number,
+  nextActivationTime: number | undefined,
+  now: number,
+): number => {
+  if (nextActivationTime === undefined) {
+    return maxAgeSeconds;
+  }
+  return Math.min(
+    maxAgeSeconds,
+    Math.max(0, Math.ceil((nextActivationTime - now) / 1000)),
+  );
+};
+
+// Get list of active public keys, newest first
 export const listpubkeys = (
   request: ccfapp.Request<void>,
 ): ServiceResult<string | ITinkPublicKeySet> => {
@@ -25,34 +105,86 @@ export const listpubkeys = (
   const [_, isValidIdentity] = serviceRequest.isAuthenticated();
   if (isValidIdentity.failure) return isValidIdentity;
 
+  const latestId = hpkeKeyIdMap.latestId;
+  const oldestId = hpkeKeyIdMap.oldestId;
+  const limit = positiveIntegerParam(
+    serviceRequest.query?.["limit"],
+    DEFAULT_LIST_LIMIT,
+  );
+  const cursor = positiveIntegerParam(serviceRequest.query?.["cursor"], latestId);
+  if (limit === undefined || limit > MAX_LIST_LIMIT || cursor === undefined) {
+    return ServiceResult.Failed<string>(
+      {
+        errorMessage: `${name}: limit must be an integer between 1 and ${MAX_LIST_LIMIT} and cursor a positive integer`,
+      },
+      400,
+      logContext
+    );
+  }
+
   try {
-    // Get last key
-    const [_, kid] = hpkeKeyIdMap.latestItem();
-    if (kid === undefined) {
-      return ServiceResult.Failed<string>(
-        {
-          errorMessage: `${name}: No keys in store`,
-        },
-        400,
-        logContext
-      );
-    }
-    const keyItem = hpkeKeysMap.store.get(kid) as IKeyItem;
-    if (keyItem === undefined) {
-      return ServiceResult.Failed<string>(
-        {
-          errorMessage: `${name}: kid ${kid} not found in store`,
-        },
-        404,
-        logContext
+    const now = Date.now();
+    // Pending keys of a refresh batch are listed once they are activated
+    const [activeId, nextActivationTime] = hpkePublicKeyView.latestActiveId(
+      latestId,
+      now,
+    );
+    const keys: string[] = [];
+    let id = Math.min(cursor, activeId);
+    let expired = false;
+    let oldestTimestamp: number | undefined;
+    while (id >= oldestId && keys.length < limit) {
+      const item = publicKeyViewItem(id);
+      id--;
+      if (item === undefined) {
+        continue;
+      }
+      // Keys are created in id order, so all older keys have expired as well
+      const expiryTimes = KeyRotationPolicy.getKeyItemExpiryTime(
+        keyRotationPolicyMap,
+        item.timestamp,
+        logContext,
       );
+      if (expiryTimes !== undefined && now > expiryTimes.expiryTimeMs) {
+        expired = true;
+        break;
+      }
+      keys.push(item.tinkPublicKey);
+      oldestTimestamp = item.timestamp;
     }
 
-    delete keyItem.d;
-    const publicKey: any = new TinkPublicKey([keyItem]).get();
+    // The oldest listed key expires first. Do not let clients cache an empty list.
+    const maxAgeSeconds =
+      oldestTimestamp === undefined
+        ? 0
+        : maxAgeUntilActivation(
+          KeyRotationPolicy.getCacheMaxAgeSeconds(
+            keyRotationPolicyMap,
+            oldestTimestamp,
+            logContext,
+          ) ?? DEFAULT_KEY_MAX_AGE_SECONDS,
+          nextActivationTime,
+          now,
+        );
+    const etag = keyEtag(
+      latestId,
+      hpkeKeyIdMap.getVersionOfPreviousWrite(latestId),
+      activeId,
+      cursor,
+      keys.length,
+    );
+    const headers = { ...setKeyHeaders(maxAgeSeconds, etag), ...JSON_CONTENT_TYPE };
+    if (etagMatches(serviceRequest.headers?.["if-none-match"], etag)) {
+      return ServiceResult.NotModified(logContext, headers);
+    }
 
-    const headers = setKeyHeaders();
-    return ServiceResult.Succeeded<ITinkPublicKeySet>(publicKey, logContext, headers);
+    const nextCursor = !expired && id >= oldestId ? `,"nextCursor":"${id}"` : "";
+    Logger.debug(() => `Listing ${keys.length} keys${nextCursor}`, logContext);
+    return ServiceResult.Succeeded<string>(
+      `{"keys":[${keys.join(",")}]${nextCursor}}`,
+      logContext,
+      headers,
+    );
   } catch (exception: any) {
     const errorMessage = `${name}: Error: ${exception.message}`;
     console.error(errorMessage);
@@ -60,7 +192,7 @@ export const listpubkeys = (
   }
 };
 
-// Get latest public key
+// Get latest public key, the key with a given kid or the key that was active at a given time
 export const pubkey = (
   request: ccfapp.Request<void>,
 ): ServiceResult<string | IKeyItem> => {
@@ -72,37 +204,130 @@ export const pubkey = (
   const [_, isValidIdentity] = serviceRequest.isAuthenticated();
   if (isValidIdentity.failure) return isValidIdentity;
 
-  let id: number | undefined;
+  const fmt = serviceRequest.query?.["fmt"] || "jwk";
+  if (!(fmt === "jwk" || fmt === "tink")) {
+    return ServiceResult.Failed<string>(
+      {
+        errorMessage: `${name}: Wrong fmt query parameter '${fmt}'. Must be jwt or tink.`,
+      },
+      400,
+      logContext
+    );
+  }
+
+  const validAt = positiveIntegerParam(serviceRequest.query?.["validAt"], 0);
+  if (validAt === undefined) {
+    return ServiceResult.Failed<string>(
+      {
+        errorMessage: `${name}: validAt must be a time in milliseconds since the epoch`,
+      },
+      400,
+      logContext
+    );
+  }
+  if (validAt > 0 && serviceRequest.query?.["kid"]) {
+    return ServiceResult.Failed<string>(
+      {
+        errorMessage: `${name}: kid and validAt cannot be used together`,
+      },
+      400,
+      logContext
+    );
+  }
+
+  let kid: string | undefined;
   try {
-    let kid: string | undefined;
-    if (serviceRequest.query && serviceRequest.query["kid"]) {
-      kid = serviceRequest.query["kid"];
-    } else {
-      [id, kid] = hpkeKeyIdMap.latestItem();
-      if (kid === undefined) {
-        return ServiceResult.Failed(
+    // The public records are written in the transaction that stores the key,
+    // so the version of the record is the seqno of the receipt
+    const now = Date.now();
+    let item: IPublicKeyViewItem | undefined;
+    let seqno: number | undefined;
+    let nextActivationTime: number | undefined;
+    if (validAt > 0) {
+      const id = hpkePublicKeyView.idValidAt(
+        validAt,
+        hpkeKeyIdMap.oldestId,
+        hpkeKeyIdMap.latestId,
+        (id) => publicKeyViewItem(id)?.timestamp,
+      );
+      item = id > 0 ? publicKeyViewItem(id) : undefined;
+      if (item === undefined) {
+        return ServiceResult.Failed<string>(
           {
-            errorMessage: `${name}: No keys in store`,
+            errorMessage: `${name}: No key valid at ${validAt}`,
           },
-          400,
+          404,
           logContext
         );
       }
-    }
-    const fmt = serviceRequest.query?.["fmt"] || "jwk";
-    if (!(fmt === "jwk" || fmt === "tink")) {
-      return ServiceResult.Failed<string>(
-        {
-          errorMessage: `${name}: Wrong fmt query parameter '${fmt}'. Must be jwt or tink.`,
-        },
-        400,
-        logContext
-      );
+      kid = item.kid;
+      const validKid = item.kid;
+      seqno = hpkeKeysMap.getVersionOfPreviousWrite(validKid);
+      if (validAt > now) {
+        // A key activated before validAt can still be added, do not cache the answer
+        nextActivationTime = now;
+      }
+    } else if (serviceRequest.query && serviceRequest.query["kid"]) {
+      kid = serviceRequest.query["kid"];
+      item = hpkePublicKeyView.getByKid(kid);
+      if (item !== undefined) {
+        seqno = hpkePublicKeyView.getVersionOfPreviousWrite(kid!);
+      } else {
+        // Keys created before the public records existed
+        const keyItem = hpkeKeysMap.store.get(kid) as IKeyItem;
+        if (keyItem !== undefined) {
+          // The kid of a key ends with its sequential id
+          const id = Number(kid.substring(kid.lastIndexOf("_") + 1));
+          item = PublicKeyView.fromKeyItem(id, keyItem);
+          seqno = hpkeKeysMap.getVersionOfPreviousWrite(kid!);
+        }
+      }
+    } else {
+      item = hpkePublicKeyView.latestItem();
+      if (item !== undefined && item.timestamp > now) {
+        // The latest key is pending, serve the newest active key
+        let activeId: number;
+        [activeId, nextActivationTime] = hpkePublicKeyView.latestActiveId(
+          item.id,
+          now,
+        );
+        item = activeId > 0 ? publicKeyViewItem(activeId) : undefined;
+        if (item === undefined) {
+          return ServiceResult.Failed(
+            {
+              errorMessage: `${name}: No active keys in store`,
+            },
+            400,
+            logContext
+          );
+        }
+        const activeKid = item.kid;
+        seqno = hpkeKeysMap.getVersionOfPreviousWrite(activeKid);
+      } else if (item !== undefined) {
+        seqno = hpkePublicKeyView.getVersionOfLatest();
+      } else {
+        // Keys created before the public records existed
+        const id = hpkeKeyIdMap.latestId;
+        if (id <= 0) {
+          return ServiceResult.Failed(
+            {
+              errorMessage: `${name}: No keys in store`,
+            },
+            400,
+            logContext
+          );
+        }
+        item = publicKeyViewItem(id);
+        if (item !== undefined) {
+          const latestKid = item.kid;
+          seqno = hpkeKeysMap.getVersionOfPreviousWrite(latestKid);
+        }
+      }
+      kid = item?.kid;
     }
 
-    Logger.debug(`Get key with kid ${kid}`);
-    const keyItem = hpkeKeysMap.store.get(kid) as IKeyItem;
-    if (keyItem === undefined) {
+    Logger.debug(`Get key with kid ${kid}`, logContext);
+    if (item === undefined || kid === undefined) {
       return ServiceResult.Failed(
         {
           errorMessage: `kid ${kid} not found in store`,
@@ -112,31 +337,41 @@ export const pubkey = (
       );
     }
 
-    // Get receipt if available
-    const receipt = hpkeKeysMap.receipt(kid);
-    if (receipt !== undefined) {
-      keyItem.receipt = receipt;
-      Logger.debug(`pubkey->Receipt: ${receipt}`);
-    } else {
-      return ServiceResult.Accepted(logContext);
+    // Answer conditional requests before the receipt is looked up
+    const maxAgeSeconds = maxAgeUntilActivation(
+      KeyRotationPolicy.getCacheMaxAgeSeconds(
+        keyRotationPolicyMap,
+        item.timestamp,
+        logContext,
+      ) ?? DEFAULT_KEY_MAX_AGE_SECONDS,
+      nextActivationTime,
+      now,
+    );
+    const etag = keyEtag(kid, seqno);
+    const headers = { ...setKeyHeaders(maxAgeSeconds, etag), ...JSON_CONTENT_TYPE };
+    if (etagMatches(serviceRequest.headers?.["if-none-match"], etag)) {
+      return ServiceResult.NotModified(logContext, headers);
     }
 
-    delete keyItem.d;
-    if (fmt === "tink") {
-      const headers = setKeyHeaders();
-      Logger.debug(`response headers: `, headers, keyItem);
-      const tinkKey = new TinkKey([keyItem]);
-      Logger.debug(`tinkKey: `, tinkKey);
-      const publicKey: any = tinkKey.get();
-      if (receipt !== undefined) {
-        publicKey.receipt = receipt;
-      }
-      return ServiceResult.Succeeded<string>(publicKey, logContext, headers);
+    // Get receipt if available
+    const receipt =
+      seqno === undefined
+        ? undefined
+        : hpkeKeysMap.receiptOfWrite(kid, seqno, logContext);
+    if (receipt === undefined) {
+      return ServiceResult.Accepted(logContext);
     }
 
-    return ServiceResult.Succeeded<IKeyItem>(keyItem, logContext);
+    return ServiceResult.Succeeded<string>(
+      PublicKeyView.withReceipt(
+        fmt === "tink" ? item.tinkKeySet : item.jwk,
+        receipt,
+      ),
+      logContext,
+      headers,
+    );
   } catch (exception: any) {
-    const errorMessage = `${name}: Error (${id}): ${exception.message}`;
+    const errorMessage = `${name}: Error (${kid}): ${exception.message}`;
     console.error(errorMessage);
     return ServiceResult.Failed<string>({ errorMessage }, 500, logContext);
   }
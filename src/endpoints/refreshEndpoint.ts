@@ -4,9 +4,15 @@
 import * as ccfapp from "@microsoft/ccf-app";
 import { ServiceResult } from "../utils/ServiceResult";
 import { IKeyItem } from "./IKeyItem";
-import { hpkeKeyIdMap, hpkeKeysMap, keyRotationPolicyMap } from "../repositories/Maps";
+import {
+  hpkeKeyIdMap,
+  hpkeKeysMap,
+  hpkePublicKeyView,
+  keyRetention,
+  keyRotationPolicyMap,
+} from "../repositories/Maps";
 import { KeyGeneration } from "./KeyGeneration";
-import { enableEndpoint } from "../utils/Tooling";
+import { enableEndpoint, positiveIntegerParam } from "../utils/Tooling";
 import { ServiceRequest } from "../utils/ServiceRequest";
 import { LogContext, Logger } from "../utils/Logger";
 import { KeyRotationPolicy } from "../policies/KeyRotationPolicy";
@@ -14,15 +20,32 @@ import { KeyRotationPolicy } from "../policies/KeyRotationPolicy";
 // Enable the endpoint
 enableEndpoint();
 
+// Maximum number of keys created by a single /refresh?count=N call
+const MAX_REFRESH_COUNT = 64;
+
+export interface IRefreshResponse {
+  keys: IKeyItem[];
+}
+
 /**
  * Refreshes the HPKE key pair and stores it in the key maps.
  *
+ * With ?count=N, N keys are created in one transaction. The keys are activated one
+ * rotation interval apart, after the pending keys created by earlier batches, so keys
+ * are always activated in id order. Until its activation time a key is pending: it is
+ * not returned as the latest key or listed as a public key.
+ *
+ * The claims digest of the transaction is the SHA-256 of the public key x of a single key,
+ * or of the JSON list of the x of all keys of a batch in id order.
+ *
+ * Keys past their expiry and grace period are deleted in the same transaction.
+ *
  * @param request - The request object.
- * @returns A `ServiceResult` containing the refreshed key pair or an error message.
+ * @returns A `ServiceResult` containing the refreshed key pair, the list of key pairs if count is given, or an error message.
  */
 export const refresh = (
   request: ccfapp.Request<void>,
-): ServiceResult<string | IKeyItem> => {
+): ServiceResult<string | IKeyItem | IRefreshResponse> => {
   const name = "refresh";
   const logContext = new LogContext().appendScope(name);
 
@@ -32,41 +55,114 @@ export const refresh = (
   const [_, isValidIdentity] = serviceRequest.isAuthenticated();
   if (isValidIdentity.failure) return isValidIdentity;
 
+  const countParam = serviceRequest.query?.["count"];
+  const count = positiveIntegerParam(countParam, 1);
+  if (count === undefined || count > MAX_REFRESH_COUNT) {
+    return ServiceResult.Failed<string>(
+      {
+        errorMessage: `${name}: count must be an integer between 1 and ${MAX_REFRESH_COUNT}`,
+      },
+      400,
+      logContext
+    );
+  }
+
   // Get key rotation policy if available
   const creationTime = Date.now();
   Logger.info(`Creation time: ${creationTime}`, logContext);
 
-  const expiry = KeyRotationPolicy.getKeyItemExpiryTime(
+  const keyRotationPolicy = KeyRotationPolicy.getKeyRotationPolicyFromMap(
     keyRotationPolicyMap,
-    creationTime,
     logContext
-  )?.expiryTimeMs;
-
-  if (expiry !== undefined) {
-    Logger.info(`${name}: Key rotation policy defined. Expiry: ${expiry}`, logContext);
+  );
+  if (keyRotationPolicy !== undefined) {
+    Logger.info(() => `${name}: Key rotation policy defined: ${JSON.stringify(keyRotationPolicy)}`, logContext);
   } else {
     Logger.info(`${name}: Key rotation policy not defined`, logContext);
   }
 
+  const rotationIntervalMs = (keyRotationPolicy?.rotation_interval_seconds ?? 0) * 1000;
+  if (count > 1 && rotationIntervalMs <= 0) {
+    return ServiceResult.Failed<string>(
+      {
+        errorMessage: `${name}: A key rotation policy with a rotation interval is needed to schedule ${count} keys`,
+      },
+      400,
+      logContext
+    );
+  }
+
   try {
+    // Delete the keys past their grace period before the new keys are added
+    keyRetention.compact(creationTime, logContext);
+
     // Get HPKE key pair id
-    const id = hpkeKeyIdMap.size + 1;
+    const latestId = hpkeKeyIdMap.latestId;
+
+    // Schedule the new keys after the pending keys of earlier batches
+    let activationTime = creationTime;
+    const [, latestKid] = hpkeKeyIdMap.latestItem();
+    const latestKey =
+      latestKid === undefined
+        ? undefined
+        : (hpkeKeysMap.store.get(latestKid) as IKeyItem);
+    if (latestKey?.timestamp !== undefined && latestKey.timestamp > creationTime) {
+      activationTime = latestKey.timestamp + rotationIntervalMs;
+    }
+
+    const keyItems: IKeyItem[] = [];
+    for (let index = 0; index < count; index++) {
+      const id = latestId + 1 + index;
+      const keyActivationTime = activationTime + index * rotationIntervalMs;
+      const expiry = KeyRotationPolicy.getKeyItemExpiryTime(
+        keyRotationPolicyMap,
+        keyActivationTime,
+        logContext
+      )?.expiryTimeMs;
+
+      // since OHTTP is limited to 2 char ids, we can only have ids from 10 to 99
+      // So the current logic is to have ids rotate from 10 to 99
+      const keyItem = KeyGeneration.generateKeyItem(
+        id % 90 + 10,
+        expiry,
+        keyActivationTime,
+      );
+      keyItem.kid = `${keyItem.kid!}_${id}`;
+      keyItems.push(keyItem);
+    }
+
+    // A transaction has a single claims digest, carried by the receipt of every key it stores.
+    // A single key claims its public key. A batch claims the JSON list of its public keys in
+    // id order, which clients rebuild from the keys of the response.
+    const claims =
+      keyItems.length === 1
+        ? keyItems[0].x
+        : JSON.stringify(keyItems.map((keyItem) => keyItem.x));
+
+    keyItems.forEach((keyItem, index) => {
+      const id = latestId + 1 + index;
+
+      // Store HPKE key pair kid
+      hpkeKeyIdMap.storeItem(id, keyItem.kid!);
 
-    // since OHTTP is limited to 2 char ids, we can only have ids from 10 to 99
-    // So the current logic is to have ids rotate from 10 to 99
-    const keyItem = KeyGeneration.generateKeyItem(id % 90 + 10, expiry);
+      // Store HPKE key pair
+      hpkeKeysMap.storeItem(
+        keyItem.kid!,
+        keyItem,
+        index === 0 ? claims : undefined,
+      );
 
-    // Store HPKE key pair kid
-    keyItem.kid = `${keyItem.kid!}_${id}`;
-    hpkeKeyIdMap.storeItem(id, keyItem.kid);
+      // Store the serialized public forms for the public key endpoints
+      hpkePublicKeyView.storeItem(id, keyItem);
+      Logger.info(`Key item with id ${id} and kid ${keyItem.kid} stored, active from ${keyItem.timestamp}`, logContext);
 
-    // Store HPKE key pair
-    hpkeKeysMap.storeItem(keyItem.kid, keyItem, keyItem.x);
-    Logger.info(`Key item with id ${id} and kid ${keyItem.kid} stored`, logContext);
+      delete keyItem.d;
+    });
 
-    delete keyItem.d;
-    const ret = keyItem;
-    return ServiceResult.Succeeded<IKeyItem>(ret, logContext);
+    if (countParam === undefined) {
+      return ServiceResult.Succeeded<IKeyItem>(keyItems[0], logContext);
+    }
+    return ServiceResult.Succeeded<IRefreshResponse>({ keys: keyItems }, logContext);
   } catch (exception: any) {
     const errorMessage = `${name}: Error: ${exception.message}`;
     console.error(errorMessage);
@@ -9,6 +9,29 @@ import { Logger, LogContext } from "../utils/Logger";
 import { ServiceResult } from "../utils/ServiceResult";
 import { IAttestationReport } from "../attestation/ISnpAttestationReport";
 import { KmsError } from "../utils/KmsError";
+import { PolicyCache } from "../repositories/PolicyCache";
+
+type OperatorType = "gte" | "gt";
+
+const POLICY_KEYS = ["claims", "gte", "gt"];
+
+interface ICompiledClaim {
+  key: string;
+  policyValue: any;
+  allowed: Set<string>;
+}
+
+interface ICompiledOperator {
+  type: OperatorType;
+  key: string;
+  threshold?: number;
+  error?: { errorMessage: string; statusCode: number };
+}
+
+export interface ICompiledKeyReleasePolicy {
+  claims: ICompiledClaim[];
+  operators: ICompiledOperator[];
+}
 
 export class KeyReleasePolicy implements IKeyReleasePolicy {
   public type = KeyReleasePolicyType.ADD;
@@ -16,18 +39,109 @@ export class KeyReleasePolicy implements IKeyReleasePolicy {
     "x-ms-attestation-type": ["snp"],
   };
 
-  private static validateKeyReleasePolicyClaims(
-    keyReleasePolicyClaims: IKeyReleasePolicySnpProps,
-    attestationClaims: IAttestationReport,
-    logContext: LogContext,
-  ): ServiceResult<string | IAttestationReport> {
+  /**
+   * The compiled key release policy, cached per KV version of the policy entries.
+   */
+  private static readonly cache = new PolicyCache<ICompiledKeyReleasePolicy>(
+    "KeyReleasePolicy",
+  );
+
+  /**
+   * Compiles a key release policy into a form that is cheap to evaluate.
+   * Allowed claim values become sets and operator thresholds are parsed once.
+   * Invalid thresholds are kept and reported when the policy is evaluated.
+   * @param keyReleasePolicy - The key release policy.
+   * @returns The compiled key release policy.
+   */
+  public static compile(
+    keyReleasePolicy: IKeyReleasePolicy,
+  ): ICompiledKeyReleasePolicy {
+    const claims: ICompiledClaim[] = [];
+    const policyClaims = keyReleasePolicy.claims || {};
+    for (const key of Object.keys(policyClaims)) {
+      const policyValue = policyClaims[key];
+      const values = Array.isArray(policyValue) ? policyValue : [policyValue];
+      claims.push({
+        key,
+        policyValue,
+        allowed: new Set<string>(values.map((v) => String(v))),
+      });
+    }
+
+    const operators: ICompiledOperator[] = [];
+    (["gte", "gt"] as const).forEach((type) => {
+      const policyOperators = keyReleasePolicy[type];
+      if (policyOperators === null || policyOperators === undefined) {
+        return;
+      }
+      for (const key of Object.keys(policyOperators)) {
+        operators.push(
+          KeyReleasePolicy.compileOperator(type, key, policyOperators[key]),
+        );
+      }
+    });
+
+    return { claims, operators };
+  }
+
+  private static compileOperator(
+    type: OperatorType,
+    key: string,
+    policyValue: any,
+  ): ICompiledOperator {
+    if (policyValue === null || policyValue === undefined) {
+      return {
+        type,
+        key,
+        error: {
+          errorMessage: `Missing policy value for claim ${key} for operator type ${type}`,
+          statusCode: 500,
+        },
+      };
+    }
     if (
-      keyReleasePolicyClaims === null ||
-      keyReleasePolicyClaims === undefined
+      typeof policyValue !== "number" &&
+      (typeof policyValue !== "string" || isNaN(parseFloat(policyValue)))
     ) {
+      return {
+        type,
+        key,
+        error: {
+          errorMessage: `Policy value for claim ${key} is not a number or a string representing a number for operator type ${type}`,
+          statusCode: 400,
+        },
+      };
+    }
+    return {
+      type,
+      key,
+      threshold:
+        typeof policyValue === "number" ? policyValue : parseFloat(policyValue),
+    };
+  }
+
+  /**
+   * Evaluates attestation claims against a compiled key release policy.
+   * Evaluation stops at the first claim or operator that fails.
+   * @param compiledPolicy - The compiled key release policy.
+   * @param attestationClaims - The claims from the attestation.
+   * @param logContextIn - The log context to use.
+   * @returns The attestation claims if the policy is satisfied.
+   */
+  public static evaluate(
+    compiledPolicy: ICompiledKeyReleasePolicy,
+    attestationClaims: IAttestationReport,
+    logContextIn?: LogContext,
+  ): ServiceResult<string | IAttestationReport> {
+    const logContext = (logContextIn?.clone() || new LogContext()).appendScope("validateKeyReleasePolicy");
+    // claims are mandatory
+    if (compiledPolicy.claims.length === 0) {
       return ServiceResult.Failed<string>(
-        { errorMessage: "Missing key release policy" },
-        500,
+        {
+          errorMessage:
+            "The claims in the key release policy are missing. Please propose a new key release policy",
+        },
+        400,
         logContext,
       );
     }
@@ -39,157 +153,100 @@ export class KeyReleasePolicy implements IKeyReleasePolicy {
       );
     }
 
-    for (let inx = 0; inx < Object.keys(keyReleasePolicyClaims).length; inx++) {
-      const key = Object.keys(keyReleasePolicyClaims)[inx];
-
-      // check if key is in attestation
-      const attestationValue = attestationClaims[key];
-      const policyValue = keyReleasePolicyClaims[key];
-      const isUndefined = typeof attestationValue === "undefined";
+    // Check claims
+    for (const claim of compiledPolicy.claims) {
+      const attestationValue = attestationClaims[claim.key];
       Logger.debug(
-        `Checking key ${key}, typeof attestationValue: ${typeof attestationValue}, isUndefined: ${isUndefined}, attestation value: ${attestationValue}, policyValue: ${policyValue}`,
+        () => `Checking key ${claim.key}, attestation value: ${attestationValue}, policyValue: ${claim.policyValue}`,
         logContext
       );
-      if (isUndefined) {
+      if (attestationValue === undefined) {
         return ServiceResult.Failed<string>(
-          { errorMessage: `Missing claim in attestation: ${key}` },
+          { errorMessage: `Missing claim in attestation: ${claim.key}` },
           400,
           logContext,
         );
       }
-      if (
-        policyValue.filter((p) => {
-          Logger.debug(`Check if policy value ${p} === ${attestationValue}`, logContext);
-          return p.toString() === attestationValue.toString();
-        }).length === 0
-      ) {
+      if (!claim.allowed.has(String(attestationValue))) {
         return ServiceResult.Failed<string>(
           {
-            errorMessage: `Attestation claim ${key}, value ${attestationValue} does not match policy values: ${policyValue}`,
+            errorMessage: `Attestation claim ${claim.key}, value ${attestationValue} does not match policy values: ${claim.policyValue}`,
           },
           400,
           logContext,
         );
       }
     }
+
+    // Check operators gte and gt
+    for (const operator of compiledPolicy.operators) {
+      const result = KeyReleasePolicy.evaluateOperator(
+        operator,
+        attestationClaims,
+        logContext,
+      );
+      if (result !== undefined) {
+        return result;
+      }
+    }
+
     return ServiceResult.Succeeded<IAttestationReport>(attestationClaims, logContext);
   }
 
-  private static validateKeyReleasePolicyOperators(
-    type: string,
-    keyReleasePolicyClaims: IKeyReleasePolicySnpProps,
+  // Returns a failed result if the operator is not satisfied, otherwise undefined
+  private static evaluateOperator(
+    operator: ICompiledOperator,
     attestationClaims: IAttestationReport,
     logContext: LogContext,
-  ): ServiceResult<string | IAttestationReport> {
-    if (
-      keyReleasePolicyClaims === null ||
-      keyReleasePolicyClaims === undefined
-    ) {
+  ): ServiceResult<string> | undefined {
+    const { type, key } = operator;
+    let attestationValue = attestationClaims[key];
+    Logger.debug(
+      () => `Checking key ${key} for operator type ${type}, attestation value: ${attestationValue}, policyValue: ${operator.threshold}`,
+      logContext
+    );
+    if (attestationValue === undefined) {
       return ServiceResult.Failed<string>(
-        { errorMessage: "Missing key release policy" },
-        500,
+        {
+          errorMessage: `Missing claim in attestation: ${key} for operator type ${type}`,
+        },
+        400,
         logContext,
       );
     }
-    if (attestationClaims === null || attestationClaims === undefined) {
+    if (operator.error !== undefined) {
       return ServiceResult.Failed<string>(
-        { errorMessage: "Missing attestation claims" },
-        500,
+        { errorMessage: operator.error.errorMessage },
+        operator.error.statusCode,
         logContext,
       );
     }
-    const gte = type === "gte";
-    for (let inx = 0; inx < Object.keys(keyReleasePolicyClaims).length; inx++) {
-      const key = Object.keys(keyReleasePolicyClaims)[inx];
 
-      // check if key is in attestation
-      let attestationValue = attestationClaims[key];
-      let policyValue = keyReleasePolicyClaims[key];
-      const isUndefined = typeof attestationValue === "undefined";
-      Logger.debug(
-        `Checking key ${key}, typeof attestationValue: ${typeof attestationValue}, isUndefined: ${isUndefined}, attestation value: ${attestationValue}, policyValue: ${policyValue}`,
-        logContext
-      );
-      if (isUndefined) {
-        return ServiceResult.Failed<string>(
-          {
-            errorMessage: `Missing claim in attestation: ${key} for operator type ${type}`,
-          },
-          400,
-          logContext,
-        );
-      }
-      if (policyValue === null || policyValue === undefined) {
-        return ServiceResult.Failed<string>(
-          {
-            errorMessage: `Missing policy value for claim ${key} for operator type ${type}`,
-          },
-          500,
-          logContext,
-        );
-      }
-      if (
-        typeof policyValue !== "number" &&
-        (typeof policyValue !== "string" || isNaN(parseFloat(policyValue)))
-      ) {
-        return ServiceResult.Failed<string>(
-          {
-            errorMessage: `Policy value for claim ${key} is not a number or a string representing a number for operator type ${type}`,
-          },
-          400,
-          logContext,
-        );
-      }
-
-      if (typeof policyValue !== "number") {
-        policyValue = parseFloat(policyValue);
-      }
+    const policyValue = operator.threshold as number;
+    if (typeof attestationValue !== "number") {
+      attestationValue = parseFloat(attestationValue);
+    }
 
-      if (typeof policyValue !== "number") {
+    if (type === "gte") {
+      if (attestationValue >= policyValue === false) {
         return ServiceResult.Failed<string>(
           {
-            errorMessage: `Policy value for claim ${key} is not a number or a string representing a number for operator type ${type} after conversion`,
+            errorMessage: `Attestation claim ${key}, value ${attestationValue} is not greater than or equal to policy value ${policyValue}`,
           },
           400,
           logContext,
         );
       }
-
-      if (typeof attestationValue !== "number") {
-        attestationValue = parseFloat(attestationValue);
-      }
-
-      if (gte) {
-        Logger.debug(
-          `Checking if attestation value ${attestationValue} is greater than or equal to policy value ${policyValue}`,
-          logContext,
-        );
-        if (attestationValue >= policyValue === false) {
-          return ServiceResult.Failed<string>(
-            {
-              errorMessage: `Attestation claim ${key}, value ${attestationValue} is not greater than or equal to policy value ${policyValue}`,
-            },
-            400,
-            logContext,
-          );
-        }
-      } else {
-        Logger.debug(
-          `Checking if attestation value ${attestationValue} is greater than policy value ${policyValue}`,
-          logContext,
-        );
-        if (attestationValue > policyValue === false) {
-          return ServiceResult.Failed<string>(
-            {
-              errorMessage: `Attestation claim ${key}, value ${attestationValue} is not greater than policy value ${policyValue}`,
-            },
-            400,
-            logContext
-          );
-        }
-      }
+    } else if (attestationValue > policyValue === false) {
+      return ServiceResult.Failed<string>(
+        {
+          errorMessage: `Attestation claim ${key}, value ${attestationValue} is not greater than policy value ${policyValue}`,
+        },
+        400,
+        logContext
+      );
     }
-    return ServiceResult.Succeeded<IAttestationReport>(attestationClaims, logContext);
+    return undefined;
   }
 
   public static validateKeyReleasePolicy(
@@ -197,53 +254,56 @@ export class KeyReleasePolicy implements IKeyReleasePolicy {
     attestationClaims: IAttestationReport,
     logContextIn?: LogContext,
   ): ServiceResult<string | IAttestationReport> {
-    const logContext = (logContextIn?.clone() || new LogContext()).appendScope("validateKeyReleasePolicy");
-    // claims are mandatory
-    if (Object.keys(keyReleasePolicy.claims).length === 0) {
-      return ServiceResult.Failed<string>(
-        {
-          errorMessage:
-            "The claims in the key release policy are missing. Please propose a new key release policy",
-        },
-        400,
-        logContext,
-      );
-    }
+    return KeyReleasePolicy.evaluate(
+      KeyReleasePolicy.compile(keyReleasePolicy),
+      attestationClaims,
+      logContextIn,
+    );
+  }
 
-    // Check claims
-    let policyValidationResult =
-      KeyReleasePolicy.validateKeyReleasePolicyClaims(
-        keyReleasePolicy.claims,
-        attestationClaims,
-        logContext
-      );
-    if (!policyValidationResult.success) {
-      return policyValidationResult;
-    }
+  /**
+   * Retrieves the compiled key release policy from a key release policy map.
+   * The policy is compiled again only when governance writes one of its entries.
+   * @param keyReleasePolicyMap - The key release policy map.
+   * @returns The compiled key release policy.
+   */
+  public static getCompiledKeyReleasePolicyFromMap(
+    keyReleasePolicyMap: ccfapp.KvMap,
+    logContextIn?: LogContext,
+  ): ICompiledKeyReleasePolicy {
+    const logContext = logContextIn || new LogContext();
+    return logContext.withScope("getCompiledKeyReleasePolicyFromMap", () =>
+      KeyReleasePolicy.cache.get(
+        KeyReleasePolicy.policyVersion(keyReleasePolicyMap),
+        () =>
+          KeyReleasePolicy.compile(
+            KeyReleasePolicy.getKeyReleasePolicyFromMap(keyReleasePolicyMap, logContext),
+          ),
+        logContext,
+      ),
+    );
+  }
 
-    // Check operators gte and gt
-    if (keyReleasePolicy.gte !== null && keyReleasePolicy.gte !== undefined) {
-      Logger.debug(`Validating gte operator`, logContext, keyReleasePolicy.gte);
-      policyValidationResult =
-        KeyReleasePolicy.validateKeyReleasePolicyOperators(
-          "gte",
-          keyReleasePolicy.gte,
-          attestationClaims,
-          logContext
-        );
-    }
-    if (keyReleasePolicy.gt !== null && keyReleasePolicy.gt !== undefined) {
-      Logger.debug(`Validating gt operator`, logContext, keyReleasePolicy.gt);
-      policyValidationResult =
-        KeyReleasePolicy.validateKeyReleasePolicyOperators(
-          "gt",
-          keyReleasePolicy.gt,
-          attestationClaims,
-          logContext
-        );
+  // The governance actions only ever set the policy entries, so the latest write wins
+  private static policyVersion(
+    keyReleasePolicyMap: ccfapp.KvMap,
+  ): number | undefined {
+    const claimsVersion = PolicyCache.versionOf(
+      keyReleasePolicyMap,
+      ccf.strToBuf("claims"),
+    );
+    if (claimsVersion === undefined) {
+      return undefined;
     }
-
-    return policyValidationResult;
+    return POLICY_KEYS.reduce((version, kvKey) => {
+      const keyVersion = PolicyCache.versionOf(
+        keyReleasePolicyMap,
+        ccf.strToBuf(kvKey),
+      );
+      return keyVersion !== undefined && keyVersion > version
+        ? keyVersion
+        : version;
+    }, claimsVersion);
   }
 
   /**
@@ -5,6 +5,7 @@ import { Logger, LogContext } from "../utils/Logger";
 import { KmsError } from "../utils/KmsError";
 import { IKeyItem } from "../endpoints/IKeyItem";
 import { enableEndpoint } from "../utils/Tooling";
+import { PolicyCache } from "../repositories/PolicyCache";
 
 
 // Enable the endpoint
@@ -35,6 +36,14 @@ export class KeyRotationPolicy {
     "KeyRotationPolicy"
   );
 
+  /**
+   * The parsed key rotation policy, cached per KV version.
+   * @private
+   */
+  private static readonly cache = new PolicyCache<IKeyRotationPolicy | undefined>(
+    "KeyRotationPolicy"
+  );
+
   /**
    * Logs the key rotation policy settings.
    * @param keyRotationPolicy - The key rotation policy to log.
@@ -56,6 +65,7 @@ export class KeyRotationPolicy {
    * Loads the key rotation from the key rotation policy map.
    * If a key rotation policy is found, it is parsed and returned as an instance of `KeyRotationPolicy`.
    * If no key rotation policy is found, default key rotation policy are used.
+   * The parsed policy is cached until governance writes a new version of the policy.
    * @param keyRotationPolicyMap - The map containing the key rotation policy.
    * @param logContextIn - The log context to use.
    * @returns A new KeyRotationPolicy instance.
@@ -65,40 +75,44 @@ export class KeyRotationPolicy {
     keyRotationPolicyMap: ccfapp.KvMap,
     logContextIn: LogContext
   ): IKeyRotationPolicy | undefined {
-    const logContext = (logContextIn?.clone() || new LogContext()).appendScope(
-      "loadKeyRotationPolicyFromMap"
-    );
-
-    // Load the key rotation from the map
-    const key = "key_rotation_policy"; // Ensure the key matches the stored key in governance
-    const keyBuf = ccf.strToBuf(key);
-
-    const keyRotationPolicy = keyRotationPolicyMap.get(keyBuf);
-    const keyRotationPolicyStr = keyRotationPolicy
-      ? ccf.bufToStr(keyRotationPolicy)
-      : undefined;
-    Logger.debug(
-      `Loading key rotation policy: ${keyRotationPolicyStr}`,
-      logContext
-    );
-
-    let keyRotation: IKeyRotationPolicy;
-    if (!keyRotationPolicyStr) {
-      Logger.info(
-        `No key rotation policy found`,
-        logContext
-      );
-      return undefined;
-    } else {
-      try {
-        keyRotation = JSON.parse(keyRotationPolicyStr) as IKeyRotationPolicy;
-      } catch {
-        const error = `Failed to parse key rotation policy: ${keyRotationPolicyStr}`;
-        Logger.error(error, logContext);
-        throw new KmsError(error, logContext);
+    return (logContextIn || new LogContext()).withScope(
+      "loadKeyRotationPolicyFromMap",
+      (logContext) => {
+        // Load the key rotation from the map
+        const key = "key_rotation_policy"; // Ensure the key matches the stored key in governance
+        const keyBuf = ccf.strToBuf(key);
+
+        return KeyRotationPolicy.cache.get(
+          PolicyCache.versionOf(keyRotationPolicyMap, keyBuf),
+          () => {
+            const keyRotationPolicy = keyRotationPolicyMap.get(keyBuf);
+            const keyRotationPolicyStr = keyRotationPolicy
+              ? ccf.bufToStr(keyRotationPolicy)
+              : undefined;
+            Logger.debug(
+              `Loading key rotation policy: ${keyRotationPolicyStr}`,
+              logContext
+            );
+
+            if (!keyRotationPolicyStr) {
+              Logger.info(
+                `No key rotation policy found`,
+                logContext
+              );
+              return undefined;
+            }
+            try {
+              return JSON.parse(keyRotationPolicyStr) as IKeyRotationPolicy;
+            } catch {
+              const error = `Failed to parse key rotation policy: ${keyRotationPolicyStr}`;
+              Logger.error(error, logContext);
+              throw new KmsError(error, logContext);
+            }
+          },
+          logContext
+        );
       }
-    }
-    return keyRotation;
+    );
   }
 
   /**
@@ -121,7 +135,7 @@ export class KeyRotationPolicy {
     if (keyRotation !== undefined) {
       const gracePeriodSeconds = keyRotation.grace_period_seconds;
       const rotationIntervalSeconds = keyRotation.rotation_interval_seconds;
-      Logger.info(`Key rotation policy content: ${JSON.stringify(keyRotation)}`, logContextIn);
+      Logger.debug(() => `Key rotation policy content: ${JSON.stringify(keyRotation)}`, logContextIn);
 
       // Get the current time using TrustedTime
       const currentTime = Date.now();
@@ -133,7 +147,7 @@ export class KeyRotationPolicy {
       const expiryTimeMs = creationTimeMs + (rotationIntervalSeconds * 1000);
       const expiryTimeAndGraceMs = expiryTimeMs + (gracePeriodSeconds * 1000);
 
-      Logger.info(`Key rotation policy Creation time: ${new Date(creationTimeMs)}, Current Time: ${new Date(currentTime)}, delta (ms): ${currentTime - creationTimeMs}, expiryTimeMs (${expiryTimeMs}): ${new Date(expiryTimeMs)}, expiryTimeAndGraceMs (${expiryTimeAndGraceMs}): ${new Date(expiryTimeAndGraceMs)}`);
+      Logger.debug(() => `Key rotation policy Creation time: ${new Date(creationTimeMs)}, Current Time: ${new Date(currentTime)}, delta (ms): ${currentTime - creationTimeMs}, expiryTimeMs (${expiryTimeMs}): ${new Date(expiryTimeMs)}, expiryTimeAndGraceMs (${expiryTimeAndGraceMs}): ${new Date(expiryTimeAndGraceMs)}`, logContextIn);
       return {expiryTimeMs, expiryTimeAndGraceMs};
     } else {
       Logger.info(`Key rotation policy is not defined, cannot calculate expiry time`, logContextIn);
@@ -141,6 +155,30 @@ export class KeyRotationPolicy {
     }
   }
 
+  /**
+   * Calculates how long clients may cache a public key.
+   * Clients must not keep a key past its expiry and should revalidate at least once per grace period.
+   * @param keyRotationPolicyMap - The map containing the key rotation policy.
+   * @param keyItemCreationTime - The creation time of the key item in milliseconds.
+   * @param logContextIn - The log context to use.
+   * @returns The max age in seconds, or undefined if no key rotation policy is defined.
+   */
+  public static getCacheMaxAgeSeconds(
+    keyRotationPolicyMap: ccfapp.KvMap,
+    keyItemCreationTime: number,
+    logContextIn: LogContext): number | undefined {
+
+    const expiryTimes = KeyRotationPolicy.getKeyItemExpiryTime(keyRotationPolicyMap, keyItemCreationTime, logContextIn);
+    if (!expiryTimes) {
+      return undefined;
+    }
+
+    const untilExpirySeconds = Math.floor((expiryTimes.expiryTimeMs - Date.now()) / 1000);
+    const gracePeriodSeconds = Math.floor((expiryTimes.expiryTimeAndGraceMs - expiryTimes.expiryTimeMs) / 1000);
+    const maxAgeSeconds = gracePeriodSeconds > 0 ? Math.min(untilExpirySeconds, gracePeriodSeconds) : untilExpirySeconds;
+    return Math.max(0, maxAgeSeconds);
+  }
+
   /**
    *
    * @param keyRotationPolicyMap  - The map containing the key rotation policy.
@@ -5,6 +5,7 @@ import * as ccfapp from "@microsoft/ccf-app";
 import { ccf } from "@microsoft/ccf-app/global";
 import { Logger, LogContext } from "../utils/Logger";
 import { KmsError } from "../utils/KmsError";
+import { PolicyCache } from "../repositories/PolicyCache";
 
 export interface IService {
   name: string;
@@ -24,6 +25,7 @@ export class Settings {
    */
   constructor(public settings: ISettings) { }
   private static readonly logContext = new LogContext().appendScope("Settings");
+  private static readonly cache = new PolicyCache<ISettings>("Settings");
 
   /**
    * Returns the default settings for the Key Management Service.
@@ -55,6 +57,7 @@ export class Settings {
    * Loads the settings from the settings policy map.
    * If a settings policy is found, it is parsed and returned as an instance of `Settings`.
    * If no settings policy is found, default settings are used.
+   * The parsed settings are cached until governance writes a new version of the policy.
    * @returns An instance of `Settings` containing the loaded settings.
    * @throws Error if the settings policy map is not found or if there is an error parsing the settings policy.
    */
@@ -62,32 +65,34 @@ export class Settings {
     settingsPolicyMap: ccfapp.KvMap,
     logContextIn: LogContext,
   ): Settings {
-    const logContext = (logContextIn?.clone() || new LogContext()).appendScope("loadSettingsFromMap");
+    return (logContextIn || new LogContext()).withScope("loadSettingsFromMap", (logContext) => {
+      // Load the settings from the map
+      const key = "settings_policy"; // Ensure the key matches the stored key in governance
+      const keyBuf = ccf.strToBuf(key);
 
-    Logger.info(`Loading settings from map: ${settingsPolicyMap === undefined ? "undefined" : JSON.stringify(settingsPolicyMap)}`, logContext);
+      const settings = Settings.cache.get(
+        PolicyCache.versionOf(settingsPolicyMap, keyBuf),
+        () => {
+          Logger.info(`Loading settings from map`, logContext);
+          const settingsPolicy = settingsPolicyMap.get(keyBuf);
+          const settingsPolicyStr = settingsPolicy ? ccf.bufToStr(settingsPolicy) : undefined;
+          Logger.debug(`Loading settings: ${settingsPolicyStr}`, logContext);
 
-    // Load the settings from the map
-    const key = "settings_policy"; // Ensure the key matches the stored key in governance
-    const keyBuf = ccf.strToBuf(key);
-
-    const settingsPolicy = settingsPolicyMap.get(keyBuf);
-    const settingsPolicyStr = settingsPolicy ? ccf.bufToStr(settingsPolicy) : undefined;
-    Logger.debug(`Loading settings: ${settingsPolicyStr}`, logContext);
-
-
-    let settings: ISettings;
-    if (!settingsPolicyStr) {
-      Logger.warn(`No settings policy found, using default settings`, logContext);
-      settings = Settings.defaultSettings();
-    } else {
-      try {
-        settings = JSON.parse(settingsPolicyStr) as ISettings;
-      } catch {
-        const error = `Failed to parse settings policy: ${settingsPolicyStr}`;
-        Logger.error(error, logContext);
-        throw new KmsError(error, logContext);
-      }
-    }
-    return new Settings(settings);
+          if (!settingsPolicyStr) {
+            Logger.warn(`No settings policy found, using default settings`, logContext);
+            return Settings.defaultSettings();
+          }
+          try {
+            return JSON.parse(settingsPolicyStr) as ISettings;
+          } catch {
+            const error = `Failed to parse settings policy: ${settingsPolicyStr}`;
+            Logger.error(error, logContext);
+            throw new KmsError(error, logContext);
+          }
+        },
+        logContext,
+      );
+      return new Settings(settings);
+    });
   }
 }
@@ -0,0 +1,72 @@
+// Copyright (c) Microsoft Corporation.
+// Licensed under the MIT license.
+
+import * as ccfapp from "@microsoft/ccf-app";
+import { IKeyItem } from "../endpoints/IKeyItem";
+import { KeyRotationPolicy } from "../policies/KeyRotationPolicy";
+import { Logger, LogContext } from "../utils/Logger";
+import { KeyStore } from "./KeyStore";
+import { LastestItemStore } from "./LastestItemStore";
+import { PublicKeyView } from "./PublicKeyView";
+
+// Maximum number of keys deleted in one transaction
+const MAX_DELETED_KEYS = 32;
+
+/**
+ * Deletes keys that are past their expiry and grace period.
+ *
+ * Keys are activated in id order, so they expire in id order as well.
+ * Compaction starts at the oldest retained id and stops at the first key that is kept.
+ * The latest key is never deleted, so there is always a key to serve.
+ * Must be called in a read-write transaction.
+ */
+export class KeyRetention {
+  constructor(
+    private readonly keyIdMap: LastestItemStore<number, string>,
+    private readonly keysMap: KeyStore,
+    private readonly publicKeyView: PublicKeyView,
+    private readonly keyRotationPolicyMap: ccfapp.KvMap,
+  ) { }
+
+  /**
+   * Deletes the keys that are past their expiry and grace period.
+   * @param now - The current time in milliseconds.
+   * @param logContext - The log context to use.
+   * @returns The ids of the deleted keys.
+   */
+  public compact(now: number, logContext: LogContext): number[] {
+    const deleted: number[] = [];
+    const latestId = this.keyIdMap.latestId;
+    let id = this.keyIdMap.oldestId;
+    while (id < latestId && deleted.length < MAX_DELETED_KEYS) {
+      const kid = this.keyIdMap.store.get(id);
+      const keyItem =
+        kid === undefined ? undefined : (this.keysMap.store.get(kid) as IKeyItem);
+      if (kid !== undefined && keyItem !== undefined) {
+        const expiryTimes = KeyRotationPolicy.getKeyItemExpiryTime(
+          this.keyRotationPolicyMap,
+          keyItem.timestamp!,
+          logContext,
+        );
+        if (expiryTimes === undefined || now <= expiryTimes.expiryTimeAndGraceMs) {
+          break;
+        }
+        this.keysMap.deleteItem(kid);
+        this.publicKeyView.deleteItem(id, kid);
+      }
+      this.keyIdMap.deleteItem(id);
+      if (kid !== undefined) {
+        deleted.push(id);
+      }
+      id++;
+    }
+
+    if (deleted.length > 0) {
+      Logger.info(
+        `Deleted ${deleted.length} keys past their grace period, oldest retained id: ${this.keyIdMap.oldestId}`,
+        logContext,
+      );
+    }
+    return deleted;
+  }
+}
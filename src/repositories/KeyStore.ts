@@ -4,10 +4,12 @@
 import * as ccfapp from "@microsoft/ccf-app";
 import { ccf } from "@microsoft/ccf-app/global";
 import { IKeyItem, IWrapKey } from "../endpoints/IKeyItem";
-import { Logger } from "../utils/Logger";
+import { Logger, LogContext } from "../utils/Logger";
+import { ReceiptStore } from "./ReceiptStore";
 
 export class KeyStore {
   private _store;
+  private readonly receipts = new ReceiptStore();
 
   // Create an instance of the class KeyStore
   constructor(public nameOfMap: string) {
@@ -24,49 +26,43 @@ export class KeyStore {
   }
 
   // Store key item with claims digest in the map
-  public storeItem(id: string, item: IKeyItem | IWrapKey, claims: string) {
+  public storeItem(id: string, item: IKeyItem | IWrapKey, claims?: string) {
     // Add claim digest using public key
-    const claims_digest = ccf.crypto.digest("SHA-256", ccf.strToBuf(claims));
-    ccf.rpc.setClaimsDigest(claims_digest);
+    if (claims) {
+      const claims_digest = ccf.crypto.digest("SHA-256", ccf.strToBuf(claims));
+      ccf.rpc.setClaimsDigest(claims_digest);
+    }
 
     this.store.set(id, item);
   }
 
-  public receipt(id: string) {
-    const calcVersion = (id: string) => {
-      const buf = new Uint8Array(ccf.strToBuf(id));
-      const len = 8;
-      let identifier = 0;
-      for (let inx = 0; inx < len; inx++) {
-        identifier >>= 8;
-        identifier += buf[inx];
-      }
-
-      Logger.debug(`Calculated version: ${identifier}`);
-      return identifier;
-    };
+  // Delete the item with key id and release its receipt
+  public deleteItem(id: string) {
+    const version = this.store.getVersionOfPreviousWrite(id);
+    this.store.delete(id);
+    if (version !== undefined) {
+      this.receipts.evict(id, version);
+    }
+  }
 
+  // Get the receipt of the item with key id, undefined while it is loading
+  public receipt(id: string, logContext?: LogContext) {
     const version = this.store.getVersionOfPreviousWrite(id);
     if (version === undefined) {
       Logger.debug(
         `version for id ${id} is undefined: ${JSON.stringify(version)}`,
+        logContext,
       );
       return undefined;
     }
 
-    Logger.debug(`version for id ${id}: ${JSON.stringify(version)}`);
-    const states = ccf.historical.getStateRange(
-      calcVersion(id),
-      version,
-      version,
-      1800,
-    );
-    if (states !== null) {
-      const ret = JSON.stringify(states[0].receipt);
-      Logger.debug(`Receipt: ${ret}`);
-      return ret;
-    }
-    return undefined;
+    Logger.debug(`version for id ${id}: ${JSON.stringify(version)}`, logContext);
+    return this.receiptOfWrite(id, version, logContext);
+  }
+
+  // Get the receipt of the transaction with the given seqno that stored the item with key id
+  public receiptOfWrite(id: string, seqno: number, logContext?: LogContext) {
+    return this.receipts.get(id, seqno, logContext);
   }
 
   // Get the transaction version of the item with key id
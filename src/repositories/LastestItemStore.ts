@@ -3,14 +3,31 @@
 
 import * as ccfapp from "@microsoft/ccf-app";
 import { ccf } from "@microsoft/ccf-app/global";
-import { Logger } from "../utils/Logger";
 
+// Keys of the pointer map
+const LATEST_ID = 0;
+const OLDEST_ID = 1;
+
+/**
+ * Store of items keyed by a sequential id.
+ *
+ * The ids of the latest and the oldest retained item are kept in a pointer map,
+ * so old items can be deleted. Stores written before the pointers existed
+ * have dense ids starting at 1, so the size is the latest id. Their pointers
+ * are written by the first write, before a delete makes the size smaller.
+ */
 export class LastestItemStore<K extends number, T> {
   private _store;
+  private _pointers;
 
   // Create an instance of the class LastestItemStore
   constructor(public nameOfMap: string) {
     this._store = ccfapp.typedKv(nameOfMap, ccfapp.uint32, ccfapp.json<T>());
+    this._pointers = ccfapp.typedKv(
+      `${nameOfMap}.pointers`,
+      ccfapp.uint32,
+      ccfapp.uint32,
+    );
   }
 
   // Get the store
@@ -18,14 +35,24 @@ export class LastestItemStore<K extends number, T> {
     return this._store;
   }
 
-  // Get the size of the store
+  // Get the number of items in the store
   public get size(): number {
     return this._store.size;
   }
 
+  // Get the id of the latest item, 0 if the store is empty
+  public get latestId(): number {
+    return this._pointers.get(LATEST_ID) ?? this._store.size;
+  }
+
+  // Get the id of the oldest retained item
+  public get oldestId(): number {
+    return this._pointers.get(OLDEST_ID) ?? 1;
+  }
+
   // Get the latest item in the store
   public latestItem(): [number, T | undefined] {
-    const id = this._store.size;
+    const id = this.latestId;
     if (id <= 0) {
       return [id, undefined];
     }
@@ -33,6 +60,16 @@ export class LastestItemStore<K extends number, T> {
     return [id, item];
   }
 
+  // Write the pointers of a store written before they existed
+  private migratePointers() {
+    if (!this._pointers.has(LATEST_ID)) {
+      this._pointers.set(LATEST_ID, this._store.size);
+    }
+    if (!this._pointers.has(OLDEST_ID)) {
+      this._pointers.set(OLDEST_ID, 1);
+    }
+  }
+
   // Store key item with claims digest in the map
   public storeItem(id: K, item: T, claims?: string) {
     // Add claim digest using public key
@@ -41,26 +78,21 @@ export class LastestItemStore<K extends number, T> {
       ccf.rpc.setClaimsDigest(claims_digest);
     }
 
+    this.migratePointers();
+    const latestId = this.latestId;
     this.store.set(id, item);
-  }
-
-  public receipt(id: K) {
-    const version = this.store.getVersionOfPreviousWrite(id);
-    if (version === undefined) {
-      Logger.debug(
-        `version for id ${id} is undefined: ${JSON.stringify(version)}`,
-      );
-      return undefined;
+    if (id > latestId) {
+      this._pointers.set(LATEST_ID, id);
     }
+  }
 
-    Logger.debug(`version for id ${id}: ${JSON.stringify(version)}`);
-    const states = ccf.historical.getStateRange(id, version, version, 1800);
-    if (states !== null) {
-      const ret = JSON.stringify(states[0].receipt);
-      Logger.debug(`Receipt: ${ret}`);
-      return ret;
+  // Delete the item with key id and move the oldest pointer past it
+  public deleteItem(id: K) {
+    this.migratePointers();
+    this.store.delete(id);
+    if (id >= this.oldestId) {
+      this._pointers.set(OLDEST_ID, id + 1);
     }
-    return undefined;
   }
 
   // Get the transaction version of the item with key id
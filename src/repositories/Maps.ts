@@ -4,11 +4,15 @@
 import { ccf } from "@microsoft/ccf-app/global";
 import { LastestItemStore } from "./LastestItemStore";
 import { KeyStore } from "./KeyStore";
+import { PublicKeyView } from "./PublicKeyView";
+import { KeyRetention } from "./KeyRetention";
+import { ProposalStore } from "./ProposalStore";
 
 //#region KMS Stores
 // Stores
 export const hpkeKeysMap = new KeyStore("HpkeKeys");
 export const hpkeKeyIdMap = new LastestItemStore<number, string>("HpkeKeyids");
+export const hpkePublicKeyView = new PublicKeyView("public:HpkePublicKeys");
 export const keyReleaseMapName = "public:policies.key_release";
 export const keyReleasePolicyMap = ccf.kv[keyReleaseMapName];
 export const settingsMapName = "public:policies.settings";
@@ -17,4 +21,16 @@ export const keyRotationMapName = "public:policies.key_rotation";
 export const keyRotationPolicyMap = ccf.kv[keyRotationMapName];
 export const proposalsMapName = "public:proposals";
 export const proposalsPolicyMap = ccf.kv[proposalsMapName];
+export const proposalStore = new ProposalStore(
+  proposalsPolicyMap,
+  `${proposalsMapName}.index`,
+);
 //#endregion
+
+// Deletes the keys past their expiry and grace period
+export const keyRetention = new KeyRetention(
+  hpkeKeyIdMap,
+  hpkeKeysMap,
+  hpkePublicKeyView,
+  keyRotationPolicyMap,
+);
@@ -0,0 +1,70 @@
+// Copyright (c) Microsoft Corporation.
+// Licensed under the MIT license.
+
+import * as ccfapp from "@microsoft/ccf-app";
+import { Logger, LogContext } from "../utils/Logger";
+
+/**
+ * In-memory cache for a value derived from a KV policy entry.
+ *
+ * The cached value is keyed on the KV version of the entry it was derived from.
+ * The cache lives as long as the JS interpreter. The app endpoints share reused
+ * interpreters (interpreter_reuse in app.json), so a policy is parsed once per
+ * interpreter and parsed again as soon as governance writes a new version.
+ */
+export class PolicyCache<T> {
+  private version?: number;
+  private value?: T;
+
+  constructor(public readonly name: string) { }
+
+  /**
+   * Gets the version of the last write to a key in a KV map.
+   * @param kvMap - The map holding the policy.
+   * @param keyBuf - The key of the policy entry.
+   * @returns The version of the entry, or undefined if it was never written.
+   */
+  public static versionOf(
+    kvMap: ccfapp.KvMap,
+    keyBuf: ArrayBuffer,
+  ): number | undefined {
+    return kvMap.getVersionOfPreviousWrite(keyBuf);
+  }
+
+  /**
+   * Returns the cached value if it was derived from the given version, otherwise loads it.
+   * Values with an unknown version are never cached.
+   * @param version - The current KV version of the policy entry.
+   * @param load - Loads the value from the KV. Errors are propagated and not cached.
+   * @param logContext - The log context to use.
+   * @returns The value for the given version.
+   */
+  public get(
+    version: number | undefined,
+    load: () => T,
+    logContext?: LogContext,
+  ): T {
+    if (version !== undefined && version === this.version) {
+      Logger.debug(`${this.name} cache hit for version ${version}`, logContext);
+      return this.value as T;
+    }
+
+    const value = load();
+    if (version !== undefined) {
+      Logger.debug(`${this.name} cached for version ${version}`, logContext);
+      this.version = version;
+      this.value = value;
+    } else {
+      this.invalidate();
+    }
+    return value;
+  }
+
+  /**
+   * Drops the cached value.
+   */
+  public invalidate(): void {
+    this.version = undefined;
+    this.value = undefined;
+  }
+}
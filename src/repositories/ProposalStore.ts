@@ -0,0 +1,168 @@
+// Copyright (c) Microsoft Corporation.
+// Licensed under the MIT license.
+
+import * as ccfapp from "@microsoft/ccf-app";
+import { getCoseProtectedHeader } from "../utils/cose";
+import { arrayBufferToHex, hexToArrayBuffer } from "../utils/Tooling";
+import { LastestItemStore } from "./LastestItemStore";
+
+// Protected header holding the creation time of a proposal
+export const CREATED_AT_HEADER = "ccf.gov.msg.created_at";
+
+// Entry of the proposal index
+export interface IProposalIndexItem {
+  // SHA-256 of the proposal, the key of the proposal map, hex encoded
+  proposalId: string;
+  // Creation time from the protected header of the proposal
+  createdAt: number;
+}
+
+// An accepted proposal with its position in the index
+export interface IIndexedProposal {
+  seqno: number;
+  proposal: ArrayBuffer;
+}
+
+/**
+ * Store of the accepted COSE_Sign1 proposals.
+ *
+ * The raw proposals are kept in the proposal map for auditing. Next to it an index
+ * keyed by a sequential number lists the proposals in acceptance order with their
+ * creation time, so the latest creation time is the replay watermark and the oldest
+ * entries are trimmed without decoding any stored proposal.
+ *
+ * Proposals accepted before the index existed are indexed by the next write.
+ */
+export class ProposalStore {
+  private _index: LastestItemStore<number, IProposalIndexItem>;
+
+  // Create an instance of the class ProposalStore
+  constructor(
+    private readonly proposalsMap: ccfapp.KvMap,
+    nameOfIndex: string,
+  ) {
+    this._index = new LastestItemStore<number, IProposalIndexItem>(nameOfIndex);
+  }
+
+  // Get the index of the proposals
+  public get index(): LastestItemStore<number, IProposalIndexItem> {
+    return this._index;
+  }
+
+  /**
+   * Gets the creation time of the last accepted proposal.
+   * @returns The creation time, or undefined if no proposal was accepted.
+   */
+  public watermark(): number | undefined {
+    const [_, latest] = this._index.latestItem();
+    if (latest !== undefined) {
+      return latest.createdAt;
+    }
+    const legacy = this.legacyIndex();
+    return legacy.length > 0 ? legacy[legacy.length - 1].createdAt : undefined;
+  }
+
+  /**
+   * Stores an accepted proposal and trims the index to the retained proposals.
+   * Must be called in a read-write transaction.
+   * @param proposalId - The SHA-256 of the proposal.
+   * @param proposal - The raw COSE_Sign1 proposal.
+   * @param createdAt - The creation time of the proposal.
+   * @param proposalsToKeep - The number of proposals to retain.
+   */
+  public storeProposal(
+    proposalId: ArrayBuffer,
+    proposal: ArrayBuffer,
+    createdAt: number,
+    proposalsToKeep: number,
+  ): void {
+    this.migrateLegacyProposals();
+
+    // A resubmitted proposal keeps its place in the index
+    if (!this.proposalsMap.has(proposalId)) {
+      this._index.storeItem(this._index.latestId + 1, {
+        proposalId: arrayBufferToHex(proposalId),
+        createdAt,
+      });
+    }
+    this.proposalsMap.set(proposalId, proposal);
+
+    const latestId = this._index.latestId;
+    for (
+      let seqno = this._index.oldestId;
+      seqno <= latestId - proposalsToKeep;
+      seqno++
+    ) {
+      const item = this._index.store.get(seqno);
+      if (item !== undefined) {
+        this.proposalsMap.delete(hexToArrayBuffer(item.proposalId));
+      }
+      this._index.deleteItem(seqno);
+    }
+  }
+
+  /**
+   * Lists the accepted proposals in acceptance order.
+   * @param since - Only proposals with a larger sequence number are returned.
+   * @param limit - The maximum number of proposals to return.
+   * @returns The proposals with their sequence numbers.
+   */
+  public list(since: number, limit: number): IIndexedProposal[] {
+    const proposals: IIndexedProposal[] = [];
+    const latestId = this._index.latestId;
+    if (latestId === 0) {
+      // Not indexed yet, only possible before the first proposal of a new version
+      this.legacyIndex().forEach((item, index) => {
+        const seqno = index + 1;
+        if (seqno > since && proposals.length < limit) {
+          proposals.push({
+            seqno,
+            proposal: this.proposalsMap.get(hexToArrayBuffer(item.proposalId))!,
+          });
+        }
+      });
+      return proposals;
+    }
+
+    for (
+      let seqno = Math.max(since + 1, this._index.oldestId);
+      seqno <= latestId && proposals.length < limit;
+      seqno++
+    ) {
+      const item = this._index.store.get(seqno);
+      const proposal =
+        item === undefined
+          ? undefined
+          : this.proposalsMap.get(hexToArrayBuffer(item.proposalId));
+      if (proposal !== undefined) {
+        proposals.push({ seqno, proposal });
+      }
+    }
+    return proposals;
+  }
+
+  // Index the proposals accepted before the index existed, oldest first
+  private migrateLegacyProposals(): void {
+    if (this._index.latestId > 0) {
+      return;
+    }
+    this.legacyIndex().forEach((item, index) => {
+      this._index.storeItem(index + 1, item);
+    });
+  }
+
+  // Build the index entries of the stored proposals by decoding them
+  private legacyIndex(): IProposalIndexItem[] {
+    const items: IProposalIndexItem[] = [];
+    if (this._index.latestId > 0) {
+      return items;
+    }
+    this.proposalsMap.forEach((proposal, proposalId) => {
+      items.push({
+        proposalId: arrayBufferToHex(proposalId),
+        createdAt: getCoseProtectedHeader(proposal)[CREATED_AT_HEADER],
+      });
+    });
+    return items.sort((a, b) => a.createdAt - b.createdAt);
+  }
+}
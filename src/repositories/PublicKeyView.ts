@@ -0,0 +1,183 @@
+// Copyright (c) Microsoft Corporation.
+// Licensed under the MIT license.
+
+import * as ccfapp from "@microsoft/ccf-app";
+import { IKeyItem } from "../endpoints/IKeyItem";
+import { TinkKey, TinkPublicKey } from "../endpoints/TinkKey";
+
+// Serialized public forms of a key, ready to be returned by the public key endpoints
+export interface IPublicKeyViewItem {
+  // Sequential id of the key, as used by the key id map
+  id: number;
+  kid: string;
+  timestamp: number;
+  // Public JWK without the private key and receipt
+  jwk: string;
+  // Key set with this key as primary, returned by /pubkey?fmt=tink
+  tinkKeySet: string;
+  // Entry of the key set returned by /listpubkeys
+  tinkPublicKey: string;
+}
+
+// The only key of the latest map
+const LATEST = 0;
+
+/**
+ * View of the public keys, written by /refresh so the read endpoints only copy strings.
+ *
+ * Items are stored in public maps and never contain private key material:
+ * - by sequential id, to list the keys in creation order
+ * - by kid, to serve /pubkey?kid=<kid> with one read
+ * - a single latest record, to serve /pubkey with one read
+ *
+ * All records of a key are written in the transaction that stores the key,
+ * so their KV version is the seqno of that transaction.
+ */
+export class PublicKeyView {
+  private _store;
+  private _byKid;
+  private _latest;
+
+  // Create an instance of the class PublicKeyView
+  constructor(public nameOfMap: string) {
+    this._store = ccfapp.typedKv(
+      nameOfMap,
+      ccfapp.uint32,
+      ccfapp.json<IPublicKeyViewItem>(),
+    );
+    this._byKid = ccfapp.typedKv(
+      `${nameOfMap}.by_kid`,
+      ccfapp.string,
+      ccfapp.json<IPublicKeyViewItem>(),
+    );
+    this._latest = ccfapp.typedKv(
+      `${nameOfMap}.latest`,
+      ccfapp.uint32,
+      ccfapp.json<IPublicKeyViewItem>(),
+    );
+  }
+
+  // Get the store keyed by sequential id
+  public get store(): ccfapp.TypedKvMap<number, IPublicKeyViewItem> {
+    return this._store;
+  }
+
+  // Build the view item of a key item
+  public static fromKeyItem(id: number, keyItem: IKeyItem): IPublicKeyViewItem {
+    const publicKey: IKeyItem = { ...keyItem };
+    delete publicKey.d;
+    delete publicKey.receipt;
+    return {
+      id,
+      kid: publicKey.kid!,
+      timestamp: publicKey.timestamp!,
+      jwk: JSON.stringify(publicKey),
+      tinkKeySet: new TinkKey([publicKey]).serialized(),
+      tinkPublicKey: JSON.stringify(new TinkPublicKey([publicKey]).get().keys[0]),
+    };
+  }
+
+  // Add a serialized receipt to a serialized JSON object
+  public static withReceipt(json: string, receipt: string): string {
+    return `${json.slice(0, -1)},"receipt":${JSON.stringify(receipt)}}`;
+  }
+
+  // Store the view items of a new key and make it the latest key
+  public storeItem(id: number, keyItem: IKeyItem): IPublicKeyViewItem {
+    const item = PublicKeyView.fromKeyItem(id, keyItem);
+    this._store.set(id, item);
+    this._byKid.set(item.kid, item);
+    this._latest.set(LATEST, item);
+    return item;
+  }
+
+  // Delete the view items of a key. The latest record is kept, the latest key is never deleted.
+  public deleteItem(id: number, kid: string): void {
+    this._store.delete(id);
+    this._byKid.delete(kid);
+  }
+
+  // Get the view item of the key with the given id
+  public get(id: number): IPublicKeyViewItem | undefined {
+    return this._store.get(id);
+  }
+
+  // Get the view item of the key with the given kid
+  public getByKid(kid: string): IPublicKeyViewItem | undefined {
+    return this._byKid.get(kid);
+  }
+
+  // Get the view item of the latest key
+  public latestItem(): IPublicKeyViewItem | undefined {
+    return this._latest.get(LATEST);
+  }
+
+  /**
+   * Finds the newest active key, skipping the pending keys of a refresh batch.
+   * Keys are activated in id order. Keys without a view item were created
+   * before refresh batches existed and are active.
+   * @param latestId - The sequential id of the newest key.
+   * @param now - The current time in milliseconds.
+   * @returns The id of the newest active key, or 0 if there is none, and the activation time of the next pending key.
+   */
+  public latestActiveId(
+    latestId: number,
+    now: number,
+  ): [number, number | undefined] {
+    let nextActivationTime: number | undefined;
+    let id = latestId;
+    while (id > 0) {
+      const item = this._store.get(id);
+      if (item === undefined || item.timestamp <= now) {
+        break;
+      }
+      nextActivationTime = item.timestamp;
+      id--;
+    }
+    return [id, nextActivationTime];
+  }
+
+  /**
+   * Finds the key that was active at a given time.
+   * Keys are activated in id order, so the ids form an index ordered by
+   * activation time and the key is found with a binary search.
+   * @param validAt - The time in milliseconds.
+   * @param oldestId - The sequential id of the oldest retained key.
+   * @param latestId - The sequential id of the newest key.
+   * @param timestampOf - Gets the activation time of a key, defaults to the view item.
+   * @returns The id of the newest key activated at or before validAt, or 0 if there is none.
+   */
+  public idValidAt(
+    validAt: number,
+    oldestId: number,
+    latestId: number,
+    timestampOf: (id: number) => number | undefined = (id) =>
+      this._store.get(id)?.timestamp,
+  ): number {
+    let low = Math.max(oldestId, 1);
+    let high = latestId;
+    let found = 0;
+    while (low <= high) {
+      const id = Math.floor((low + high) / 2);
+      // Keys without a timestamp were created before activation times existed
+      const timestamp = timestampOf(id) ?? 0;
+      if (timestamp <= validAt) {
+        found = id;
+        low = id + 1;
+      } else {
+        high = id - 1;
+      }
+    }
+    return found;
+  }
+
+  // Get the seqno of the transaction that stored the key with the given kid
+  public getVersionOfPreviousWrite(kid: string): number | undefined {
+    return this._byKid.getVersionOfPreviousWrite(kid);
+  }
+
+  // Get the seqno of the transaction that stored the latest key
+  public getVersionOfLatest(): number | undefined {
+    return this._latest.getVersionOfPreviousWrite(LATEST);
+  }
+}
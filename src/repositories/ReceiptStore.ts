@@ -0,0 +1,78 @@
+// Copyright (c) Microsoft Corporation.
+// Licensed under the MIT license.
+
+import { ccf } from "@microsoft/ccf-app/global";
+import { Logger, LogContext } from "../utils/Logger";
+import { LruCache } from "../utils/LruCache";
+
+// Maximum number of receipts kept in memory
+const RECEIPT_CACHE_SIZE = 256;
+
+// Seconds the host keeps a historical state after the last request for it
+const HISTORICAL_STATE_EXPIRY_SECONDS = 1800;
+
+/**
+ * Materialized receipts for items written to the KV.
+ *
+ * A receipt is fetched with a historical query for the transaction that wrote the item.
+ * The handle of the query is the seqno of that transaction, so all requests for the
+ * same write share one historical state on the host and distinct writes never collide.
+ * Loaded receipts are kept in a bounded in-memory store keyed by kid and seqno.
+ */
+export class ReceiptStore {
+  private readonly receipts: LruCache<string, string>;
+
+  constructor(maxEntries: number = RECEIPT_CACHE_SIZE) {
+    this.receipts = new LruCache<string, string>(maxEntries);
+  }
+
+  private static key(kid: string, seqno: number): string {
+    return `${kid}@${seqno}`;
+  }
+
+  /**
+   * Gets the receipt of the write of an item.
+   * @param kid - The kid of the item.
+   * @param seqno - The seqno of the transaction that wrote the item.
+   * @param logContext - The log context to use.
+   * @returns The receipt as a JSON string, or undefined if the historical state is still loading.
+   */
+  public get(
+    kid: string,
+    seqno: number,
+    logContext?: LogContext,
+  ): string | undefined {
+    const key = ReceiptStore.key(kid, seqno);
+    const cached = this.receipts.get(key);
+    if (cached !== undefined) {
+      Logger.debug(`Receipt for ${key} served from memory`, logContext);
+      return cached;
+    }
+
+    const states = ccf.historical.getStateRange(
+      seqno,
+      seqno,
+      seqno,
+      HISTORICAL_STATE_EXPIRY_SECONDS,
+    );
+    if (states === null || states.length === 0) {
+      Logger.debug(`Receipt for ${key} is loading`, logContext);
+      return undefined;
+    }
+
+    const receipt = JSON.stringify(states[0].receipt);
+    Logger.debug(() => `Receipt for ${key}: ${receipt}`, logContext);
+    this.receipts.set(key, receipt);
+    return receipt;
+  }
+
+  /**
+   * Removes a receipt from memory and releases its historical state on the host.
+   * @param kid - The kid of the item.
+   * @param seqno - The seqno of the transaction that wrote the item.
+   */
+  public evict(kid: string, seqno: number): void {
+    this.receipts.delete(ReceiptStore.key(kid, seqno));
+    ccf.historical.dropCachedStates(seqno);
+  }
+}
@@ -0,0 +1,207 @@
+// Copyright (c) Microsoft Corporation.
+// Licensed under the MIT license.
+
+/**
+ * Table driven hex and base64url codecs.
+ *
+ * Encoders write character codes into one scratch buffer that is reused across calls
+ * and only grows, then build the string from it in chunks. There are no per byte
+ * strings or intermediate arrays.
+ */
+
+// Largest number of character codes passed to String.fromCharCode at once
+const CHUNK_SIZE = 0x2000;
+
+const HEX_CHARS = "0123456789abcdef";
+const BASE64URL_CHARS =
+  "ABCDEFGHIJKLMNOPQRSTUVWXYZabcdefghijklmnopqrstuvwxyz0123456789-_";
+
+// Character codes of the two hex digits of every byte value
+const HEX_ENCODE = new Uint8Array(512);
+for (let n = 0; n < 256; n++) {
+  HEX_ENCODE[2 * n] = HEX_CHARS.charCodeAt(n >> 4);
+  HEX_ENCODE[2 * n + 1] = HEX_CHARS.charCodeAt(n & 0x0f);
+}
+
+// Value of a hex digit by character code, 0xff if not a hex digit
+const HEX_DECODE = new Uint8Array(128).fill(0xff);
+for (let n = 0; n < 16; n++) {
+  HEX_DECODE[HEX_CHARS.charCodeAt(n)] = n;
+  HEX_DECODE[HEX_CHARS.toUpperCase().charCodeAt(n)] = n;
+}
+
+// Character code of every base64url digit
+const BASE64URL_ENCODE = new Uint8Array(64);
+// Value of a base64 or base64url digit by character code, 0xff if not a digit
+const BASE64_DECODE = new Uint8Array(128).fill(0xff);
+for (let n = 0; n < 64; n++) {
+  BASE64URL_ENCODE[n] = BASE64URL_CHARS.charCodeAt(n);
+  BASE64_DECODE[BASE64URL_CHARS.charCodeAt(n)] = n;
+}
+BASE64_DECODE["+".charCodeAt(0)] = 62;
+BASE64_DECODE["/".charCodeAt(0)] = 63;
+
+let scratch = new Uint8Array(1024);
+
+// Get the scratch buffer with room for at least length character codes
+const scratchOf = (length: number): Uint8Array => {
+  if (scratch.length < length) {
+    let size = scratch.length;
+    while (size < length) {
+      size *= 2;
+    }
+    scratch = new Uint8Array(size);
+  }
+  return scratch;
+};
+
+// Build a string from the first length character codes of a buffer
+const charCodesToString = (codes: Uint8Array, length: number): string => {
+  if (length <= CHUNK_SIZE) {
+    return String.fromCharCode.apply(null, codes.subarray(0, length) as any);
+  }
+  let result = "";
+  for (let start = 0; start < length; start += CHUNK_SIZE) {
+    result += String.fromCharCode.apply(
+      null,
+      codes.subarray(start, Math.min(start + CHUNK_SIZE, length)) as any,
+    );
+  }
+  return result;
+};
+
+// View bytes of an ArrayBuffer or typed array without copying them
+const bytesOf = (data: ArrayBuffer | ArrayBufferView): Uint8Array => {
+  if (data instanceof Uint8Array) {
+    return data;
+  }
+  if (ArrayBuffer.isView(data)) {
+    return new Uint8Array(data.buffer, data.byteOffset, data.byteLength);
+  }
+  return new Uint8Array(data);
+};
+
+/**
+ * Encodes bytes as lowercase hex.
+ * @param data - The bytes to encode.
+ * @returns The hex string.
+ */
+export const toHex = (data: ArrayBuffer | ArrayBufferView): string => {
+  const bytes = bytesOf(data);
+  const length = bytes.length * 2;
+  const codes = scratchOf(length);
+  for (let i = 0, j = 0; i < bytes.length; i++, j += 2) {
+    const n = bytes[i] << 1;
+    codes[j] = HEX_ENCODE[n];
+    codes[j + 1] = HEX_ENCODE[n + 1];
+  }
+  return charCodesToString(codes, length);
+};
+
+/**
+ * Decodes a hex string, upper or lower case.
+ * @param hex - The hex string.
+ * @returns The bytes.
+ * @throws Error if the string has an odd length or a character that is not a hex digit.
+ */
+export const fromHex = (hex: string): Uint8Array => {
+  if (hex.length % 2 !== 0) {
+    throw new Error("Hex string has an odd length");
+  }
+  const bytes = new Uint8Array(hex.length / 2);
+  for (let i = 0, j = 0; i < bytes.length; i++, j += 2) {
+    const highCode = hex.charCodeAt(j);
+    const lowCode = hex.charCodeAt(j + 1);
+    const high = highCode < 128 ? HEX_DECODE[highCode] : 0xff;
+    const low = lowCode < 128 ? HEX_DECODE[lowCode] : 0xff;
+    if (high === 0xff || low === 0xff) {
+      throw new Error(`Invalid hex digit at position ${j}`);
+    }
+    bytes[i] = (high << 4) | low;
+  }
+  return bytes;
+};
+
+/**
+ * Encodes bytes as base64url without padding.
+ * @param data - The bytes to encode.
+ * @returns The base64url string.
+ */
+export const toBase64Url = (data: ArrayBuffer | ArrayBufferView): string => {
+  const bytes = bytesOf(data);
+  const length = Math.ceil((bytes.length * 4) / 3);
+  const codes = scratchOf(length);
+  let j = 0;
+  let i = 0;
+  for (; i + 2 < bytes.length; i += 3) {
+    const n = (bytes[i] << 16) | (bytes[i + 1] << 8) | bytes[i + 2];
+    codes[j++] = BASE64URL_ENCODE[n >> 18];
+    codes[j++] = BASE64URL_ENCODE[(n >> 12) & 0x3f];
+    codes[j++] = BASE64URL_ENCODE[(n >> 6) & 0x3f];
+    codes[j++] = BASE64URL_ENCODE[n & 0x3f];
+  }
+  if (i < bytes.length) {
+    const n = (bytes[i] << 16) | ((i + 1 < bytes.length ? bytes[i + 1] : 0) << 8);
+    codes[j++] = BASE64URL_ENCODE[n >> 18];
+    codes[j++] = BASE64URL_ENCODE[(n >> 12) & 0x3f];
+    if (i + 1 < bytes.length) {
+      codes[j++] = BASE64URL_ENCODE[(n >> 6) & 0x3f];
+    }
+  }
+  return charCodesToString(codes, j);
+};
+
+// Whether a character code is ASCII whitespace, which base64 decoders skip
+const isWhitespace = (code: number): boolean =>
+  code === 0x20 || code === 0x0a || code === 0x0d || code === 0x09;
+
+/**
+ * Decodes base64 or base64url, with or without padding. Whitespace is skipped.
+ * @param base64 - The encoded string.
+ * @returns The bytes, in a buffer of exactly their size.
+ * @throws Error if the string has a character that is not a base64 digit.
+ */
+export const fromBase64Url = (base64: string): Uint8Array => {
+  let end = base64.length;
+  while (end > 0) {
+    const code = base64.charCodeAt(end - 1);
+    if (code !== 0x3d && !isWhitespace(code)) {
+      break;
+    }
+    end--;
+  }
+  const bytes = new Uint8Array(Math.floor((end * 3) / 4));
+  let buffer = 0;
+  let bits = 0;
+  let j = 0;
+  for (let i = 0; i < end; i++) {
+    const code = base64.charCodeAt(i);
+    const value = code < 128 ? BASE64_DECODE[code] : 0xff;
+    if (value === 0xff) {
+      if (isWhitespace(code)) {
+        continue;
+      }
+      throw new Error(`Invalid base64 digit at position ${i}`);
+    }
+    // At most 13 bits are pending, older bits are already written
+    buffer = ((buffer << 6) | value) & 0x3fff;
+    bits += 6;
+    if (bits >= 8) {
+      bits -= 8;
+      bytes[j++] = (buffer >> bits) & 0xff;
+    }
+  }
+  // Only wrapped input decodes to fewer bytes than estimated
+  return j < bytes.length ? bytes.slice(0, j) : bytes;
+};
+
+/**
+ * Decodes base64 or base64url into an ArrayBuffer.
+ * The bytes are decoded straight into the returned buffer, which is not copied again.
+ * @param base64 - The encoded string.
+ * @returns The buffer holding the decoded bytes.
+ * @throws Error if the string has a character that is not a base64 digit.
+ */
+export const base64ToArrayBuffer = (base64: string): ArrayBuffer => {
+  return fromBase64Url(base64).buffer as ArrayBuffer;
+};
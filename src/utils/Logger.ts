@@ -11,6 +11,12 @@ export enum LogLevel {
   DEBUG = 3,
 }
 
+/**
+ * A log message, either as a string or as a function that builds the string.
+ * Functions are only called when the message is actually logged.
+ */
+export type LogMessage = string | (() => string);
+
 
 /**
  * LogContext class to explicitly handle log context metadata like scope, requestId, etc.
@@ -44,6 +50,23 @@ export class LogContext {
     return this;
   }
 
+  /**
+   * Runs a function with an additional scope on this LogContext.
+   * Unlike clone().appendScope(), this does not allocate a new LogContext.
+   * The scope is removed when the function returns or throws.
+   * @param scope - The scope name (e.g., function or module name).
+   * @param fn - The function to run with the additional scope.
+   * @returns The result of the function.
+   */
+  withScope<T>(scope: string, fn: (logContext: LogContext) => T): T {
+    this.scopeStack.push(scope);
+    try {
+      return fn(this);
+    } finally {
+      this.scopeStack.pop();
+    }
+  }
+
   /**
    * Sets the requestId of the LogContext.
    * @param requestId - The unique identifier for the request.
@@ -132,6 +155,16 @@ export class Logger {
     }
   }
 
+  /**
+   * Checks if messages of the given level are logged.
+   * Use this to guard work that is only needed for logging.
+   * @param level - The log level to check.
+   * @returns True if messages of the given level are logged.
+   */
+  static isEnabled(level: LogLevel): boolean {
+    return Logger.logLevel >= level;
+  }
+
   /**
    * Helper function to determine if the second argument is LogContext or arbitrary argument.
    * It returns a tuple [context, args], where:
@@ -151,101 +184,93 @@ export class Logger {
    * @param context - LogContext object with optional fields like scope, requestId, etc.
    * @param message - The main log message.
    */
-  private static formatMessageWithContext(context: LogContext | undefined, message: string): string {
+  private static formatMessageWithContext(context: LogContext | undefined, message: LogMessage): string {
+    const text = typeof message === "function" ? message() : message;
     if (context) {
-      return `${context.toString()} ${message}`;
+      return `${context.toString()} ${text}`;
     }
-    return message;
+    return text;
   }
 
+  /**
+   * Formats the additional log arguments.
+   * Functions are called and objects are serialized to JSON.
+   * @param remainingArgs - The additional arguments to format.
+   */
   static getRemainingArgsString(remainingArgs: any[]): string {
     return remainingArgs
+      .map(arg => (typeof arg === 'function' ? arg() : arg))
       .map(arg => (typeof arg === 'object' ? JSON.stringify(arg, null, 2) : arg))
       .join(' ');
   }
 
   /**
-   * Logs an error message to the console.
-   * @param message - The error message to log.
-   * @param contextOrArg - Optional LogContext object or arbitrary argument.
-   * @param args - Additional arguments to be logged along with the error message.
+   * Formats a log line. Only called once the log level has been checked.
    */
-  static error(message: string, contextOrArg?: LogContext | any, ...args: any[]): boolean {
+  private static format(label: string, message: LogMessage, contextOrArg: LogContext | any, args: any[]): string {
     const [context, remainingArgs] = this.extractContextAndArgs(contextOrArg, args);
     const formattedMessage = this.formatMessageWithContext(context, message);
-    if (Logger.logLevel >= LogLevel.ERROR) {
-      const remainingArgsString = this.getRemainingArgsString(remainingArgs);
-      if (remainingArgsString) {
-          console.error(`[ERROR] ${formattedMessage} ${remainingArgsString}`);
-      } else {
-          console.error(`[ERROR] ${formattedMessage}`);
-      }
-      return true;
+    const remainingArgsString = this.getRemainingArgsString(remainingArgs);
+    if (remainingArgsString) {
+      return `[${label}] ${formattedMessage} ${remainingArgsString}`;
     }
-    return false;
+    return `[${label}] ${formattedMessage}`;
+  }
+
+  /**
+   * Logs an error message to the console.
+   * @param message - The error message to log, or a function building it.
+   * @param contextOrArg - Optional LogContext object or arbitrary argument.
+   * @param args - Additional arguments to be logged along with the error message. Functions are called lazily.
+   */
+  static error(message: LogMessage, contextOrArg?: LogContext | any, ...args: any[]): boolean {
+    if (Logger.logLevel < LogLevel.ERROR) {
+      return false;
+    }
+    console.error(this.format("ERROR", message, contextOrArg, args));
+    return true;
   }
 
   /**
    * Logs a warning message to the console.
-   * @param message - The warning message to be logged.
+   * @param message - The warning message to be logged, or a function building it.
    * @param contextOrArg - Optional LogContext object or arbitrary argument.
-   * @param args - Additional arguments to be logged along with the warning message.
+   * @param args - Additional arguments to be logged along with the warning message. Functions are called lazily.
    */
-  static warn(message: string, contextOrArg?: LogContext | any, ...args: any[]): boolean {
-    const [context, remainingArgs] = this.extractContextAndArgs(contextOrArg, args);
-    const formattedMessage = this.formatMessageWithContext(context, message);
-    if (Logger.logLevel >= LogLevel.WARN) {
-      const remainingArgsString = this.getRemainingArgsString(remainingArgs);
-      if (remainingArgsString) {
-        console.warn(`[WARN] ${formattedMessage} ${remainingArgsString}`);
-      } else {
-        console.warn(`[WARN] ${formattedMessage}`);
-      }
-      return true;
+  static warn(message: LogMessage, contextOrArg?: LogContext | any, ...args: any[]): boolean {
+    if (Logger.logLevel < LogLevel.WARN) {
+      return false;
     }
-    return false;
+    console.warn(this.format("WARN", message, contextOrArg, args));
+    return true;
   }
 
   /**
    * Logs an informational message to the console.
-   * @param message - The informational message to be logged.
+   * @param message - The informational message to be logged, or a function building it.
    * @param contextOrArg - Optional LogContext object or arbitrary argument.
-   * @param args - Additional arguments to be logged along with the informational message.
+   * @param args - Additional arguments to be logged along with the informational message. Functions are called lazily.
    */
-  static info(message: string, contextOrArg?: LogContext | any, ...args: any[]): boolean {
-    const [context, remainingArgs] = this.extractContextAndArgs(contextOrArg, args);
-    const formattedMessage = this.formatMessageWithContext(context, message);
-    if (Logger.logLevel >= LogLevel.INFO) {
-      const remainingArgsString = this.getRemainingArgsString(remainingArgs);
-      if (remainingArgsString) {
-          console.log(`[INFO] ${formattedMessage} ${remainingArgsString}`);
-      } else {
-          console.log(`[INFO] ${formattedMessage}`);
-      }
-      return true;
+  static info(message: LogMessage, contextOrArg?: LogContext | any, ...args: any[]): boolean {
+    if (Logger.logLevel < LogLevel.INFO) {
+      return false;
     }
-    return false;
+    console.log(this.format("INFO", message, contextOrArg, args));
+    return true;
   }
 
   /**
    * Logs a debug message to the console.
-   * @param message - The debug message to be logged.
+   * @param message - The debug message to be logged, or a function building it.
    * @param contextOrArg - Optional LogContext object or arbitrary argument.
-   * @param args - Additional arguments to be logged along with the debug message.
+   * @param args - Additional arguments to be logged along with the debug message. Functions are called lazily.
    */
-  static debug(message: string, contextOrArg?: LogContext | any, ...args: any[]): boolean {
-    const [context, remainingArgs] = this.extractContextAndArgs(contextOrArg, args);
-    const formattedMessage = this.formatMessageWithContext(context, message);
-    if (Logger.logLevel >= LogLevel.DEBUG) {
-      const remainingArgsString = this.getRemainingArgsString(remainingArgs);
-      if (remainingArgsString) {
-        console.log(`[DEBUG] ${formattedMessage} ${remainingArgsString}`);
-    } else {
-        console.log(`[DEBUG] ${formattedMessage}`);
+  static debug(message: LogMessage, contextOrArg?: LogContext | any, ...args: any[]): boolean {
+    if (Logger.logLevel < LogLevel.DEBUG) {
+      return false;
     }
+    console.log(this.format("DEBUG", message, contextOrArg, args));
     return true;
-    }
-    return false;
   }
 
   /**
@@ -254,7 +279,7 @@ export class Logger {
    * @param contextOrArg - Optional LogContext object or arbitrary argument.
    * @param args - Additional arguments to include in the log message.
    */
-  static secret(message: string, contextOrArg?: LogContext | any, ...args: any[]): boolean {
+  static secret(message: LogMessage, contextOrArg?: LogContext | any, ...args: any[]): boolean {
     // return this.debug(message, contextOrArg, ...args);
     return false;
   }
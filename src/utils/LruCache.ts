@@ -0,0 +1,86 @@
+// Copyright (c) Microsoft Corporation.
+// Licensed under the MIT license.
+
+interface ILruCacheEntry<V> {
+  value: V;
+  expiresAt: number;
+}
+
+/**
+ * A bounded least recently used cache with an optional time to live.
+ * Entries live in the JS interpreter, so they are only shared between
+ * requests served by the same interpreter. Endpoints only reuse interpreters
+ * when they set interpreter_reuse in app.json.
+ */
+export class LruCache<K, V> {
+  // Map iterates in insertion order, so the first key is the least recently used
+  private readonly entries = new Map<K, ILruCacheEntry<V>>();
+
+  /**
+   * Creates a new cache.
+   * @param maxEntries - The maximum number of entries kept in the cache.
+   * @param ttlMs - The time to live of an entry in milliseconds. Entries never expire if undefined.
+   */
+  constructor(
+    public readonly maxEntries: number,
+    public readonly ttlMs?: number,
+  ) { }
+
+  // Get the number of entries in the cache, including expired ones not yet evicted
+  public get size(): number {
+    return this.entries.size;
+  }
+
+  /**
+   * Gets an entry and marks it as most recently used.
+   * @param key - The key of the entry.
+   * @returns The value, or undefined if the entry is missing or expired.
+   */
+  public get(key: K): V | undefined {
+    const entry = this.entries.get(key);
+    if (entry === undefined) {
+      return undefined;
+    }
+    this.entries.delete(key);
+    if (entry.expiresAt <= Date.now()) {
+      return undefined;
+    }
+    this.entries.set(key, entry);
+    return entry.value;
+  }
+
+  /**
+   * Adds or replaces an entry, evicting the least recently used entry if the cache is full.
+   * @param key - The key of the entry.
+   * @param value - The value to cache.
+   */
+  public set(key: K, value: V): void {
+    this.entries.delete(key);
+    while (this.entries.size >= this.maxEntries) {
+      const oldest = this.entries.keys().next();
+      if (oldest.done) {
+        break;
+      }
+      this.entries.delete(oldest.value);
+    }
+    const expiresAt =
+      this.ttlMs === undefined ? Number.POSITIVE_INFINITY : Date.now() + this.ttlMs;
+    this.entries.set(key, { value, expiresAt });
+  }
+
+  /**
+   * Removes an entry.
+   * @param key - The key of the entry.
+   * @returns True if the entry was present.
+   */
+  public delete(key: K): boolean {
+    return this.entries.delete(key);
+  }
+
+  /**
+   * Removes all entries.
+   */
+  public clear(): void {
+    this.entries.clear();
+  }
+}
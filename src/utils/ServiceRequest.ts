@@ -3,24 +3,54 @@
 import * as ccfapp from "@microsoft/ccf-app";
 import { ErrorResponse, ServiceResult } from "./ServiceResult";
 import { queryParams } from "./Tooling";
-import { AuthenticationService } from "../authorization/AuthenticationService";
-import { Logger, LogContext } from "./Logger";
+import { authenticationService } from "../authorization/AuthenticationService";
+import { Logger, LogContext, LogLevel } from "./Logger";
 import { Settings } from "../policies/Settings";
 import { settingsPolicyMap } from "../repositories/Maps";
 
+// Headers holding the request ID, in order of preference
+const REQUEST_ID_HEADERS = [
+  'x-ms-kms-request-id',
+  'x-ms-request-id',
+  'x-request-id',
+  'request-id',
+  'requestid',
+];
+
+/**
+ * Gets the request ID from the request headers.
+ * @param headers - The request headers.
+ * @returns The request ID, or undefined if no request ID header is set.
+ */
+const requestIdFromHeaders = (
+  headers: { [key: string]: string } | undefined,
+): string | undefined => {
+  if (!headers) {
+    return undefined;
+  }
+  for (let inx = 0; inx < REQUEST_ID_HEADERS.length; inx++) {
+    const requestId = headers[REQUEST_ID_HEADERS[inx]];
+    if (requestId !== undefined) {
+      return requestId;
+    }
+  }
+  return undefined;
+};
+
 /**
  * A generic request.
- * Return a dictionary with the request properties.
- * Throw an error if the request is invalid.
+ * The body, raw body and query are parsed on first access and cached,
+ * so endpoints only pay for the parts of the request they use.
  */
 export class ServiceRequest<T> {
   public readonly success: boolean;
-  public readonly body?: T;
-  public readonly headers?: { [key: string]: string };
-  public readonly query?: { [key: string]: string };
   public readonly error?: ErrorResponse;
   public readonly requestId?: string;
   private readonly logContext: LogContext;
+  private _body?: T;
+  private _bodyParsed = false;
+  private _bodyBuffer?: ArrayBuffer;
+  private _query?: { [key: string]: string };
 
   constructor(
     public logcontext: LogContext | string,
@@ -49,20 +79,12 @@ export class ServiceRequest<T> {
     }
 
     Logger.setLogLevelFromSettings(settings);
-    Settings.logSettings(settings.settings);
-
-    // Set request ID
-    this.headers = request.headers;
-    const requestIdHeaderList = [
-      'x-ms-kms-request-id',
-      'x-ms-request-id',
-      'x-request-id',
-      'request-id',
-      'requestid',
-    ]
-    const requestIdFromHeader = (logcontext as LogContext).requestId || requestIdHeaderList
-      .map((header) => this.headers ? this.headers[header] : undefined)
-      .find((header) => header !== undefined);
+    if (Logger.isEnabled(LogLevel.DEBUG)) {
+      Settings.logSettings(settings.settings);
+    }
+
+    // Set request ID. Every response carries it, so it is the only header read up front.
+    const requestIdFromHeader = this.logContext.requestId || requestIdFromHeaders(request.headers);
     if (!requestIdFromHeader) {
       this.requestId = Date.now().toString();
       Logger.warn(`Request ID not provided. Using current timestamp as request ID: ${this.requestId}`, this.logContext);
@@ -73,43 +95,65 @@ export class ServiceRequest<T> {
 
     Logger.info(`ServiceRequest`, this.logContext);
 
-    // Log request
-    // Create a shallow copy of the request object without the Authorization header
-    const { Authorization, authorization, ...otherHeaders } = request.headers;
-    let requestWithoutAuth;
-    if (Authorization || authorization) {
-      requestWithoutAuth = {
-        ...request,
-        headers: {
-          ...otherHeaders,
-          authorization: "token deleted for logging",
-        }
-      }
-    }
-    else {
-      requestWithoutAuth = {
-        ...request,
-        headers: {
-          ...otherHeaders,
-        },
-      }
+    this.success = true;
+  }
+
+  // The headers of the request
+  public get headers(): { [key: string]: string } | undefined {
+    return this.request.headers;
+  }
+
+  // The decoded query parameters of the request, parsed on first access
+  public get query(): { [key: string]: string } | undefined {
+    if (this._query === undefined) {
+      this._query = queryParams(this.request, this.logContext);
     }
+    return this._query;
+  }
 
-    try {
-      this.body = request.body.json();
-    } catch (exception) {
-      Logger.info("No JSON body found", this.logContext);
+  // The raw body of the request, read on first access
+  public get bodyBuffer(): ArrayBuffer {
+    if (this._bodyBuffer === undefined) {
+      this._bodyBuffer = this.request.body.arrayBuffer();
     }
+    return this._bodyBuffer;
+  }
 
-    requestWithoutAuth.body = this.body;
-    Logger.debug(`Request:`, this.logContext, JSON.stringify(requestWithoutAuth, null, 2));
-    this.query = queryParams(request, this.logContext);
+  /**
+   * The JSON body of the request, parsed on first access.
+   * Endpoints authenticate the caller first, so the body of a rejected request is never parsed.
+   */
+  public get body(): T | undefined {
+    if (!this._bodyParsed) {
+      this._bodyParsed = true;
+      try {
+        this._body = this.request.body.json();
+      } catch (exception) {
+        Logger.info("No JSON body found", this.logContext);
+      }
+    }
+    return this._body;
+  }
 
-    this.success = true;
+  // Log the request. The copy without the Authorization header is only built when debug logging is on.
+  private logRequest(): void {
+    Logger.debug(`Request:`, this.logContext, () => {
+      const { Authorization, authorization, ...otherHeaders } = this.request.headers;
+      const requestWithoutAuth = {
+        ...this.request,
+        headers: {
+          ...otherHeaders,
+          ...(Authorization || authorization ? { authorization: "token deleted for logging" } : {}),
+        },
+        body: this.body,
+      };
+      return JSON.stringify(requestWithoutAuth, null, 2);
+    });
   }
 
   /**
    * Checks if the API is authenticated.
+   * Must be called before the body is accessed. The request is only logged for authenticated callers.
    * @returns {boolean} Returns true if the API is authenticated, otherwise false.
    */
   public isAuthenticated(): [
@@ -117,11 +161,14 @@ export class ServiceRequest<T> {
     ServiceResult<string>,
   ] {
     const [policy, isValidIdentity] =
-      new AuthenticationService(this.logContext).isAuthenticated(this.request);
+      authenticationService.isAuthenticated(this.request, this.logContext);
 
     Logger.debug(
-      `Authorization: isAuthenticated-> ${JSON.stringify(isValidIdentity)}`, this.logContext
+      () => `Authorization: isAuthenticated-> ${JSON.stringify(isValidIdentity)}`, this.logContext
     );
+    if (isValidIdentity.success) {
+      this.logRequest();
+    }
     return [policy, isValidIdentity];
   }
 }
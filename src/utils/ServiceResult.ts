@@ -68,6 +68,16 @@ export class ServiceResult<T> {
     return new ServiceResult<string>(undefined, undefined, true, 202, headers);
   }
 
+  public static NotModified(
+    logContext: LogContext,
+    headers?: { [key: string]: string | number },
+  ): ServiceResult<string> {
+    Logger.debug("Response Not Modified: 304", logContext);
+    headers = headers ? headers : {};
+    if (logContext.requestId) headers[ServiceResult.KMS_REQUEST_ID_HEADER] = logContext.requestId;
+    return new ServiceResult<string>(undefined, undefined, true, 304, headers);
+  }
+
   public static Failed<T>(
     error: ErrorResponse,
     statusCode: number = 400,
@@ -3,7 +3,8 @@
 
 import * as ccfapp from "@microsoft/ccf-app";
 import { ccf } from "@microsoft/ccf-app/global";
-import { Logger, LogContext } from "./Logger";
+import { Logger, LogContext, LogLevel } from "./Logger";
+import { fromHex, toHex } from "./Codec";
 
 /**
  * Converts a Uint8Array to a string representation.
@@ -23,27 +24,60 @@ export const convertUint8ArrayToString = (uInt8array: Uint8Array): string => {
  * @param buf - The ArrayBuffer to convert.
  * @returns The hexadecimal string representation of the ArrayBuffer.
  */
-export const arrayBufferToHex = (buf: ArrayBuffer) => {
-  return Array.from(new Uint8Array(buf))
-    .map((n) => n.toString(16).padStart(2, "0"))
-    .join("");
+export const arrayBufferToHex = (buf: ArrayBuffer): string => {
+  return toHex(buf);
+};
+
+/**
+ * Converts a hexadecimal string to an ArrayBuffer.
+ * @param hex - The hexadecimal string to convert.
+ * @returns The ArrayBuffer.
+ * @throws Error if the string is not valid hex.
+ */
+export const hexToArrayBuffer = (hex: string): ArrayBuffer => {
+  return fromHex(hex).buffer as ArrayBuffer;
+};
+
+/**
+ * Decodes a component of a query string. A plus sign is a space.
+ * @param component - The encoded component.
+ * @returns The decoded component, or the component itself if it is not valid percent-encoding.
+ */
+const decodeQueryComponent = (component: string): string => {
+  const withSpaces = component.indexOf("+") >= 0 ? component.replace(/\+/g, " ") : component;
+  if (withSpaces.indexOf("%") < 0) {
+    return withSpaces;
+  }
+  try {
+    return decodeURIComponent(withSpaces);
+  } catch {
+    return withSpaces;
+  }
 };
 
 /**
  * Parses query parameters from a request.
+ * Names and values are URL decoded. A parameter without a value has an empty value.
  * @param request - The request object containing the query parameters.
  * @returns An object representing the parsed query parameters.
  */
 export const queryParams = (request: ccfapp.Request, logContextIn?: LogContext) => {
-  const logContext = (logContextIn?.clone() || new LogContext()).appendScope("queryParams");
-  const elements = request.query.split("&");
-  let obj = {};
-  for (let inx = 0; inx < elements.length; inx++) {
-    const param = elements[inx].split("=");
-    obj[param[0]] = param[1];
-    Logger.debug(`Query: ${param[0]} = ${param[1]}`, logContext);
-  }
-  return obj;
+  return (logContextIn || new LogContext()).withScope("queryParams", (logContext) => {
+    const obj: { [key: string]: string } = {};
+    const elements = request.query ? request.query.split("&") : [];
+    for (let inx = 0; inx < elements.length; inx++) {
+      const element = elements[inx];
+      if (element === "") {
+        continue;
+      }
+      const separator = element.indexOf("=");
+      const name = decodeQueryComponent(separator < 0 ? element : element.substring(0, separator));
+      const value = separator < 0 ? "" : decodeQueryComponent(element.substring(separator + 1));
+      obj[name] = value;
+      Logger.debug(() => `Query: ${name} = ${value}`, logContext);
+    }
+    return obj;
+  });
 };
 
 /**
@@ -52,7 +86,6 @@ export const queryParams = (request: ccfapp.Request, logContextIn?: LogContext)
  * @returns A boolean indicating whether the string is a PEM public key.
  */
 export const isPemPublicKey = (key: string, logContextIn?: LogContext): boolean => {
-  const logContext = (logContextIn?.clone() || new LogContext()).appendScope("isPemPublicKey");
   const beginPatternLiteral = /-----BEGIN PUBLIC KEY-----\\n/;
   const endPatternLiteral = /\\n-----END PUBLIC KEY-----\\n$/;
   const beginPatternNewline = /-----BEGIN PUBLIC KEY-----\n/;
@@ -63,24 +96,77 @@ export const isPemPublicKey = (key: string, logContextIn?: LogContext): boolean
   const isNewline =
     beginPatternNewline.test(key) && endPatternNewline.test(key);
 
-  Logger.debug("isLiteralNewline:", logContext, isLiteralNewline);
-  Logger.debug("isNewline:", logContext, isNewline);
+  if (Logger.isEnabled(LogLevel.DEBUG)) {
+    (logContextIn || new LogContext()).withScope("isPemPublicKey", (logContext) => {
+      Logger.debug("isLiteralNewline:", logContext, isLiteralNewline);
+      Logger.debug("isNewline:", logContext, isNewline);
+    });
+  }
 
   return isLiteralNewline || isNewline;
 };
 
+// Max age of the public keys when no key rotation policy is defined
+export const DEFAULT_KEY_MAX_AGE_SECONDS = 254838;
+
 /**
  * Sets the key headers.
+ * @param maxAgeSeconds - The number of seconds clients may cache the keys.
+ * @param etag - The strong entity tag of the keys, without quotes.
  * @returns An object containing the key headers.
  */
-export const setKeyHeaders = (): { [key: string]: string } => {
+export const setKeyHeaders = (
+  maxAgeSeconds: number = DEFAULT_KEY_MAX_AGE_SECONDS,
+  etag?: string,
+): { [key: string]: string } => {
   const headers: { [key: string]: string } = {
-    "cache-control": "max-age=254838",
+    "cache-control": `max-age=${maxAgeSeconds}`,
     date: new Date().toUTCString(),
   };
+  if (etag !== undefined) {
+    headers.etag = `"${etag}"`;
+  }
   return headers;
 };
 
+/**
+ * Parses an optional positive integer query parameter.
+ * @param value - The value of the query parameter.
+ * @param defaultValue - The value to use if the parameter is missing.
+ * @returns The value, the default if the parameter is missing, or undefined if it is invalid.
+ */
+export const positiveIntegerParam = (
+  value: string | undefined,
+  defaultValue: number,
+): number | undefined => {
+  if (value === undefined || value === "") {
+    return defaultValue;
+  }
+  const parsed = Number(value);
+  return Number.isInteger(parsed) && parsed > 0 ? parsed : undefined;
+};
+
+/**
+ * Checks if an If-None-Match request header matches an entity tag.
+ * @param ifNoneMatch - The value of the If-None-Match header.
+ * @param etag - The entity tag, without quotes.
+ * @returns True if the client already has the current representation.
+ */
+export const etagMatches = (
+  ifNoneMatch: string | undefined,
+  etag: string | undefined,
+): boolean => {
+  if (!ifNoneMatch || etag === undefined) {
+    return false;
+  }
+  const quoted = `"${etag}"`;
+  return ifNoneMatch.split(",").some((candidate) => {
+    const tag = candidate.trim();
+    // If-None-Match uses the weak comparison
+    return tag === "*" || tag === quoted || tag === `W/${quoted}`;
+  });
+};
+
 /**
  * Enables the endpoint.
  * @remarks
@@ -103,7 +189,5 @@ export const enableEndpoint = () => {
  * @returns The hexadecimal string representation of the ArrayBuffer.
  */
 export const aToHex = (buf: ArrayBuffer) => {
-  return Array.from(new Uint8Array(buf))
-    .map((n) => n.toString(16).padStart(2, "0"))
-    .join("");
+  return toHex(buf);
 };
\ No newline at end of file
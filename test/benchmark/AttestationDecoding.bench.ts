@@ -0,0 +1,50 @@
+// Copyright (c) Microsoft Corporation.
+// Licensed under the MIT license.
+
+// Use the CCF polyfill for ccfapp.typedArray
+import "@microsoft/ccf-app/polyfill.js";
+import { describe, expect, test } from "@jest/globals";
+import * as ccfapp from "@microsoft/ccf-app";
+import { Base64 } from "js-base64";
+import fs from "fs";
+import { base64ToArrayBuffer } from "../../src/utils/Codec";
+import { report } from "./Benchmark";
+
+const attestation = JSON.parse(
+  fs.readFileSync("test/attestation-samples/snp.json", "utf8"),
+);
+const fields: string[] = [
+  attestation.evidence,
+  attestation.endorsements,
+  attestation.uvm_endorsements,
+];
+
+/**
+ * The previous decoding of an attestation field, as it runs in the CCF runtime.
+ * There is no Buffer there, so js-base64 decodes to a binary string, splits it into
+ * an array of characters and copies their codes into a Uint8Array, which
+ * typedArray(Uint8Array).encode then copies into a new ArrayBuffer.
+ */
+const previousDecoding = (base64: string): ArrayBuffer =>
+  ccfapp.typedArray(Uint8Array).encode(
+    Uint8Array.from(
+      Base64.atob(base64)
+        .split("")
+        .map((c) => c.charCodeAt(0)),
+    ),
+  );
+
+describe("Benchmark attestation decoding", () => {
+  test("sample attestation fields against the previous decoding", () => {
+    fields.forEach((field) =>
+      expect(new Uint8Array(base64ToArrayBuffer(field))).toEqual(
+        new Uint8Array(previousDecoding(field)),
+      ),
+    );
+
+    report("decode evidence, endorsements and uvm_endorsements", 200, {
+      previous: () => fields.forEach(previousDecoding),
+      codec: () => fields.forEach(base64ToArrayBuffer),
+    });
+  });
+});
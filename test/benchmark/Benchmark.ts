@@ -0,0 +1,33 @@
+// Copyright (c) Microsoft Corporation.
+// Licensed under the MIT license.
+
+export const randomBytes = (length: number): Uint8Array => {
+  const bytes = new Uint8Array(length);
+  for (let i = 0; i < length; i++) {
+    bytes[i] = Math.floor(Math.random() * 256);
+  }
+  return bytes;
+};
+
+// Run fn the given number of times and return the elapsed milliseconds
+export const timeOf = (iterations: number, fn: () => void): number => {
+  const start = performance.now();
+  for (let i = 0; i < iterations; i++) {
+    fn();
+  }
+  return performance.now() - start;
+};
+
+// Warm up, time and print each implementation
+export const report = (
+  name: string,
+  iterations: number,
+  implementations: Record<string, () => void>,
+): void => {
+  const warmup = Math.max(1, Math.floor(iterations / 10));
+  const lines = Object.entries(implementations).map(([label, fn]) => {
+    timeOf(warmup, fn);
+    return `  ${label}: ${timeOf(iterations, fn).toFixed(1)} ms`;
+  });
+  console.log(`${name}, ${iterations} iterations\n${lines.join("\n")}`);
+};
@@ -0,0 +1,27 @@
+// Copyright (c) Microsoft Corporation.
+// Licensed under the MIT license.
+
+// Benchmarks are not part of `npm test`, run them with `npm run bench`.
+// They report timings and only assert that the compared implementations agree.
+import { describe, expect, test } from "@jest/globals";
+import { toHex } from "../../src/utils/Codec";
+import { randomBytes, report, timeOf } from "./Benchmark";
+
+// The per byte string implementation the codec replaced
+const naiveHex = (buf: ArrayBuffer): string =>
+  Array.from(new Uint8Array(buf))
+    .map((n) => n.toString(16).padStart(2, "0"))
+    .join("");
+
+describe("Benchmark Codec", () => {
+  test("hex encoding against the per byte implementation", () => {
+    // Digests and kids are 32 bytes, SNP report fields up to 64 bytes
+    const buffers = [randomBytes(32).buffer, randomBytes(64).buffer];
+    buffers.forEach((buf) => expect(toHex(buf)).toBe(naiveHex(buf)));
+
+    report("hex of 32 and 64 bytes", 20000, {
+      naive: () => buffers.forEach((buf) => naiveHex(buf)),
+      codec: () => buffers.forEach((buf) => toHex(buf)),
+    });
+  });
+});
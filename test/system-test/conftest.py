@@ -3,16 +3,25 @@ import hashlib
 import json
 import os
 import subprocess
+import sys
 import time
 import uuid
 
 import pytest
 
-from utils import deploy_app_code, trust_jwt_issuer
-
 REPO_ROOT = os.path.realpath(os.path.join(os.path.dirname(__file__), "..", ".."))
+# The KMS client is shared with the scripts
+sys.path.append(os.path.join(REPO_ROOT, "scripts", "kms"))
+
+import kms_client  # noqa: E402
+from utils import deploy_app_code, trust_jwt_issuer  # noqa: E402
 TEST_ENVIRONMENT = os.getenv("TEST_ENVIRONMENT", "ccf/sandbox_local")
 USE_AKV = os.getenv("USE_AKV", 'False').lower() == 'true'
+# Restore each test's network from a configured baseline instead of creating it
+RESTORE_BASELINE = TEST_ENVIRONMENT == "ccf/sandbox_local" \
+    and os.getenv("RESTORE_BASELINE", 'False').lower() == 'true'
+# Transactions between two snapshots of the baseline network, so there is a snapshot to restore
+BASELINE_SNAPSHOT_TX_INTERVAL = 10
 
 
 def unique_string():
@@ -31,6 +40,33 @@ def unique_string():
 
 os.environ["UNIQUE_ID"] = unique_string()
 
+# Under pytest-xdist each worker brings up its own CCF network and JWT issuer,
+# so workers get their own port, workspace and docker compose project
+WORKER_ID = os.getenv("PYTEST_XDIST_WORKER")
+CCF_PORT_STRIDE = 10
+
+
+def worker_env(worker_id, unique_id):
+    if not worker_id:
+        return {}
+    worker_index = int(worker_id.lstrip("gw"))
+    return {
+        "CCF_PORT": str(int(os.getenv("CCF_PORT", "8000")) + CCF_PORT_STRIDE * (worker_index + 1)),
+        "WORKSPACE": os.path.join(os.getenv("WORKSPACE", f"{REPO_ROOT}/workspace"), worker_id),
+        "COMPOSE_PROJECT_NAME": f"kms-{unique_id}",
+    }
+
+os.environ.update(worker_env(WORKER_ID, os.environ["UNIQUE_ID"]))
+JWT_ISSUER_WORKSPACE = f"{REPO_ROOT}/jwt_issuers_workspace/{os.environ['UNIQUE_ID'] if WORKER_ID else 'default'}"
+
+
+def pytest_configure(config):
+    # Workers would rebuild the bundle concurrently in js_app_set.sh, so the
+    # controller builds it once before starting them
+    if not hasattr(config, "workerinput") and config.getoption("numprocesses", None):
+        subprocess.run("npm install && npm run build", shell=True, cwd=REPO_ROOT, check=True)
+        os.environ["KMS_BUNDLE_PREBUILT"] = "true"
+
 
 def call_script(args, **kwargs):
     res = subprocess.run(
@@ -53,7 +89,7 @@ def _setup_jwt_issuer(jwt_issuer_type="jwt_issuer/demo"):
             [f"./scripts/{jwt_issuer_type}/up.sh", "--build"],
             env={
                 **os.environ,
-                "JWT_ISSUER_WORKSPACE": f"{REPO_ROOT}/jwt_issuers_workspace/default",
+                "JWT_ISSUER_WORKSPACE": JWT_ISSUER_WORKSPACE,
             },
         )
         yield
@@ -97,7 +133,7 @@ def setup_akv():
         yield
 
 
-def _setup_ccf():
+def _setup_ccf(env=None):
     for _ in range(10):
         try:
             deployment_name = os.getenv("DEPLOYMENT_NAME", f"kms-{unique_string()}")
@@ -105,6 +141,7 @@ def _setup_ccf():
                 [f"scripts/{TEST_ENVIRONMENT}/up.sh", "--force-recreate"],
                 env={
                     **os.environ,
+                    **(env or {}),
                     "DEPLOYMENT_NAME": deployment_name,
                 },
             )
@@ -122,6 +159,7 @@ def _setup_ccf():
 
     yield
 
+    kms_client.close_all()
     call_script(
         [f"scripts/{TEST_ENVIRONMENT}/down.sh"],
         env={
@@ -144,7 +182,7 @@ def setup_ccf_session():
     yield from _setup_ccf()
 
 
-def _setup_kms():
+def _configure_kms():
     if USE_AKV and TEST_ENVIRONMENT == "ccf/sandbox_local":
         call_script(
             ["./scripts/akv/key-import.sh"],
@@ -162,13 +200,43 @@ def _setup_kms():
         )
     deploy_app_code()
     trust_jwt_issuer("aad")
+
+
+def _setup_kms():
+    _configure_kms()
+    yield {}
+    print("") # Prevents cleanup overwriting result
+
+
+@pytest.fixture(scope="session")
+def setup_kms_baseline(setup_akv, setup_aad_jwt_issuer_session):
+    # Boots and configures a network once, then keeps its ledger and latest snapshot to restore
+    setup = _setup_ccf(env={
+        "CCF_SANDBOX_ARGS": f"--snapshot-tx-interval {BASELINE_SNAPSHOT_TX_INTERVAL}",
+    })
+    next(setup)
+    _configure_kms()
+    kms_client.close_all()
+    call_script([f"scripts/{TEST_ENVIRONMENT}/snapshot.sh"])
+    yield
+    next(setup, None)
+
+
+def _restore_kms():
+    kms_client.close_all()
+    call_script([f"scripts/{TEST_ENVIRONMENT}/restore.sh"])
     yield {}
     print("") # Prevents cleanup overwriting result
 
 
 @pytest.fixture()
-def setup_kms(setup_akv, setup_aad_jwt_issuer, setup_ccf):
-    yield from _setup_kms()
+def setup_kms(request, setup_akv, setup_aad_jwt_issuer):
+    if RESTORE_BASELINE:
+        request.getfixturevalue("setup_kms_baseline")
+        yield from _restore_kms()
+    else:
+        request.getfixturevalue("setup_ccf")
+        yield from _setup_kms()
 
 
 @pytest.fixture(scope="session")
@@ -1,30 +1,43 @@
 import json
-import os
-import subprocess
 
-REPO_ROOT = os.path.realpath(os.path.join(os.path.dirname(__file__), "..", ".."))
-
-def call_endpoint(endpoint, **kwargs):
-
-    command = [f"scripts/kms/endpoints/{endpoint}.sh"]
+import kms_client
+
+# Query parameters of the endpoints, by the keyword argument naming them
+QUERY_PARAMS = {
+    "kid": "kid",
+    "fmt": "fmt",
+    "valid_at": "validAt",
+    "wrap_alg": "wrapAlg",
+    "cursor": "cursor",
+    "limit": "limit",
+    "since": "since",
+    "count": "count",
+}
+
+
+def call_endpoint(endpoint, method="GET", auth=None, body=None, **kwargs):
+    """
+    Calls an endpoint of the KMS app over the pooled connections of kms_client.
+
+    Keyword arguments are the options of scripts/kms/endpoints/<endpoint>.sh,
+    so the query parameters and the authentication match the scripts.
+    """
+    query = {}
     for k, v in kwargs.items():
-        command.extend([f'--{k.replace("_", "-")}', str(v)])
+        if k not in QUERY_PARAMS:
+            raise TypeError(f"Unknown parameter {k} of {endpoint}")
+        query[QUERY_PARAMS[k]] = str(v)
 
-    *response, status_code = subprocess.run(
-        command,
-        cwd=REPO_ROOT,
-        check=True,
-        stdout=subprocess.PIPE,
-    ).stdout.decode().splitlines()
+    client, headers = kms_client.authenticated(auth)
+    if body is not None:
+        headers["Content-Type"] = "application/json"
+    status_code, response = client.request(method, f"/app/{endpoint}", query=query, body=body, headers=headers)
 
-    print(f'Called "{" ".join(command)}"')
+    print(f'Called "{method} /app/{endpoint}" with {query}')
     print(f"Response Code: {status_code}")
-    print(f'Response Body: {json.loads("".join(response) or "{}")}')
+    print(f"Response Body: {response}")
 
-    return (
-        int(status_code),
-        json.loads("".join(response) or '{}'),
-    )
+    return status_code, response
 
 
 def heartbeat(**kwargs):
@@ -32,18 +45,33 @@ def heartbeat(**kwargs):
 
 
 def proposalsGet(**kwargs):
-    return call_endpoint("proposalsGet", **kwargs)
+    return call_endpoint("proposals", **kwargs)
+
+
+def auth(auth="jwt", **kwargs):
+    return call_endpoint("auth", auth=auth, **kwargs)
 
 
-def auth(**kwargs):
-    return call_endpoint("auth", **kwargs)
+# attestation and wrapping_key are JSON text, spliced into the body like the scripts do
 
 
-def key(**kwargs):
-    return call_endpoint("key", **kwargs)
+def key(attestation="", wrapping_key="", auth="jwt", **kwargs):
+    body = f'{{"attestation":{attestation}, "wrappingKey":{wrapping_key}}}'
+    return call_endpoint("key", method="POST", auth=auth, body=body, **kwargs)
+
+
+def unwrapKey(attestation="", wrapping_key='""', wrappedKid="", auth="jwt", **kwargs):
+    body = (
+        f'{{"attestation":{attestation}, "wrappedKid":{json.dumps(wrappedKid)},'
+        f' "wrapped":"", "wrappingKey":{wrapping_key}}}'
+    )
+    return call_endpoint("unwrapKey", method="POST", auth=auth, body=body, **kwargs)
+
 
-def unwrapKey(**kwargs):
-    return call_endpoint("unwrapKey", **kwargs)
+def unwrapKeys(attestation="", wrapping_key="", kids=None, auth="jwt", **kwargs):
+    kids_arg = f', "kids":{json.dumps(kids.split(","))}' if kids else ""
+    body = f'{{"attestation":{attestation}, "wrappingKey":{wrapping_key}{kids_arg}}}'
+    return call_endpoint("unwrapKeys", method="POST", auth=auth, body=body, **kwargs)
 
 
 def listpubkeys(**kwargs):
@@ -55,12 +83,12 @@ def pubkey(**kwargs):
 
 
 def refresh(**kwargs):
-    return call_endpoint("refresh", **kwargs)
+    return call_endpoint("refresh", method="POST", **kwargs)
 
 
-def keyReleasePolicy(**kwargs):
-    return call_endpoint("keyReleasePolicy", **kwargs)
+def keyReleasePolicy(auth="jwt", **kwargs):
+    return call_endpoint("keyReleasePolicy", auth=auth, **kwargs)
 
 
-def settingsPolicy(**kwargs):
-    return call_endpoint("settingsPolicy", **kwargs)
+def settingsPolicy(auth="jwt", **kwargs):
+    return call_endpoint("settingsPolicy", auth=auth, **kwargs)
@@ -3,8 +3,8 @@ import os
 import pytest
 from cose.messages import CoseMessage
 from subprocess import CalledProcessError
-from endpoints import heartbeat, key, listpubkeys, pubkey, keyReleasePolicy, refresh, auth, settingsPolicy, proposalsGet
-from utils import get_test_attestation, get_test_public_wrapping_key, apply_key_release_policy, decrypted_wrapped_key, trust_jwt_issuer, remove_key_release_policy, apply_settings_policy, call_endpoint
+from endpoints import heartbeat, key, listpubkeys, pubkey, keyReleasePolicy, refresh, auth, settingsPolicy, proposalsGet, unwrapKey
+from utils import get_test_attestation, get_test_public_wrapping_key, apply_key_release_policy, decrypted_wrapped_key, trust_jwt_issuer, remove_key_release_policy, apply_settings_policy
 
 # These tests run on a single KMS instance in order to be cheaper regarding
 # Azure deployments.
@@ -23,7 +23,6 @@ def test_no_policy_no_keys_no_jwt_heartbeat(setup_kms_session):
     assert heartbeat_json["status"] == "Service is running"
 
 
-@pytest.mark.xfail(strict=True) # TODO: Fix, see #167
 def test_no_policy_no_keys_no_jwt_listpubkeys(setup_kms_session):
     status_code, pubkeys = listpubkeys()
     assert status_code == 200
@@ -204,12 +203,11 @@ def test_set_policy_single_key_no_jwt_unwrapKey(setup_kms_session):
     assert status_code == 200
 
     while True:
-        status_code, unwrapped_json = call_endpoint(fr"""
-            scripts/kms/endpoints/unwrapKey.sh \
-                --attestation "$(cat test/attestation-samples/snp.json)" \
-                --wrapping-key "$(sed ':a;N;$!ba;s/\n/\\n/g' test/data-samples/publicWrapKey.pem)" \
-                --wrappedKid "{key_json["wrappedKid"]}"
-        """)
+        status_code, unwrapped_json = unwrapKey(
+            attestation=get_test_attestation(),
+            wrapping_key=get_test_public_wrapping_key(),
+            wrappedKid=key_json["wrappedKid"],
+        )
         if status_code != 202:
             break
     assert status_code == 200
@@ -403,7 +401,8 @@ def test_set_policy_single_key_set_jwt_refresh_multiple(setup_kms_session):
 def test_set_policy_multiple_keys_set_jwt_listpubkeys(setup_kms_session):
     status_code, pubkeys = listpubkeys()
     assert status_code == 200
-    assert len(pubkeys["keys"]) == 1
+    assert len(pubkeys["keys"]) == 2
+    assert "nextCursor" not in pubkeys
 
 
 def test_set_policy_multiple_keys_set_jwt_pubkey_no_kid(setup_kms_session):
@@ -461,12 +460,11 @@ def test_set_policy_multiple_keys_set_jwt_unwrapKey_no_kid(setup_kms_session):
     assert key_json["wrappedKid"].endswith("_2")
 
     while True:
-        status_code, unwrapped_json = call_endpoint(fr"""
-            scripts/kms/endpoints/unwrapKey.sh \
-                --attestation "$(cat test/attestation-samples/snp.json)" \
-                --wrapping-key "$(sed ':a;N;$!ba;s/\n/\\n/g' test/data-samples/publicWrapKey.pem)" \
-                --wrappedKid "{key_json["wrappedKid"]}"
-        """)
+        status_code, unwrapped_json = unwrapKey(
+            attestation=get_test_attestation(),
+            wrapping_key=get_test_public_wrapping_key(),
+            wrappedKid=key_json["wrappedKid"],
+        )
         if status_code != 202:
             break
     assert status_code == 200
@@ -489,12 +487,11 @@ def test_set_policy_multiple_keys_set_jwt_unwrapKey_first_kid(setup_kms_session)
     assert key_json["wrappedKid"].endswith("_1")
 
     while True:
-        status_code, unwrapped_json = call_endpoint(fr"""
-            scripts/kms/endpoints/unwrapKey.sh \
-                --attestation "$(cat test/attestation-samples/snp.json)" \
-                --wrapping-key "$(sed ':a;N;$!ba;s/\n/\\n/g' test/data-samples/publicWrapKey.pem)" \
-                --wrappedKid "{key_json["wrappedKid"]}"
-        """)
+        status_code, unwrapped_json = unwrapKey(
+            attestation=get_test_attestation(),
+            wrapping_key=get_test_public_wrapping_key(),
+            wrappedKid=key_json["wrappedKid"],
+        )
         if status_code != 202:
             break
     assert status_code == 200
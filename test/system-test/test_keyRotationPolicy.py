@@ -2,7 +2,7 @@ import json
 import os
 import pytest
 import time
-from endpoints import key, refresh
+from endpoints import key, refresh, unwrapKey
 from utils import (
     apply_settings_policy,
     apply_key_release_policy,
@@ -10,7 +10,6 @@ from utils import (
     get_test_attestation,
     get_test_public_wrapping_key,
     decrypted_wrapped_key,
-    call_endpoint,
 )
 
 
@@ -38,12 +37,11 @@ def test_key_in_grace_period_with_rotation_policy(setup_kms):
     assert status_code == 200
 
     # unwrap key
-    status_code, unwrapped_json = call_endpoint(fr"""
-        scripts/kms/endpoints/unwrapKey.sh \
-            --attestation "$(cat test/attestation-samples/snp.json)" \
-            --wrapping-key "$(sed ':a;N;$!ba;s/\n/\\n/g' test/data-samples/publicWrapKey.pem)" \
-            --wrappedKid "{key_json["wrappedKid"]}"
-    """)
+    status_code, unwrapped_json = unwrapKey(
+        attestation=get_test_attestation(),
+        wrapping_key=get_test_public_wrapping_key(),
+        wrappedKid=key_json["wrappedKid"],
+    )
     assert status_code == 200
     unwrapped = decrypted_wrapped_key(unwrapped_json["wrapped"])
     unwrapped_json = json.loads(unwrapped)
@@ -65,12 +63,11 @@ def test_key_in_grace_period_without_rotation_policy(setup_kms):
     assert status_code == 200
 
     # unwrap key
-    status_code, unwrapped_json = call_endpoint(fr"""
-        scripts/kms/endpoints/unwrapKey.sh \
-            --attestation "$(cat test/attestation-samples/snp.json)" \
-            --wrapping-key "$(sed ':a;N;$!ba;s/\n/\\n/g' test/data-samples/publicWrapKey.pem)" \
-            --wrappedKid "{key_json["wrappedKid"]}"
-    """)
+    status_code, unwrapped_json = unwrapKey(
+        attestation=get_test_attestation(),
+        wrapping_key=get_test_public_wrapping_key(),
+        wrappedKid=key_json["wrappedKid"],
+    )
     assert status_code == 200
     unwrapped = decrypted_wrapped_key(unwrapped_json["wrapped"])
     unwrapped_json = json.loads(unwrapped)
@@ -94,12 +91,11 @@ def test_key_in_grace_period_with_custom_rotation_policy(setup_kms):
     assert status_code == 200
 
     # unwrap key
-    status_code, unwrapped_json = call_endpoint(fr"""
-        scripts/kms/endpoints/unwrapKey.sh \
-            --attestation "$(cat test/attestation-samples/snp.json)" \
-            --wrapping-key "$(sed ':a;N;$!ba;s/\n/\\n/g' test/data-samples/publicWrapKey.pem)" \
-            --wrappedKid "{key_json["wrappedKid"]}"
-    """)
+    status_code, unwrapped_json = unwrapKey(
+        attestation=get_test_attestation(),
+        wrapping_key=get_test_public_wrapping_key(),
+        wrappedKid=key_json["wrappedKid"],
+    )
     assert status_code == 200
     unwrapped = decrypted_wrapped_key(unwrapped_json["wrapped"])
     unwrapped_json = json.loads(unwrapped)
@@ -119,22 +115,20 @@ def test_key_in_grace_period_with_custom_rotation_policy(setup_kms):
         ]
     }
     apply_key_rotation_policy(policy)
-    status_code, unwrapped_json = call_endpoint(fr"""
-        scripts/kms/endpoints/unwrapKey.sh \
-            --attestation "$(cat test/attestation-samples/snp.json)" \
-            --wrapping-key "$(sed ':a;N;$!ba;s/\n/\\n/g' test/data-samples/publicWrapKey.pem)" \
-            --wrappedKid "{key_json["wrappedKid"]}"
-    """)
+    status_code, unwrapped_json = unwrapKey(
+        attestation=get_test_attestation(),
+        wrapping_key=get_test_public_wrapping_key(),
+        wrappedKid=key_json["wrappedKid"],
+    )
     assert status_code == 200
 
     # wait for the key to expire
     time.sleep(20)
-    status_code, unwrapped_json = call_endpoint(fr"""
-        scripts/kms/endpoints/unwrapKey.sh \
-            --attestation "$(cat test/attestation-samples/snp.json)" \
-            --wrapping-key "$(sed ':a;N;$!ba;s/\n/\\n/g' test/data-samples/publicWrapKey.pem)" \
-            --wrappedKid "{key_json["wrappedKid"]}"
-    """)
+    status_code, unwrapped_json = unwrapKey(
+        attestation=get_test_attestation(),
+        wrapping_key=get_test_public_wrapping_key(),
+        wrappedKid=key_json["wrappedKid"],
+    )
     assert status_code == 410  # check for expired key
 
 
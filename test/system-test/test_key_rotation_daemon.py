@@ -0,0 +1,89 @@
+import os
+import random
+import sys
+import time
+import urllib.request
+
+from endpoints import pubkey, refresh
+from utils import REPO_ROOT, apply_key_rotation_policy
+
+sys.path.append(os.path.join(REPO_ROOT, "scripts", "kms"))
+from key_rotation_daemon import KeyRotationDaemon, serve_metrics  # noqa: E402
+from kms_client import KmsClient  # noqa: E402
+
+
+def create_daemon(**kwargs):
+    client = KmsClient(os.environ["KMS_URL"], os.getenv("KMS_SERVICE_CERT_PATH"))
+    return KeyRotationDaemon(client, jitter_seconds=0, rng=random.Random(0), **kwargs)
+
+
+def run_until_idle(daemon, max_runs=100):
+    # Run until the daemon waits for the next refresh, without waiting for it
+    for _ in range(max_runs):
+        delay = daemon.run_once()
+        if delay >= daemon.poll_seconds or daemon.metrics.get("kms_rotation_next_refresh_seconds") > 0:
+            return delay
+        time.sleep(min(delay, 1))
+    raise AssertionError("The daemon did not settle")
+
+
+def test_daemon_creates_first_key(setup_kms):
+    apply_key_rotation_policy()
+    daemon = create_daemon()
+
+    run_until_idle(daemon)
+    assert daemon.metrics.get("kms_rotation_refresh_total") == 1
+
+    status_code, pubkey_json = pubkey()
+    assert status_code == 200
+    assert pubkey_json["expiry"] / 1000 > daemon.metrics.get("kms_rotation_next_refresh_seconds")
+
+
+def test_daemon_does_not_refresh_fresh_key(setup_kms):
+    apply_key_rotation_policy()
+    _, refresh_json = refresh()
+    daemon = create_daemon()
+
+    delay = run_until_idle(daemon)
+    assert delay > 0
+    assert daemon.metrics.get("kms_rotation_refresh_total") == 0
+    assert daemon.metrics.get("kms_rotation_refresh_failures_total") == 0
+
+    status_code, pubkey_json = pubkey()
+    assert status_code == 200
+    assert pubkey_json["kid"] == refresh_json["kid"]
+
+
+def test_daemon_refreshes_key_ahead_of_expiry(setup_kms):
+    apply_key_rotation_policy()
+    _, refresh_json = refresh()
+
+    # Refresh as soon as a key is created
+    daemon = create_daemon(lead_fraction=1.0)
+    while daemon.metrics.get("kms_rotation_refresh_total") == 0:
+        time.sleep(min(daemon.run_once(), 1))
+    assert daemon.metrics.get("kms_rotation_refresh_failures_total") == 0
+
+    while True:
+        status_code, pubkey_json = pubkey()
+        if status_code != 202:
+            break
+    assert status_code == 200
+    assert pubkey_json["kid"] != refresh_json["kid"]
+
+
+def test_daemon_serves_metrics():
+    daemon = KeyRotationDaemon(client=None)
+    server = serve_metrics(daemon.metrics, 0)
+    try:
+        port = server.server_address[1]
+        metrics = urllib.request.urlopen(f"http://127.0.0.1:{port}/metrics").read().decode()
+        assert "kms_rotation_refresh_total 0" in metrics
+        assert "kms_rotation_lag_seconds" in metrics
+    finally:
+        server.shutdown()
+
+
+if __name__ == "__main__":
+    import pytest
+    pytest.main([__file__, "-s"])
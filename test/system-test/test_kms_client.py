@@ -0,0 +1,89 @@
+import base64
+import http.client
+import json
+import subprocess
+
+import pytest
+
+import kms_client
+from endpoints import heartbeat
+
+
+def make_token(claims):
+    payload = base64.urlsafe_b64encode(json.dumps(claims).encode()).decode().rstrip("=")
+    return f"e30.{payload}.sig"
+
+
+def test_token_expiry():
+    assert kms_client.token_expiry(make_token({"exp": 1700000000})) == 1700000000
+    assert kms_client.token_expiry(make_token({"sub": "test"})) is None
+    assert kms_client.token_expiry("not-a-jwt") is None
+
+
+def test_get_jwt_is_fetched_again_only_near_expiry(monkeypatch, tmp_path):
+    (tmp_path / "fetch.sh").write_text("jwt_issuer_fetch() { :; }\n")
+    monkeypatch.setenv("JWT_ISSUER_WORKSPACE", str(tmp_path))
+    monkeypatch.setattr(kms_client, "_tokens", {})
+    fetched = []
+
+    def fake_run(*args, **kwargs):
+        fetched.append(make_token({"exp": 1000 + 300 * len(fetched)}))
+        return subprocess.CompletedProcess(args, 0, stdout=fetched[-1].encode())
+
+    monkeypatch.setattr(kms_client.subprocess, "run", fake_run)
+
+    assert kms_client.get_jwt(now=900) == fetched[0]
+    assert kms_client.get_jwt(now=930) == fetched[0]
+    assert kms_client.get_jwt(now=950) == fetched[1]
+    assert len(fetched) == 2
+
+
+class DisconnectingConnection:
+    """Connection the server closes after each request, before any response bytes."""
+
+    def __init__(self, sent):
+        self.sent = sent
+
+    def request(self, method, path, body=None, headers=None):
+        self.sent.append((method, path))
+
+    def getresponse(self):
+        raise http.client.RemoteDisconnected("Remote end closed connection without response")
+
+    def close(self):
+        ...
+
+
+def disconnecting_client(monkeypatch, sent):
+    client = kms_client.KmsClient("https://127.0.0.1:8000")
+    monkeypatch.setattr(client, "_connect", lambda: DisconnectingConnection(sent))
+    return client
+
+
+def test_post_is_not_retried_after_disconnect(monkeypatch):
+    sent = []
+    client = disconnecting_client(monkeypatch, sent)
+
+    with pytest.raises(http.client.RemoteDisconnected):
+        client.call("POST", "refresh")
+    assert sent == [("POST", "/app/refresh")]
+
+
+def test_get_is_retried_once_after_disconnect(monkeypatch):
+    sent = []
+    client = disconnecting_client(monkeypatch, sent)
+
+    with pytest.raises(http.client.RemoteDisconnected):
+        client.call("GET", "pubkey")
+    assert sent == [("GET", "/app/pubkey")] * 2
+
+
+def test_connections_are_reused(setup_kms):
+    client, _ = kms_client.authenticated(None)
+    status_code, _ = heartbeat()
+    assert status_code == 200
+    connection = client.connection
+
+    status_code, _ = heartbeat()
+    assert status_code == 200
+    assert client.connection is connection
@@ -2,7 +2,6 @@ import pytest
 from endpoints import listpubkeys, refresh
 
 
-@pytest.mark.xfail(strict=True) # TODO: Fix, see #167
 def test_no_keys_initially(setup_kms):
     status_code, pubkeys = listpubkeys()
     assert status_code == 200
@@ -16,6 +15,34 @@ def test_refresh_key_appears(setup_kms):
     assert len(pubkeys["keys"]) == 1
 
 
+def test_all_keys_listed_newest_first(setup_kms):
+    _, first = refresh()
+    _, second = refresh()
+    status_code, pubkeys = listpubkeys()
+    assert status_code == 200
+    assert [k["id"] for k in pubkeys["keys"]] == [str(second["id"]), str(first["id"])]
+    assert "nextCursor" not in pubkeys
+
+
+def test_pagination(setup_kms):
+    for _ in range(3):
+        refresh()
+    status_code, page = listpubkeys(limit=2)
+    assert status_code == 200
+    assert len(page["keys"]) == 2
+    assert page["nextCursor"] == "1"
+
+    status_code, page = listpubkeys(limit=2, cursor=page["nextCursor"])
+    assert status_code == 200
+    assert len(page["keys"]) == 1
+    assert "nextCursor" not in page
+
+
+def test_invalid_limit(setup_kms):
+    status_code, _ = listpubkeys(limit=0)
+    assert status_code == 400
+
+
 if __name__ == "__main__":
     import pytest
     pytest.main([__file__, "-s"])
@@ -0,0 +1,71 @@
+import asyncio
+import json
+import os
+import sys
+
+import pytest
+
+from endpoints import refresh
+from utils import REPO_ROOT, apply_key_release_policy
+
+sys.path.append(os.path.join(REPO_ROOT, "scripts", "kms"))
+from kms_client import get_jwt, ssl_context_of  # noqa: E402
+from load_generator import (  # noqa: E402
+    DEFAULT_ATTESTATION_PATH,
+    DEFAULT_WRAPPING_KEY_PATH,
+    LoadGenerator,
+    parse_mix,
+    percentile,
+    summarize,
+)
+
+
+def test_parse_mix():
+    assert parse_mix("pubkey=10, key=4,refresh=0,listpubkeys") == {"pubkey": 10.0, "key": 4.0, "listpubkeys": 1.0}
+    with pytest.raises(ValueError):
+        parse_mix("heartbeat=1")
+    with pytest.raises(ValueError):
+        parse_mix("pubkey=0")
+
+
+def test_summarize_reports_percentiles_and_202_rate():
+    samples = [("pubkey", 200, ms / 1000) for ms in range(1, 101)]
+    samples += [("key", 202, 0.5), ("key", 200, 0.1), ("key", 0, 1.0)]
+
+    report = summarize(samples, elapsed=2.0)
+
+    assert percentile(list(range(1, 101)), 95) == 95
+    assert report["endpoints"]["pubkey"]["latency_ms"]["p50"] == 50.0
+    assert report["endpoints"]["pubkey"]["latency_ms"]["p99"] == 99.0
+    assert report["endpoints"]["pubkey"]["throughput_rps"] == 50.0
+    assert report["endpoints"]["key"]["rate_202"] == round(1 / 3, 4)
+    assert report["endpoints"]["key"]["errors"] == 1
+    assert report["total"]["requests"] == 103
+
+
+def test_load_generator_reports_all_endpoints(setup_kms):
+    apply_key_release_policy()
+    refresh()
+    with open(DEFAULT_ATTESTATION_PATH) as f:
+        attestation = json.load(f)
+    with open(DEFAULT_WRAPPING_KEY_PATH) as f:
+        wrapping_key = f.read()
+
+    generator = LoadGenerator(
+        os.environ["KMS_URL"],
+        ssl_context_of(os.getenv("KMS_SERVICE_CERT_PATH")),
+        parse_mix("pubkey=4,listpubkeys=2,key=2,unwrapKey=2,refresh=1"),
+        concurrency=4,
+        requests=200,
+        auth_headers={"Authorization": f"Bearer {get_jwt()}"},
+        attestation=attestation,
+        wrapping_key=wrapping_key,
+    )
+    report = asyncio.run(generator.run())
+
+    assert report["total"]["requests"] == 200
+    assert set(report["endpoints"]) == {"pubkey", "listpubkeys", "key", "unwrapKey", "refresh"}
+    for stats in report["endpoints"].values():
+        assert stats["status_codes"].get("0", 0) == 0
+        assert stats["latency_ms"]["p50"] <= stats["latency_ms"]["p95"] <= stats["latency_ms"]["p99"]
+    assert report["total"]["throughput_rps"] > 0
@@ -66,6 +66,36 @@ def test_proposals_caps_to_five(setup_kms):
         assert proposal_json["actions"][0]["args"]["settings_policy"]["service"]["version"] == f"0.0.{idx}", "Proposals are out of the expected order"
 
 
+def test_proposals_since(setup_kms):
+    status_code, page_json = proposalsGet(since=0)
+    assert status_code == 200
+    assert len(page_json["proposals"]) == 1
+    since = page_json["nextSince"]
+
+    # Nothing new since the last page
+    status_code, page_json = proposalsGet(since=since)
+    assert status_code == 200
+    assert page_json == {"proposals": [], "nextSince": since}
+
+    sleep(2) # Ensures the proposal timestamps are different
+    apply_key_release_policy()
+
+    status_code, page_json = proposalsGet(since=since, limit=1)
+    assert status_code == 200
+    assert len(page_json["proposals"]) == 1
+    assert page_json["nextSince"] == since + 1
+    key_release_policy_cose = CoseMessage.decode(bytes.fromhex(page_json["proposals"][0]))
+    key_release_policy_json = json.loads(key_release_policy_cose.payload)
+    assert key_release_policy_json["actions"][0]["name"] == "set_key_release_policy"
+
+
+def test_proposals_since_invalid(setup_kms):
+    status_code, _ = proposalsGet(since=-1)
+    assert status_code == 400
+    status_code, _ = proposalsGet(since=0, limit=0)
+    assert status_code == 400
+
+
 if __name__ == "__main__":
     import pytest
     pytest.main([__file__, "-s"])
\ No newline at end of file
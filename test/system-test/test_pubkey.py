@@ -98,6 +98,32 @@ def test_fmt_invalid(setup_kms):
     assert status_code == 400
 
 
+def test_valid_at(setup_kms):
+    _, first_json = refresh()
+    _, second_json = refresh()
+    for refresh_json in (first_json, second_json):
+        while True:
+            status_code, key_json = pubkey(valid_at=refresh_json["timestamp"])
+            if status_code != 202:
+                break
+        assert status_code == 200
+        assert key_json["kid"] == refresh_json["kid"]
+
+
+def test_valid_at_before_first_key(setup_kms):
+    _, refresh_json = refresh()
+    status_code, _ = pubkey(valid_at=refresh_json["timestamp"] - 1)
+    assert status_code == 404
+
+
+def test_valid_at_invalid(setup_kms):
+    _, refresh_json = refresh()
+    status_code, _ = pubkey(valid_at="yesterday")
+    assert status_code == 400
+    status_code, _ = pubkey(kid=refresh_json["kid"], valid_at=refresh_json["timestamp"])
+    assert status_code == 400
+
+
 if __name__ == "__main__":
     import pytest
     pytest.main([__file__, "-s"])
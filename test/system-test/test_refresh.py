@@ -1,4 +1,9 @@
-from endpoints import refresh
+import hashlib
+import json
+import time
+
+from endpoints import listpubkeys, pubkey, refresh
+from utils import apply_key_rotation_policy
 
 
 def test_single_refresh(setup_kms):
@@ -18,6 +23,109 @@ def test_multiple_refresh(setup_kms):
     assert first_kid != second_kid
 
 
+def test_batch_refresh_schedules_pending_keys(setup_kms):
+    apply_key_rotation_policy()
+    status_code, refresh_json = refresh(count=3)
+    assert status_code == 200
+    keys = refresh_json["keys"]
+    assert len(keys) == 3
+    assert len({k["kid"] for k in keys}) == 3
+    assert all("d" not in k for k in keys)
+
+    # Keys are activated one rotation interval apart
+    interval_ms = 2678400 * 1000
+    assert keys[1]["timestamp"] - keys[0]["timestamp"] == interval_ms
+    assert keys[2]["timestamp"] - keys[1]["timestamp"] == interval_ms
+
+    # Only the first key is active
+    while True:
+        status_code, pubkey_json = pubkey()
+        if status_code != 202:
+            break
+    assert status_code == 200
+    assert pubkey_json["kid"] == keys[0]["kid"]
+
+    status_code, pubkeys = listpubkeys()
+    assert status_code == 200
+    assert [k["id"] for k in pubkeys["keys"]] == [str(keys[0]["id"])]
+
+    # A later batch is scheduled after the pending keys
+    status_code, refresh_json = refresh(count=1)
+    assert status_code == 200
+    assert refresh_json["keys"][0]["timestamp"] - keys[2]["timestamp"] == interval_ms
+
+
+def receipt_claims_digest(kid):
+    while True:
+        status_code, key_json = pubkey(kid=kid)
+        if status_code != 202:
+            break
+    assert status_code == 200
+    return json.loads(key_json["receipt"])["leafComponents"]["claimsDigest"]
+
+
+def test_single_refresh_receipt_claims_public_key(setup_kms):
+    status_code, refresh_json = refresh()
+    assert status_code == 200
+
+    claims = refresh_json["x"]
+    assert receipt_claims_digest(refresh_json["kid"]) == hashlib.sha256(claims.encode()).hexdigest()
+
+
+def test_batch_refresh_receipt_claims_public_keys(setup_kms):
+    apply_key_rotation_policy()
+    status_code, refresh_json = refresh(count=3)
+    assert status_code == 200
+    keys = refresh_json["keys"]
+
+    # Every key of the batch claims the JSON list of the public keys in id order
+    claims = json.dumps([k["x"] for k in keys], separators=(",", ":"))
+    expected = hashlib.sha256(claims.encode()).hexdigest()
+    for key in keys:
+        assert receipt_claims_digest(key["kid"]) == expected
+
+
+def test_batch_refresh_without_rotation_policy(setup_kms):
+    status_code, _ = refresh(count=2)
+    assert status_code == 400
+
+
+def test_batch_refresh_invalid_count(setup_kms):
+    apply_key_rotation_policy()
+    status_code, _ = refresh(count=0)
+    assert status_code == 400
+    status_code, _ = refresh(count=65)
+    assert status_code == 400
+
+
+def test_refresh_deletes_keys_past_grace_period(setup_kms):
+    apply_key_rotation_policy({
+        "actions": [
+            {
+                "name": "set_key_rotation_policy",
+                "args": {
+                    "key_rotation_policy": {
+                        "rotation_interval_seconds": 1,
+                        "grace_period_seconds": 1,
+                    }
+                },
+            }
+        ]
+    })
+    _, first_json = refresh()
+    time.sleep(3)
+    _, second_json = refresh()
+
+    status_code, _ = pubkey(kid=first_json["kid"])
+    assert status_code == 404
+
+    while True:
+        status_code, pubkey_json = pubkey(kid=second_json["kid"])
+        if status_code != 202:
+            break
+    assert status_code == 200
+
+
 if __name__ == "__main__":
     import pytest
     pytest.main([__file__, "-s"])
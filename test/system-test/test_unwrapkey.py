@@ -1,7 +1,7 @@
 import json
 import pytest
-from endpoints import key, refresh
-from utils import apply_key_release_policy, get_test_attestation, get_test_public_wrapping_key, decrypted_wrapped_key, call_endpoint
+from endpoints import key, refresh, unwrapKey
+from utils import apply_key_release_policy, get_test_attestation, get_test_public_wrapping_key, decrypted_wrapped_key
 
 # This test will check the two step google protocol to retrieve a private key
 # Step 1, call the /key endpoint and retrieve the kid
@@ -22,12 +22,11 @@ def test_unwrap_key_and_decrypt(setup_kms):
     assert status_code == 200
 
     # unwrap key
-    status_code, unwrapped_json = call_endpoint(fr"""
-        scripts/kms/endpoints/unwrapKey.sh \
-            --attestation "$(cat test/attestation-samples/snp.json)" \
-            --wrapping-key "$(sed ':a;N;$!ba;s/\n/\\n/g' test/data-samples/publicWrapKey.pem)" \
-            --wrappedKid "{key_json["wrappedKid"]}"
-    """)
+    status_code, unwrapped_json = unwrapKey(
+        attestation=get_test_attestation(),
+        wrapping_key=get_test_public_wrapping_key(),
+        wrappedKid=key_json["wrappedKid"],
+    )
     assert status_code == 200
     unwrapped = decrypted_wrapped_key(unwrapped_json["wrapped"])
     unwrapped_json = json.loads(unwrapped)
@@ -35,6 +34,46 @@ def test_unwrap_key_and_decrypt(setup_kms):
     assert unwrapped_json["kty"] == "OKP"
 
 
+def test_unwrap_key_hybrid_wrapping_and_decrypt(setup_kms):
+    apply_key_release_policy()
+    refresh()
+    while True:
+        status_code, key_json = key(
+            attestation=get_test_attestation(),
+            wrapping_key=get_test_public_wrapping_key(),
+        )
+        if status_code != 202:
+            break
+    assert status_code == 200
+
+    # unwrap key with an ephemeral AES key wrapped by the wrapping key
+    status_code, unwrapped_json = unwrapKey(
+        attestation=get_test_attestation(),
+        wrapping_key=get_test_public_wrapping_key(),
+        wrappedKid=key_json["wrappedKid"],
+        wrap_alg="RSA-OAEP-AES-KWP",
+    )
+    assert status_code == 200
+    unwrapped = decrypted_wrapped_key(unwrapped_json["wrapped"], "RSA-OAEP-AES-KWP")
+    unwrapped_json = json.loads(unwrapped)
+    assert unwrapped_json["kty"] == "OKP"
+    assert unwrapped_json["kid"] == key_json["wrappedKid"]
+
+
+def test_unwrap_key_invalid_wrap_alg(setup_kms):
+    apply_key_release_policy()
+    refresh()
+
+    # unwrap key
+    status_code, unwrapped_json = unwrapKey(
+        attestation=get_test_attestation(),
+        wrapping_key=get_test_public_wrapping_key(),
+        wrappedKid="abc",
+        wrap_alg="RSA-PKCS1",
+    )
+    assert status_code == 400
+
+
 def test_unwrap_key_missing_attestation(setup_kms):
     apply_key_release_policy()
     refresh()
@@ -48,12 +87,11 @@ def test_unwrap_key_missing_attestation(setup_kms):
     assert status_code == 200
 
     # unwrap key
-    status_code, unwrapped_json = call_endpoint(fr"""
-        scripts/kms/endpoints/unwrapKey.sh \
-            --attestation "abc" \
-            --wrapping-key "$(sed ':a;N;$!ba;s/\n/\\n/g' test/data-samples/publicWrapKey.pem)" \
-            --wrappedKid "{key_json["wrappedKid"]}"
-    """)
+    status_code, unwrapped_json = unwrapKey(
+        attestation="abc",
+        wrapping_key=get_test_public_wrapping_key(),
+        wrappedKid=key_json["wrappedKid"],
+    )
     assert status_code == 400
 
 
@@ -70,12 +108,11 @@ def test_unwrap_key_missing_wrapping_key(setup_kms):
     assert status_code == 200
 
     # unwrap key
-    status_code, unwrapped_json = call_endpoint(fr"""
-        scripts/kms/endpoints/unwrapKey.sh \
-            --attestation "$(cat test/attestation-samples/snp.json)" \
-            --wrapping-key "abc" \
-            --wrappedKid "{key_json["wrappedKid"]}"
-    """)
+    status_code, unwrapped_json = unwrapKey(
+        attestation=get_test_attestation(),
+        wrapping_key='"abc"',
+        wrappedKid=key_json["wrappedKid"],
+    )
     assert status_code == 400
 
 
@@ -84,12 +121,11 @@ def test_unwrap_key_missing_wrappedKid(setup_kms):
     refresh()
 
     # unwrap key
-    status_code, unwrapped_json = call_endpoint(fr"""
-        scripts/kms/endpoints/unwrapKey.sh \
-            --attestation "$(cat test/attestation-samples/snp.json)" \
-            --wrapping-key "$(sed ':a;N;$!ba;s/\n/\\n/g' test/data-samples/publicWrapKey.pem)" \
-            --wrappedKid ""
-    """)
+    status_code, unwrapped_json = unwrapKey(
+        attestation=get_test_attestation(),
+        wrapping_key=get_test_public_wrapping_key(),
+        wrappedKid="",
+    )
     assert status_code == 404
 
 
@@ -97,15 +133,34 @@ def test_unwrap_key_without_refresh(setup_kms):
     apply_key_release_policy()
 
     # unwrap key
-    status_code, unwrapped_json = call_endpoint(fr"""
-        scripts/kms/endpoints/unwrapKey.sh \
-            --attestation "$(cat test/attestation-samples/snp.json)" \
-            --wrapping-key "$(sed ':a;N;$!ba;s/\n/\\n/g' test/data-samples/publicWrapKey.pem)" \
-            --wrappedKid "abc"
-    """)
+    status_code, unwrapped_json = unwrapKey(
+        attestation=get_test_attestation(),
+        wrapping_key=get_test_public_wrapping_key(),
+        wrappedKid="abc",
+    )
     assert status_code == 404
 
 
+def test_unwrap_key_valid_at(setup_kms):
+    apply_key_release_policy()
+    _, first_json = refresh()
+    refresh()
+
+    # unwrap the key that was active when the first key was created, without its kid
+    while True:
+        status_code, unwrapped_json = unwrapKey(
+            attestation=get_test_attestation(),
+            wrapping_key=get_test_public_wrapping_key(),
+            valid_at=first_json["timestamp"],
+        )
+        if status_code != 202:
+            break
+    assert status_code == 200
+    unwrapped = decrypted_wrapped_key(unwrapped_json["wrapped"])
+    unwrapped_json = json.loads(unwrapped)
+    assert unwrapped_json["kid"] == first_json["kid"]
+
+
 if __name__ == "__main__":
     import pytest
     pytest.main([f"{__file__}", "-s"])
\ No newline at end of file
@@ -0,0 +1,129 @@
+import json
+import pytest
+from endpoints import refresh, unwrapKeys
+from utils import apply_key_release_policy, apply_key_rotation_policy, get_test_attestation, get_test_public_wrapping_key, decrypted_wrapped_key
+
+# This test will check the batch protocol to retrieve several private keys with one attestation
+
+MAX_UNWRAP_KEYS = 64
+
+
+def unwrap_keys_until_ready(**kwargs):
+    while True:
+        status_code, unwrapped_json = unwrapKeys(
+            attestation=get_test_attestation(),
+            wrapping_key=get_test_public_wrapping_key(),
+            **kwargs,
+        )
+        if status_code != 200 or all(k["statusCode"] != 202 for k in unwrapped_json["keys"]):
+            return status_code, unwrapped_json
+
+
+def test_unwrap_keys_all_non_expired(setup_kms):
+    apply_key_release_policy()
+    refresh()
+    refresh()
+
+    status_code, unwrapped_json = unwrap_keys_until_ready()
+    assert status_code == 200
+    assert len(unwrapped_json["keys"]) == 2
+    for item in unwrapped_json["keys"]:
+        assert item["statusCode"] == 200
+        unwrapped = json.loads(decrypted_wrapped_key(item["wrapped"]))
+        assert unwrapped["kty"] == "OKP"
+        assert unwrapped["kid"] == item["wrappedKid"]
+
+
+def test_unwrap_keys_hybrid_wrapping(setup_kms):
+    apply_key_release_policy()
+    refresh()
+
+    status_code, unwrapped_json = unwrap_keys_until_ready(wrap_alg="RSA-OAEP-AES-KWP")
+    assert status_code == 200
+    assert len(unwrapped_json["keys"]) == 1
+    item = unwrapped_json["keys"][0]
+    assert item["statusCode"] == 200
+    unwrapped = json.loads(decrypted_wrapped_key(item["wrapped"], "RSA-OAEP-AES-KWP"))
+    assert unwrapped["kid"] == item["wrappedKid"]
+
+
+def test_unwrap_keys_selected_kids(setup_kms):
+    apply_key_release_policy()
+    refresh()
+
+    status_code, unwrapped_json = unwrap_keys_until_ready()
+    assert status_code == 200
+    kid = unwrapped_json["keys"][0]["wrappedKid"]
+
+    status_code, unwrapped_json = unwrap_keys_until_ready(kids=f"{kid},unknown")
+    assert status_code == 200
+    assert [k["wrappedKid"] for k in unwrapped_json["keys"]] == [kid, "unknown"]
+    assert unwrapped_json["keys"][0]["statusCode"] == 200
+    assert unwrapped_json["keys"][1]["statusCode"] == 404
+    assert "wrapped" not in unwrapped_json["keys"][1]
+
+
+def test_unwrap_keys_caps_keys_without_rotation_policy(setup_kms):
+    apply_key_release_policy()
+    # Without a key rotation policy no key expires
+    kids = [refresh()[1]["kid"] for _ in range(MAX_UNWRAP_KEYS + 2)]
+
+    status_code, unwrapped_json = unwrap_keys_until_ready()
+    assert status_code == 200
+    assert [k["wrappedKid"] for k in unwrapped_json["keys"]] == kids[::-1][:MAX_UNWRAP_KEYS]
+    assert all(k["statusCode"] == 200 for k in unwrapped_json["keys"])
+
+
+def test_unwrap_keys_skips_pending_keys(setup_kms):
+    apply_key_release_policy()
+    apply_key_rotation_policy()
+    status_code, refresh_json = refresh(count=3)
+    assert status_code == 200
+    kids = [k["kid"] for k in refresh_json["keys"]]
+
+    # Only the first key of the batch is active
+    status_code, unwrapped_json = unwrap_keys_until_ready()
+    assert status_code == 200
+    assert [k["wrappedKid"] for k in unwrapped_json["keys"]] == kids[:1]
+    assert unwrapped_json["keys"][0]["statusCode"] == 200
+
+    # Pending keys are refused when requested explicitly
+    status_code, unwrapped_json = unwrap_keys_until_ready(kids=",".join(kids))
+    assert status_code == 200
+    assert [k["statusCode"] for k in unwrapped_json["keys"]] == [200, 403, 403]
+    assert all("wrapped" not in k for k in unwrapped_json["keys"][1:])
+
+
+def test_unwrap_keys_no_keys(setup_kms):
+    apply_key_release_policy()
+
+    status_code, unwrapped_json = unwrap_keys_until_ready()
+    assert status_code == 200
+    assert unwrapped_json["keys"] == []
+
+
+def test_unwrap_keys_missing_attestation(setup_kms):
+    apply_key_release_policy()
+    refresh()
+
+    status_code, _ = unwrapKeys(
+        attestation="abc",
+        wrapping_key=get_test_public_wrapping_key(),
+    )
+    assert status_code == 400
+
+
+def test_unwrap_keys_missing_wrapping_key(setup_kms):
+    apply_key_release_policy()
+    refresh()
+
+    status_code, _ = unwrapKeys(
+        attestation=get_test_attestation(),
+        wrapping_key='"abc"',
+    )
+    assert status_code == 400
+
+
+if __name__ == "__main__":
+    import pytest
+    pytest.main([f"{__file__}", "-s"])
@@ -4,10 +4,12 @@ import subprocess
 import tempfile
 from contextlib import contextmanager
 from Crypto.PublicKey import RSA
-from Crypto.Cipher import PKCS1_OAEP
+from Crypto.Cipher import AES, PKCS1_OAEP
 from Crypto.Hash import SHA256
 import base64
 
+import kms_client
+
 REPO_ROOT = os.path.realpath(os.path.join(os.path.dirname(__file__), "..", ".."))
 TEST_ENVIRONMENT = os.getenv("TEST_ENVIRONMENT", "ccf/sandbox_local")
 
@@ -29,24 +31,6 @@ def deploy_app_code(**kwargs):
     )
 
 
-def call_endpoint(command):
-    *response, status_code = subprocess.run(
-        command,
-        cwd=os.path.realpath(os.path.join(os.path.dirname(__file__), "..", "..")),
-        stdout=subprocess.PIPE,
-        shell=True,
-    ).stdout.decode().splitlines()
-
-    print(f'Called "{" ".join(command)}"')
-    print(f"Response Code: {status_code}")
-    print(f'Response Body: {json.loads("".join(response) or "{}")}')
-
-    return (
-        int(status_code),
-        json.loads("".join(response) or '{}'),
-    )
-
-
 def apply_settings_policy(policy=None, get_logs=False):
     get_logs_arg = {"stdout": subprocess.PIPE} if get_logs else {}
     res = subprocess.run(
@@ -173,23 +157,7 @@ def nodes_scale(node_count, get_logs=False):
 
 
 def get_node_info(node_url):
-    res = subprocess.run(
-        [
-            "curl",
-            f"https://{node_url}/node/network/nodes/self",
-            "--cacert", os.getenv("KMS_SERVICE_CERT_PATH"),
-            "-w", "'\n%{http_code}'",
-        ],
-        check=True,
-        stdout=subprocess.PIPE,
-        stderr=subprocess.DEVNULL,
-    ).stdout.decode()
-
-    *response, status_code = res.strip("'").splitlines()
-    return (
-        int(status_code),
-        json.loads("".join(response).strip("\'") or "{}"),
-    )
+    return kms_client.get_client(f"https://{node_url}").request("GET", "/node/network/nodes/self")
 
 
 def propose(proposal, get_logs=False):
@@ -235,7 +203,7 @@ def get_test_private_wrapping_key():
         key = file.read().strip()
         return key
 
-def decrypted_wrapped_key(wrapped_key):
+def decrypted_wrapped_key(wrapped_key, wrap_alg="RSA-OAEP"):
     # Load the private key from the PEM file
     private_key_data = get_test_private_wrapping_key()
     private_key = RSA.import_key(private_key_data)  # Convert PEM string to RSA key object
@@ -247,7 +215,16 @@ def decrypted_wrapped_key(wrapped_key):
     # Decode the wrapped key from base64 and decrypt it
     wrapped_key = base64.b64decode(wrapped_key)
     print(f"Decoded Key Length: {len(wrapped_key)}")
-    return cipher.decrypt(wrapped_key)
+    if wrap_alg == "RSA-OAEP":
+        return cipher.decrypt(wrapped_key)
+
+    if wrap_alg == "RSA-OAEP-AES-KWP":
+        # The RSA-OAEP wrapped AES key is followed by the AES-KWP wrapped payload
+        rsa_size = private_key.size_in_bytes()
+        aes_key = cipher.decrypt(wrapped_key[:rsa_size])
+        return AES.new(aes_key, AES.MODE_KWP).unseal(wrapped_key[rsa_size:])
+
+    raise ValueError(f"Unsupported wrapping algorithm {wrap_alg}")
 
 
 @contextmanager
@@ -0,0 +1,49 @@
+// Copyright (c) Microsoft Corporation.
+// Licensed under the MIT license.
+
+// Use the CCF polyfill to mock-up all key-value map functionality for unit-test
+import "@microsoft/ccf-app/polyfill.js";
+import { describe, expect, test } from "@jest/globals";
+import { attestationCacheKey } from "../../../src/attestation/AttestationValidation";
+
+describe("Test attestation cache key", () => {
+  test("Should give the same key for the same attestation", () => {
+    // Arrange
+    const attestation = {
+      evidence: "AAAA",
+      endorsements: "BBBB",
+      uvm_endorsements: "CCCC",
+      endorsed_tcb: "DDDD",
+    };
+
+    // Act
+    const first = attestationCacheKey(attestation);
+    const second = attestationCacheKey({ ...attestation });
+
+    // Assert
+    expect(second).toBe(first);
+  });
+
+  test("Should give different keys for the same characters split over different fields", () => {
+    // Arrange
+    const attestation = {
+      evidence: "AAAA",
+      endorsements: "BBBB",
+      uvm_endorsements: "CCCC",
+      endorsed_tcb: "DDDD\nEEEE",
+    };
+    const resplit = {
+      evidence: "AAAA\nBBBB",
+      endorsements: "CCCC",
+      uvm_endorsements: "DDDD",
+      endorsed_tcb: "EEEE",
+    };
+
+    // Act
+    const key = attestationCacheKey(attestation);
+    const resplitKey = attestationCacheKey(resplit);
+
+    // Assert
+    expect(resplitKey).not.toBe(key);
+  });
+});
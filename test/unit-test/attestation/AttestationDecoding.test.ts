@@ -0,0 +1,29 @@
+// Copyright (c) Microsoft Corporation.
+// Licensed under the MIT license.
+
+import { describe, expect, test } from "@jest/globals";
+import { Base64 } from "js-base64";
+import fs from "fs";
+import { base64ToArrayBuffer } from "../../../src/utils/Codec";
+
+const attestation = JSON.parse(
+  fs.readFileSync("test/attestation-samples/snp.json", "utf8"),
+);
+const fields: string[] = [
+  attestation.evidence,
+  attestation.endorsements,
+  attestation.uvm_endorsements,
+];
+
+describe("Test attestation decoding", () => {
+  test("Should decode the sample attestation like js-base64", () => {
+    fields.forEach((field) => {
+      // Act
+      const buffer = base64ToArrayBuffer(field);
+
+      // Assert
+      expect(new Uint8Array(buffer)).toEqual(Base64.toUint8Array(field));
+      expect(buffer.byteLength).toBe(Base64.toUint8Array(field).byteLength);
+    });
+  });
+});
@@ -0,0 +1,79 @@
+// Copyright (c) Microsoft Corporation.
+// Licensed under the MIT license.
+
+// Use the CCF polyfill to mock-up all key-value map functionality for unit-test
+import "@microsoft/ccf-app/polyfill.js";
+import { describe, expect, test } from "@jest/globals";
+import { ccf } from "@microsoft/ccf-app/global";
+import * as ccfapp from "@microsoft/ccf-app";
+import { JwtValidator } from "../../../src/authorization/jwt/JwtValidator";
+import {
+  JwtValidationPolicyMap,
+  validationPolicyMapName,
+} from "../../../src/authorization/jwt/JwtValidationPolicyMap";
+
+const issuer = "https://issuer.example.com";
+
+ccf.kv[validationPolicyMapName].set(
+  ccf.strToBuf(issuer),
+  ccf.strToBuf(
+    JSON.stringify({
+      iss: issuer,
+      sub: ["alice", "bob"],
+    }),
+  ),
+);
+
+// Build a request authenticated with a JWT with the given payload
+const jwtRequest = (payload: { [key: string]: any }) =>
+  ({
+    caller: { jwt: { keyIssuer: issuer, payload } },
+  }) as unknown as ccfapp.Request<any>;
+
+describe("Test JwtValidator", () => {
+  test("Should compile array policy values into sets", () => {
+    // Act
+    const compiled = JwtValidationPolicyMap.compile({
+      iss: issuer,
+      sub: ["alice", "bob"],
+    });
+
+    // Assert
+    expect(compiled.claims.map((claim) => claim.key)).toEqual(["iss", "sub"]);
+    expect(compiled.claims[0].allowed).toBeUndefined();
+    expect(compiled.claims[1].allowed?.has("bob")).toBe(true);
+  });
+
+  test("Should accept a JWT matching the policy of its issuer", () => {
+    // Act
+    const result = new JwtValidator().validate(
+      jwtRequest({ iss: issuer, sub: "bob", oid: "id" }),
+    );
+
+    // Assert
+    expect(result.success).toBe(true);
+    expect(result.body).toBe("id");
+  });
+
+  test("Should reject a JWT with a claim outside the policy", () => {
+    // Act
+    const result = new JwtValidator().validate(
+      jwtRequest({ iss: issuer, sub: "mallory" }),
+    );
+
+    // Assert
+    expect(result.success).toBe(false);
+    expect(result.statusCode).toBe(401);
+  });
+
+  test("Should reject a JWT from an issuer without policy", () => {
+    // Act
+    const result = new JwtValidator().validate(
+      jwtRequest({ iss: "https://unknown.example.com", sub: "bob" }),
+    );
+
+    // Assert
+    expect(result.success).toBe(false);
+    expect(result.statusCode).toBe(500);
+  });
+});
@@ -244,4 +244,79 @@ describe("Test Key Release Policy properties", () => {
     // Assert
     expect(validationResult.success).toBe(false);
   });
+
+  test("Should fail validation Key Release Policy properties with operators gte and gt, gte not satisfied", () => {
+    // Arrange
+    const policy: any = {
+      type: "",
+      claims: { "x-ms-attestation-type": ["sevsnpvm"] },
+      gte: { "x-ms-number": 10 },
+      gt: { "x-ms-other-number": 1 },
+    };
+    const attestationClaims: any = {
+      "x-ms-attestation-type": "sevsnpvm",
+      "x-ms-number": 9,
+      "x-ms-other-number": 2,
+    };
+
+    // Act
+    const validationResult = KeyReleasePolicy.validateKeyReleasePolicy(
+      policy,
+      attestationClaims,
+    );
+
+    // Assert
+    expect(validationResult.success).toBe(false);
+    expect(validationResult.error?.errorMessage).toContain(
+      "is not greater than or equal to policy value 10",
+    );
+  });
+
+  test("Should validate successfully Key Release Policy properties with scalar claim", () => {
+    // Arrange
+    const policy: any = {
+      type: "",
+      claims: {
+        "x-ms-attestation-type": ["sevsnpvm"],
+        "x-ms-sevsnpvm-is-debuggable": false,
+      },
+    };
+    const attestationClaims: any = {
+      "x-ms-attestation-type": "sevsnpvm",
+      "x-ms-sevsnpvm-is-debuggable": false,
+    };
+
+    // Act
+    const validationResult = KeyReleasePolicy.validateKeyReleasePolicy(
+      policy,
+      attestationClaims,
+    );
+
+    // Assert
+    expect(validationResult.success).toBe(true);
+  });
+
+  test("Should evaluate a compiled Key Release Policy more than once", () => {
+    // Arrange
+    const compiled = KeyReleasePolicy.compile({
+      type: KeyReleasePolicyType.ADD,
+      claims: { "x-ms-sevsnpvm-hostdata": ["aa", "bb", "cc"] },
+      gt: { "x-ms-sevsnpvm-guestsvn": "1" },
+    });
+
+    // Act
+    const accepted = KeyReleasePolicy.evaluate(compiled, <any>{
+      "x-ms-sevsnpvm-hostdata": "bb",
+      "x-ms-sevsnpvm-guestsvn": 2,
+    });
+    const rejected = KeyReleasePolicy.evaluate(compiled, <any>{
+      "x-ms-sevsnpvm-hostdata": "dd",
+      "x-ms-sevsnpvm-guestsvn": 2,
+    });
+
+    // Assert
+    expect(accepted.success).toBe(true);
+    expect(rejected.success).toBe(false);
+    expect(rejected.statusCode).toBe(400);
+  });
 });
@@ -0,0 +1,143 @@
+// Copyright (c) Microsoft Corporation.
+// Licensed under the MIT license.
+
+// Use the CCF polyfill to mock-up all key-value map functionality for unit-test
+import "@microsoft/ccf-app/polyfill.js";
+import { beforeEach, describe, expect, jest, test } from "@jest/globals";
+import { ccf } from "@microsoft/ccf-app/global";
+import { KeyRetention } from "../../../src/repositories/KeyRetention";
+import { KeyStore } from "../../../src/repositories/KeyStore";
+import { LastestItemStore } from "../../../src/repositories/LastestItemStore";
+import { PublicKeyView } from "../../../src/repositories/PublicKeyView";
+import { IKeyItem } from "../../../src/endpoints/IKeyItem";
+import { LogContext } from "../../../src/utils/Logger";
+
+const DAY_MS = 24 * 60 * 60 * 1000;
+const now = 1700000000000;
+
+beforeEach(() => {
+  (globalThis as any).ccf.historical = {
+    getStateRange: jest.fn(),
+    dropCachedStates: jest.fn(),
+  };
+});
+
+// Create key stores with the given key timestamps, a day of rotation interval and a day of grace.
+// Legacy stores are written directly to the maps, without the pointers of the key id map.
+const createStores = (name: string, timestamps: number[], legacy = false) => {
+  const keyIdMap = new LastestItemStore<number, string>(`${name}.ids`);
+  const keysMap = new KeyStore(`${name}.keys`);
+  const view = new PublicKeyView(`public:${name}.view`);
+  const policyMap = ccf.kv[`public:${name}.key_rotation`];
+  policyMap.set(
+    ccf.strToBuf("key_rotation_policy"),
+    ccf.strToBuf(
+      JSON.stringify({
+        rotation_interval_seconds: DAY_MS / 1000,
+        grace_period_seconds: DAY_MS / 1000,
+      }),
+    ),
+  );
+  timestamps.forEach((timestamp, index) => {
+    const id = index + 1;
+    const keyItem: IKeyItem = {
+      kty: "OKP",
+      crv: "X25519",
+      x: "mF2O3pgG3Q7c9PCXuzrWpRDc_ZvEAYkgYwRuu9bg4E0",
+      kid: `abc_${id}`,
+      id: id + 10,
+      timestamp,
+    };
+    if (legacy) {
+      keyIdMap.store.set(id, keyItem.kid!);
+    } else {
+      keyIdMap.storeItem(id, keyItem.kid!);
+    }
+    keysMap.storeItem(keyItem.kid!, keyItem);
+    view.storeItem(id, keyItem);
+  });
+  const retention = new KeyRetention(keyIdMap, keysMap, view, policyMap);
+  return { keyIdMap, keysMap, view, retention };
+};
+
+describe("Test KeyRetention", () => {
+  test("Should delete keys past their grace period", () => {
+    // Arrange
+    const { keyIdMap, keysMap, view, retention } = createStores(
+      "retention.grace",
+      [now - 5 * DAY_MS, now - 1.5 * DAY_MS, now],
+    );
+
+    // Act
+    const deleted = retention.compact(now, new LogContext());
+
+    // Assert
+    expect(deleted).toEqual([1]);
+    expect(keyIdMap.oldestId).toBe(2);
+    expect(keyIdMap.latestId).toBe(3);
+    expect(keyIdMap.store.get(1)).toBeUndefined();
+    expect(keysMap.store.get("abc_1")).toBeUndefined();
+    expect(view.get(1)).toBeUndefined();
+    expect(view.getByKid("abc_1")).toBeUndefined();
+    expect(keysMap.store.get("abc_2")).toBeDefined();
+  });
+
+  test("Should never delete the latest key", () => {
+    // Arrange
+    const { keyIdMap, retention } = createStores("retention.latest", [
+      now - 9 * DAY_MS,
+      now - 8 * DAY_MS,
+      now - 7 * DAY_MS,
+    ]);
+
+    // Act
+    const deleted = retention.compact(now, new LogContext());
+
+    // Assert
+    expect(deleted).toEqual([1, 2]);
+    expect(keyIdMap.latestItem()).toEqual([3, "abc_3"]);
+  });
+
+  test("Should keep the latest id after older keys are deleted", () => {
+    // Arrange
+    const { keyIdMap, retention } = createStores("retention.pointer", [
+      now - 9 * DAY_MS,
+      now,
+    ]);
+    retention.compact(now, new LogContext());
+
+    // Act
+    keyIdMap.storeItem(3, "abc_3");
+
+    // Assert
+    expect(keyIdMap.size).toBe(2);
+    expect(keyIdMap.latestId).toBe(3);
+    expect(keyIdMap.oldestId).toBe(2);
+  });
+
+  test("Should not reuse ids of a store written before the pointers existed", () => {
+    // Arrange
+    const { keyIdMap, retention } = createStores(
+      "retention.legacy",
+      [now - 9 * DAY_MS, now - 8 * DAY_MS, now - DAY_MS, now],
+      true,
+    );
+
+    // Act
+    const deleted = retention.compact(now, new LogContext());
+    // Refresh stores the next key after the latest id
+    const id = keyIdMap.latestId + 1;
+    keyIdMap.storeItem(id, `abc_${id}`);
+
+    // Assert
+    expect(deleted).toEqual([1, 2]);
+    expect(id).toBe(5);
+    expect(keyIdMap.oldestId).toBe(3);
+    expect(keyIdMap.latestItem()).toEqual([5, "abc_5"]);
+    expect([3, 4, 5].map((keyId) => keyIdMap.store.get(keyId))).toEqual([
+      "abc_3",
+      "abc_4",
+      "abc_5",
+    ]);
+  });
+});
@@ -0,0 +1,79 @@
+// Copyright (c) Microsoft Corporation.
+// Licensed under the MIT license.
+
+// Use the CCF polyfill to mock-up all key-value map functionality for unit-test
+import "@microsoft/ccf-app/polyfill.js";
+import { describe, expect, jest, test } from "@jest/globals";
+import { PolicyCache } from "../../../src/repositories/PolicyCache";
+
+describe("Test PolicyCache", () => {
+  test("Should load once per version", () => {
+    // Arrange
+    const cache = new PolicyCache<string>("test");
+    const load = jest.fn(() => "policy");
+
+    // Act
+    const first = cache.get(1, load);
+    const second = cache.get(1, load);
+
+    // Assert
+    expect(first).toBe("policy");
+    expect(second).toBe("policy");
+    expect(load).toHaveBeenCalledTimes(1);
+  });
+
+  test("Should reload when the version changes", () => {
+    // Arrange
+    const cache = new PolicyCache<string>("test");
+    cache.get(1, () => "v1");
+
+    // Act
+    const result = cache.get(2, () => "v2");
+
+    // Assert
+    expect(result).toBe("v2");
+    expect(cache.get(2, () => "unexpected")).toBe("v2");
+  });
+
+  test("Should not cache values with an unknown version", () => {
+    // Arrange
+    const cache = new PolicyCache<string>("test");
+    const load = jest.fn(() => "policy");
+
+    // Act
+    cache.get(undefined, load);
+    cache.get(undefined, load);
+
+    // Assert
+    expect(load).toHaveBeenCalledTimes(2);
+  });
+
+  test("Should not cache load errors", () => {
+    // Arrange
+    const cache = new PolicyCache<string>("test");
+
+    // Act
+    expect(() =>
+      cache.get(1, () => {
+        throw new Error("parse error");
+      }),
+    ).toThrow("parse error");
+    const result = cache.get(1, () => "policy");
+
+    // Assert
+    expect(result).toBe("policy");
+  });
+
+  test("Should reload after invalidate", () => {
+    // Arrange
+    const cache = new PolicyCache<string>("test");
+    cache.get(1, () => "v1");
+
+    // Act
+    cache.invalidate();
+    const result = cache.get(1, () => "reloaded");
+
+    // Assert
+    expect(result).toBe("reloaded");
+  });
+});
@@ -0,0 +1,95 @@
+// Copyright (c) Microsoft Corporation.
+// Licensed under the MIT license.
+
+// Use the CCF polyfill to mock-up all key-value map functionality for unit-test
+import "@microsoft/ccf-app/polyfill.js";
+import { describe, expect, test } from "@jest/globals";
+import { ccf } from "@microsoft/ccf-app/global";
+import { encode, Tag } from "cbor-x";
+import {
+  CREATED_AT_HEADER,
+  ProposalStore,
+} from "../../../src/repositories/ProposalStore";
+
+// Build a COSE_Sign1 document with the given creation time
+const coseProposal = (createdAt: number): ArrayBuffer => {
+  const protectedHeader = encode({ [CREATED_AT_HEADER]: createdAt });
+  const payload = new Uint8Array(ccf.strToBuf(`${createdAt}`));
+  const cose = encode(
+    new Tag([protectedHeader, {}, payload, new Uint8Array(0)], 18),
+  );
+  return new Uint8Array(cose).buffer;
+};
+
+const proposalId = (proposal: ArrayBuffer): ArrayBuffer =>
+  ccf.crypto.digest("SHA-256", proposal);
+
+// The payload is followed by the one byte encoding of the empty signature
+const createdAtOf = (proposal: ArrayBuffer): string =>
+  new TextDecoder().decode(proposal.slice(-11, -1));
+
+describe("Test ProposalStore", () => {
+  test("Should keep the watermark and trim the oldest proposals", () => {
+    // Arrange
+    const map = ccf.kv["public:test.proposals.trim"];
+    const store = new ProposalStore(map, "public:test.proposals.trim.index");
+
+    // Act
+    for (let createdAt = 1000000001; createdAt <= 1000000007; createdAt++) {
+      const proposal = coseProposal(createdAt);
+      store.storeProposal(proposalId(proposal), proposal, createdAt, 5);
+    }
+
+    // Assert
+    expect(store.watermark()).toBe(1000000007);
+    expect(map.size).toBe(5);
+    expect(store.index.oldestId).toBe(3);
+    expect(store.index.latestId).toBe(7);
+    expect(store.list(0, 100).map((p) => p.seqno)).toEqual([3, 4, 5, 6, 7]);
+  });
+
+  test("Should page the proposals since a sequence number", () => {
+    // Arrange
+    const map = ccf.kv["public:test.proposals.page"];
+    const store = new ProposalStore(map, "public:test.proposals.page.index");
+    for (let createdAt = 1000000001; createdAt <= 1000000004; createdAt++) {
+      const proposal = coseProposal(createdAt);
+      store.storeProposal(proposalId(proposal), proposal, createdAt, 5);
+    }
+
+    // Act
+    const page = store.list(1, 2);
+
+    // Assert
+    expect(page.map((p) => p.seqno)).toEqual([2, 3]);
+    expect(page.map((p) => createdAtOf(p.proposal))).toEqual([
+      "1000000002",
+      "1000000003",
+    ]);
+    expect(store.list(4, 2)).toEqual([]);
+  });
+
+  test("Should index the proposals stored before the index existed", () => {
+    // Arrange
+    const map = ccf.kv["public:test.proposals.legacy"];
+    const store = new ProposalStore(map, "public:test.proposals.legacy.index");
+    [1000000003, 1000000001, 1000000002].forEach((createdAt) => {
+      const proposal = coseProposal(createdAt);
+      map.set(proposalId(proposal), proposal);
+    });
+
+    // Act & Assert
+    expect(store.watermark()).toBe(1000000003);
+    expect(store.list(0, 100).map((p) => createdAtOf(p.proposal))).toEqual([
+      "1000000001",
+      "1000000002",
+      "1000000003",
+    ]);
+
+    const proposal = coseProposal(1000000004);
+    store.storeProposal(proposalId(proposal), proposal, 1000000004, 5);
+    expect(store.index.latestId).toBe(4);
+    expect(store.index.store.get(1)?.createdAt).toBe(1000000001);
+    expect(store.watermark()).toBe(1000000004);
+  });
+});
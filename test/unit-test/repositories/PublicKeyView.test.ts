@@ -0,0 +1,104 @@
+// Copyright (c) Microsoft Corporation.
+// Licensed under the MIT license.
+
+// Use the CCF polyfill to mock-up all key-value map functionality for unit-test
+import "@microsoft/ccf-app/polyfill.js";
+import { describe, expect, test } from "@jest/globals";
+import { PublicKeyView } from "../../../src/repositories/PublicKeyView";
+import { IKeyItem } from "../../../src/endpoints/IKeyItem";
+
+const keyItem: IKeyItem = {
+  kty: "OKP",
+  crv: "X25519",
+  x: "mF2O3pgG3Q7c9PCXuzrWpRDc_ZvEAYkgYwRuu9bg4E0",
+  d: "private",
+  kid: "abc_1",
+  id: 11,
+  timestamp: 1700000000000,
+};
+
+describe("Test PublicKeyView", () => {
+  test("Should serialize the public forms without the private key", () => {
+    // Act
+    const item = PublicKeyView.fromKeyItem(1, keyItem);
+
+    // Assert
+    expect(item.id).toBe(1);
+    expect(item.kid).toBe("abc_1");
+    expect(item.timestamp).toBe(1700000000000);
+    expect(JSON.parse(item.jwk).d).toBeUndefined();
+    expect(JSON.parse(item.jwk).x).toBe(keyItem.x);
+    expect(JSON.parse(item.tinkKeySet).primaryKeyId).toBe(11);
+    expect(JSON.parse(item.tinkPublicKey).id).toBe("11");
+    expect(keyItem.d).toBe("private");
+  });
+
+  test("Should add the receipt to a serialized key", () => {
+    // Arrange
+    const item = PublicKeyView.fromKeyItem(1, keyItem);
+
+    // Act
+    const withReceipt = JSON.parse(
+      PublicKeyView.withReceipt(item.jwk, '{"cert":"x"}'),
+    );
+
+    // Assert
+    expect(withReceipt.kid).toBe("abc_1");
+    expect(withReceipt.receipt).toBe('{"cert":"x"}');
+  });
+
+  test("Should store the records of a new key as the latest key", () => {
+    // Arrange
+    const view = new PublicKeyView("public:test.public_keys");
+    const newer: IKeyItem = { ...keyItem, kid: "def_2", id: 12 };
+
+    // Act
+    view.storeItem(1, keyItem);
+    view.storeItem(2, newer);
+
+    // Assert
+    expect(view.get(1)?.kid).toBe("abc_1");
+    expect(view.getByKid("abc_1")?.id).toBe(1);
+    expect(view.getByKid("def_2")?.id).toBe(2);
+    expect(view.latestItem()?.kid).toBe("def_2");
+    expect(view.getByKid("unknown")).toBeUndefined();
+  });
+
+  test("Should skip pending keys to find the newest active key", () => {
+    // Arrange
+    const view = new PublicKeyView("public:test.pending_keys");
+    const now = 1700000000000;
+    view.storeItem(1, { ...keyItem, kid: "abc_1", timestamp: now - 1000 });
+    view.storeItem(2, { ...keyItem, kid: "abc_2", timestamp: now + 1000 });
+    view.storeItem(3, { ...keyItem, kid: "abc_3", timestamp: now + 2000 });
+
+    // Act
+    const [activeId, nextActivationTime] = view.latestActiveId(3, now);
+
+    // Assert
+    expect(activeId).toBe(1);
+    expect(nextActivationTime).toBe(now + 1000);
+    expect(view.latestActiveId(1, now)).toEqual([1, undefined]);
+    expect(view.latestActiveId(3, now - 2000)).toEqual([0, now - 1000]);
+  });
+
+  test("Should find the key that was active at a given time", () => {
+    // Arrange
+    const view = new PublicKeyView("public:test.valid_at_keys");
+    const start = 1700000000000;
+    for (let id = 1; id <= 9; id++) {
+      view.storeItem(id, { ...keyItem, kid: `abc_${id}`, timestamp: start + id * 1000 });
+    }
+
+    // Act & Assert
+    expect(view.idValidAt(start + 1000, 1, 9)).toBe(1);
+    expect(view.idValidAt(start + 4500, 1, 9)).toBe(4);
+    expect(view.idValidAt(start + 9000, 1, 9)).toBe(9);
+    expect(view.idValidAt(start + 99000, 1, 9)).toBe(9);
+    expect(view.idValidAt(start, 1, 9)).toBe(0);
+    // Keys before the oldest retained key are not returned
+    expect(view.idValidAt(start + 2000, 3, 9)).toBe(0);
+    // Keys without a view item fall back to the given timestamps
+    expect(view.idValidAt(start + 2500, 1, 9, (id) => start + id * 500)).toBe(5);
+  });
+});
@@ -0,0 +1,74 @@
+// Copyright (c) Microsoft Corporation.
+// Licensed under the MIT license.
+
+// Use the CCF polyfill to mock-up all key-value map functionality for unit-test
+import "@microsoft/ccf-app/polyfill.js";
+import { beforeEach, describe, expect, jest, test } from "@jest/globals";
+import { ReceiptStore } from "../../../src/repositories/ReceiptStore";
+
+const getStateRange = jest.fn<(...args: any[]) => any>();
+const dropCachedStates = jest.fn<(...args: any[]) => any>();
+
+beforeEach(() => {
+  getStateRange.mockReset();
+  dropCachedStates.mockReset();
+  (globalThis as any).ccf.historical = { getStateRange, dropCachedStates };
+});
+
+describe("Test ReceiptStore", () => {
+  test("Should return undefined while the historical state is loading", () => {
+    // Arrange
+    const store = new ReceiptStore();
+    getStateRange.mockReturnValue(null);
+
+    // Act
+    const receipt = store.get("kid", 12);
+
+    // Assert
+    expect(receipt).toBeUndefined();
+    expect(getStateRange).toHaveBeenCalledWith(12, 12, 12, 1800);
+  });
+
+  test("Should serve a loaded receipt from memory", () => {
+    // Arrange
+    const store = new ReceiptStore();
+    getStateRange.mockReturnValue([{ receipt: { leaf: "abc" } }]);
+
+    // Act
+    const first = store.get("kid", 12);
+    const second = store.get("kid", 12);
+
+    // Assert
+    expect(first).toBe(JSON.stringify({ leaf: "abc" }));
+    expect(second).toBe(first);
+    expect(getStateRange).toHaveBeenCalledTimes(1);
+  });
+
+  test("Should use the seqno as handle for each write", () => {
+    // Arrange
+    const store = new ReceiptStore();
+    getStateRange.mockReturnValue(null);
+
+    // Act
+    store.get("kid_1", 12);
+    store.get("kid_2", 15);
+
+    // Assert
+    expect(getStateRange.mock.calls.map((call) => call[0])).toEqual([12, 15]);
+  });
+
+  test("Should drop the receipt and the historical state on evict", () => {
+    // Arrange
+    const store = new ReceiptStore();
+    getStateRange.mockReturnValue([{ receipt: { leaf: "abc" } }]);
+    store.get("kid", 12);
+
+    // Act
+    store.evict("kid", 12);
+    store.get("kid", 12);
+
+    // Assert
+    expect(dropCachedStates).toHaveBeenCalledWith(12);
+    expect(getStateRange).toHaveBeenCalledTimes(2);
+  });
+});
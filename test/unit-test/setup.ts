@@ -1,4 +1,10 @@
 // Copyright (c) Microsoft Corporation.
 // Licensed under the MIT license.
 
-// TODO
+// Use the CCF polyfill to mock-up all key-value map functionality for unit-test
+import "@microsoft/ccf-app/polyfill.js";
+
+// The polyfill does not track KV versions and throws from getVersionOfPreviousWrite.
+// Report every entry as never written instead, which leaves version-keyed caches cold.
+const kvMapPrototype = Object.getPrototypeOf(ccf.kv["unit-test-setup"]);
+kvMapPrototype.getVersionOfPreviousWrite = (): number | undefined => undefined;
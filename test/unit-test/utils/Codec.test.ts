@@ -0,0 +1,105 @@
+// Copyright (c) Microsoft Corporation.
+// Licensed under the MIT license.
+
+import { describe, expect, test } from "@jest/globals";
+import { Base64 } from "js-base64";
+import {
+  fromBase64Url,
+  fromHex,
+  toBase64Url,
+  toHex,
+} from "../../../src/utils/Codec";
+
+// The per byte string implementation the codec replaced
+const naiveHex = (buf: ArrayBuffer): string =>
+  Array.from(new Uint8Array(buf))
+    .map((n) => n.toString(16).padStart(2, "0"))
+    .join("");
+
+const randomBytes = (length: number): Uint8Array => {
+  const bytes = new Uint8Array(length);
+  for (let i = 0; i < length; i++) {
+    bytes[i] = Math.floor(Math.random() * 256);
+  }
+  return bytes;
+};
+
+describe("Test Codec", () => {
+  test("Should encode and decode hex of every length", () => {
+    for (let length = 0; length < 100; length++) {
+      // Arrange
+      const bytes = randomBytes(length);
+
+      // Act
+      const hex = toHex(bytes);
+
+      // Assert
+      expect(hex).toBe(naiveHex(bytes.buffer));
+      expect(fromHex(hex)).toEqual(bytes);
+      expect(fromHex(hex.toUpperCase())).toEqual(bytes);
+    }
+  });
+
+  test("Should encode typed array views without copying the whole buffer", () => {
+    // Arrange
+    const bytes = new Uint8Array([0x00, 0x0f, 0xa5, 0xff]);
+    const view = new DataView(bytes.buffer, 1, 2);
+
+    // Act & Assert
+    expect(toHex(view)).toBe("0fa5");
+    expect(toHex(bytes.subarray(2))).toBe("a5ff");
+    expect(toHex(bytes.buffer)).toBe("000fa5ff");
+  });
+
+  test("Should encode inputs larger than one string chunk", () => {
+    // Arrange
+    const bytes = randomBytes(100000);
+
+    // Act & Assert
+    expect(toHex(bytes)).toBe(naiveHex(bytes.buffer));
+    expect(toBase64Url(bytes)).toBe(Base64.fromUint8Array(bytes, true));
+  });
+
+  test("Should reject invalid hex", () => {
+    expect(() => fromHex("abc")).toThrow("odd length");
+    expect(() => fromHex("0g")).toThrow("Invalid hex digit at position 0");
+    expect(() => fromHex("00é0")).toThrow("Invalid hex digit at position 2");
+  });
+
+  test("Should encode and decode base64url of every length", () => {
+    for (let length = 0; length < 100; length++) {
+      // Arrange
+      const bytes = randomBytes(length);
+
+      // Act
+      const encoded = toBase64Url(bytes);
+
+      // Assert
+      expect(encoded).toBe(Base64.fromUint8Array(bytes, true));
+      expect(fromBase64Url(encoded)).toEqual(bytes);
+      expect(fromBase64Url(Base64.fromUint8Array(bytes))).toEqual(bytes);
+    }
+  });
+
+  test("Should skip whitespace in wrapped base64", () => {
+    // Arrange
+    const bytes = randomBytes(100);
+    const wrapped = `${Base64.fromUint8Array(bytes).replace(/(.{76})/g, "$1\r\n")}\n`;
+
+    // Act
+    const decoded = fromBase64Url(wrapped);
+
+    // Assert
+    expect(decoded).toEqual(bytes);
+    expect(decoded.buffer.byteLength).toBe(100);
+  });
+
+  test("Should reject invalid base64", () => {
+    expect(() => fromBase64Url("ab.d")).toThrow(
+      "Invalid base64 digit at position 2",
+    );
+    expect(() => fromBase64Url("ab=d")).toThrow(
+      "Invalid base64 digit at position 2",
+    );
+  });
+});
@@ -54,6 +54,38 @@ describe("Logger", () => {
     // Assert
     expect(result).toBe(false);
   });
+
+  test("should not build lazy messages below the log level", () => {
+    // Arrange
+    Logger.setLogLevel(LogLevel.INFO);
+    const message = jest.fn(() => "This is a debug message");
+    const arg = jest.fn(() => ({ key: "value" }));
+
+    // Act
+    const result = Logger.debug(message, new LogContext(), arg);
+
+    // Assert
+    expect(result).toBe(false);
+    expect(message).not.toHaveBeenCalled();
+    expect(arg).not.toHaveBeenCalled();
+  });
+
+  test("should build lazy messages at the log level", () => {
+    // Arrange
+    const logSpy = jest.spyOn(console, "log").mockImplementation(() => { });
+    Logger.setLogLevel(LogLevel.DEBUG);
+    const context = new LogContext().appendScope("Scope1");
+
+    // Act
+    const result = Logger.debug(() => "This is a debug message", context, () => ({ key: "value" }));
+
+    // Assert
+    expect(result).toBe(true);
+    expect(logSpy).toHaveBeenCalledWith(
+      '[DEBUG] [scope=Scope1] This is a debug message {\n  "key": "value"\n}',
+    );
+    logSpy.mockRestore();
+  });
 });
 
 describe("LogContext", () => {
@@ -105,6 +137,30 @@ describe("LogContext", () => {
     expect(context.getBaseScope()).toBeUndefined();
   });
 
+  test("should add a scope for the duration of withScope", () => {
+    const context = new LogContext();
+    context.appendScope("Scope1");
+
+    const result = context.withScope("Scope2", (scoped) => {
+      expect(scoped).toBe(context);
+      return scoped.getFormattedScopeString();
+    });
+
+    expect(result).toBe("Scope1->Scope2");
+    expect(context.getFormattedScopeString()).toBe("Scope1");
+  });
+
+  test("should remove the withScope scope when the function throws", () => {
+    const context = new LogContext();
+    context.appendScope("Scope1");
+
+    expect(() => context.withScope("Scope2", () => {
+      throw new Error("failure");
+    })).toThrow("failure");
+
+    expect(context.getFormattedScopeString()).toBe("Scope1");
+  });
+
   test("should clone LogContext correctly", () => {
     const context = new LogContext();
     context.appendScope("Scope1").setRequestId("12345");
@@ -0,0 +1,74 @@
+// Copyright (c) Microsoft Corporation.
+// Licensed under the MIT license.
+
+import { afterEach, describe, expect, jest, test } from "@jest/globals";
+import { LruCache } from "../../../src/utils/LruCache";
+
+describe("Test LruCache", () => {
+  afterEach(() => {
+    jest.restoreAllMocks();
+  });
+
+  test("Should get a cached value", () => {
+    // Arrange
+    const cache = new LruCache<string, number>(2);
+
+    // Act
+    cache.set("a", 1);
+
+    // Assert
+    expect(cache.get("a")).toBe(1);
+    expect(cache.get("b")).toBeUndefined();
+  });
+
+  test("Should evict the least recently used entry", () => {
+    // Arrange
+    const cache = new LruCache<string, number>(2);
+    cache.set("a", 1);
+    cache.set("b", 2);
+
+    // Act
+    cache.get("a");
+    cache.set("c", 3);
+
+    // Assert
+    expect(cache.size).toBe(2);
+    expect(cache.get("a")).toBe(1);
+    expect(cache.get("b")).toBeUndefined();
+    expect(cache.get("c")).toBe(3);
+  });
+
+  test("Should expire entries after the time to live", () => {
+    // Arrange
+    const now = jest.spyOn(Date, "now").mockReturnValue(1000);
+    const cache = new LruCache<string, number>(2, 100);
+    cache.set("a", 1);
+
+    // Act
+    now.mockReturnValue(1099);
+    const beforeExpiry = cache.get("a");
+    now.mockReturnValue(1100);
+    const afterExpiry = cache.get("a");
+
+    // Assert
+    expect(beforeExpiry).toBe(1);
+    expect(afterExpiry).toBeUndefined();
+    expect(cache.size).toBe(0);
+  });
+
+  test("Should delete and clear entries", () => {
+    // Arrange
+    const cache = new LruCache<string, number>(3);
+    cache.set("a", 1);
+    cache.set("b", 2);
+
+    // Act
+    const deleted = cache.delete("a");
+
+    // Assert
+    expect(deleted).toBe(true);
+    expect(cache.get("a")).toBeUndefined();
+    cache.clear();
+    expect(cache.size).toBe(0);
+  });
+});
@@ -80,13 +80,14 @@ describe("Test ServiceRequest properties", () => {
         // Act
         const serviceRequest =
             new ServiceRequest<void>(logContext, <any>request);
+        serviceRequest.isAuthenticated();
         // Dump all messages received by debugSpy
         console.dir(debugSpy.mock.calls, { depth: null });
 
         // Assert
         expect(serviceRequest.error).toBeUndefined();
         expect(debugSpy).toHaveBeenCalledWith(
-            `[INFO] [requestId=req,scope=ServiceRequest->loadSettingsFromMap] Loading settings from map: {\"map\":{}}`,
+            `[INFO] [requestId=req,scope=ServiceRequest->loadSettingsFromMap] Loading settings from map`,
         );
         expect(debugSpy).toHaveBeenCalledWith(
             `[DEBUG] [requestId=req,scope=ServiceRequest->loadSettingsFromMap] Loading settings: {\"service\":{\"name\":\"azure-privacy-sandbox-kms\",\"description\":\"Key Management Service\",\"version\":\"10.0.0\",\"debug\":true}}`,
@@ -135,4 +136,58 @@ describe("Test ServiceRequest properties", () => {
         // Clean up
         debugSpy.mockRestore();
     });
+
+    test("Should not parse the body of an unauthenticated request", () => {
+        // Arrange
+        const json = jest.fn(() => ({ attestation: "large" }));
+        const request = {
+            headers: {},
+            query: "",
+            caller: { policy: "unknown_policy" },
+            body: { json },
+        };
+        const serviceRequest =
+            new ServiceRequest<any>(new LogContext(), <any>request);
+
+        // Act
+        const [_, isValidIdentity] = serviceRequest.isAuthenticated();
+
+        // Assert
+        expect(isValidIdentity.failure).toBe(true);
+        expect(json).not.toHaveBeenCalled();
+    });
+
+    test("Should parse the body once on first access", () => {
+        // Arrange
+        const json = jest.fn(() => ({ key: "value" }));
+        const request = { headers: {}, query: "", body: { json } };
+        const serviceRequest =
+            new ServiceRequest<any>(new LogContext(), <any>request);
+
+        // Act
+        const first = serviceRequest.body;
+        const second = serviceRequest.body;
+
+        // Assert
+        expect(first).toEqual({ key: "value" });
+        expect(second).toBe(first);
+        expect(json).toHaveBeenCalledTimes(1);
+    });
+
+    test("Should decode the query on first access and cache it", () => {
+        // Arrange
+        const headers = { "x-ms-request-id": "from-header" };
+        const request = { headers, query: "kid=a%2Bb&fmt=tink", body: { json: () => ({}) } };
+        const serviceRequest =
+            new ServiceRequest<any>(new LogContext(), <any>request);
+
+        // Act
+        const query = serviceRequest.query;
+
+        // Assert
+        expect(query).toEqual({ kid: "a+b", fmt: "tink" });
+        expect(serviceRequest.query).toBe(query);
+        expect(serviceRequest.headers).toBe(headers);
+        expect(serviceRequest.requestId).toBe("from-header");
+    });
 });
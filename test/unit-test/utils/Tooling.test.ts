@@ -10,7 +10,10 @@ import {
   queryParams,
   isPemPublicKey,
   setKeyHeaders,
+  etagMatches,
+  positiveIntegerParam,
   aToHex,
+  hexToArrayBuffer,
 } from "../../../src";
 import fs from "fs";
 
@@ -55,6 +58,25 @@ test("Should parse query parameters successfully", () => {
   });
 });
 
+test("Should decode query parameters", () => {
+  // Arrange
+  const request = {
+    query: "kid=abc%5F1&name=a+b&flag&bad=%E0%A4%A&&",
+  };
+
+  // Act
+  const result = queryParams(<any>request);
+
+  // Assert
+  expect(result).toEqual({
+    kid: "abc_1",
+    name: "a b",
+    flag: "",
+    bad: "%E0%A4%A",
+  });
+  expect(queryParams(<any>{ query: "" })).toEqual({});
+});
+
 test("Should detect public PEM key", () => {
   // Arrange
   const pem = fs.readFileSync("test/data-samples/publicWrapKey.pem", "utf8");
@@ -88,6 +110,36 @@ test("Should set key headers correctly", () => {
   });
 });
 
+test("Should set key headers with max age and etag", () => {
+  // Act
+  const headers = setKeyHeaders(60, "3.12");
+
+  // Assert
+  expect(headers).toEqual({
+    "cache-control": "max-age=60",
+    date: expect.any(String),
+    etag: '"3.12"',
+  });
+});
+
+test("Should match If-None-Match against an etag", () => {
+  expect(etagMatches('"3.12"', "3.12")).toBe(true);
+  expect(etagMatches('"2.9", W/"3.12"', "3.12")).toBe(true);
+  expect(etagMatches("*", "3.12")).toBe(true);
+  expect(etagMatches('"3.13"', "3.12")).toBe(false);
+  expect(etagMatches(undefined, "3.12")).toBe(false);
+  expect(etagMatches('"3.12"', undefined)).toBe(false);
+});
+
+test("Should parse positive integer query parameters", () => {
+  expect(positiveIntegerParam(undefined, 20)).toBe(20);
+  expect(positiveIntegerParam("", 20)).toBe(20);
+  expect(positiveIntegerParam("5", 20)).toBe(5);
+  expect(positiveIntegerParam("0", 20)).toBeUndefined();
+  expect(positiveIntegerParam("1.5", 20)).toBeUndefined();
+  expect(positiveIntegerParam("abc", 20)).toBeUndefined();
+});
+
 test("Should convert to hex", () => {
   // Arrange
   const arrayBuffer = new Uint8Array([1, 2, 3, 4, 5, 6, 7, 8]).buffer;
@@ -98,3 +150,16 @@ test("Should convert to hex", () => {
   // Assert
   expect(result).toEqual("0102030405060708");
 });
+
+test("Should convert hex back to bytes", () => {
+  // Arrange
+  const bytes = new Uint8Array([0, 15, 16, 127, 128, 255]);
+
+  // Act
+  const hex = arrayBufferToHex(bytes.buffer);
+  const result = new Uint8Array(hexToArrayBuffer(hex));
+
+  // Assert
+  expect(hex).toEqual("000f107f80ff");
+  expect(Array.from(result)).toEqual(Array.from(bytes));
+});